@@ -1,4 +1,6 @@
 from concurrent import futures
+import argparse
+import os
 import time
 
 import grpc
@@ -29,12 +31,29 @@ class ExampleServiceServicer(example_pb2_grpc.ExampleServiceServicer):
         return user
 
 if __name__ == '__main__':
-    # Run a gRPC server with one thread.
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
+    # Settings can be passed as flags or set with environment variables.
+    parser = argparse.ArgumentParser(description='Runs the example service.')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8080)))
+    parser.add_argument('--max-workers', type=int, default=int(os.environ.get('MAX_WORKERS', 10)))
+    parser.add_argument('--max-concurrent-rpcs', type=int,
+                        default=int(os.environ.get('MAX_CONCURRENT_RPCS', 0)) or None)
+    parser.add_argument('--max-message-size', type=int,
+                        default=int(os.environ.get('MAX_MESSAGE_SIZE', 4 * 1024 * 1024)))
+    settings = parser.parse_args()
+
+    # Run a gRPC server with a pool of worker threads.
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=settings.max_workers),
+        options=[
+            ('grpc.max_send_message_length', settings.max_message_size),
+            ('grpc.max_receive_message_length', settings.max_message_size)
+        ],
+        maximum_concurrent_rpcs=settings.max_concurrent_rpcs
+    )
     # Adds the servicer class to the server.
     example_pb2_grpc.add_ExampleServiceServicer_to_server(ExampleServiceServicer(), server)
-    server.add_insecure_port('0.0.0.0:8080')
+    server.add_insecure_port('0.0.0.0:{}'.format(settings.port))
     server.start()
-    print('API server started. Listening at 0.0.0.0:8080.')
+    print('API server started. Listening at 0.0.0.0:{}.'.format(settings.port))
     while True:
         time.sleep(60)
\ No newline at end of file
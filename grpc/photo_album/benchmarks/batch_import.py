@@ -0,0 +1,90 @@
+"""Compares importing and fetching photos one at a time with the batch RPCs.
+
+Usage:
+    python batch_import.py [--photos 10000] [--batch-size 1000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent import futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+import grpc
+
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from models import local as model
+from models.memory import MemoryStorage
+from models.sqlite import SQLiteStorage
+from server import ExamplePhotoServiceServicer
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def create_one_by_one(stub, parent, count):
+    return [
+        stub.CreatePhoto(example_pb2.CreatePhotoRequest(
+            parent=parent, photo=example_pb2.Photo(display_name='photo-{}'.format(i)))).name
+        for i in range(count)
+    ]
+
+def create_in_batches(stub, parent, count, batch_size):
+    names = []
+    for start in range(0, count, batch_size):
+        request = example_pb2.BatchCreatePhotosRequest(
+            parent=parent,
+            photos=[
+                example_pb2.Photo(display_name='photo-{}'.format(i))
+                for i in range(start, min(start + batch_size, count))
+            ]
+        )
+        names.extend(photo.name for photo in stub.BatchCreatePhotos(request).photos)
+    return names
+
+def get_one_by_one(stub, names):
+    for name in names:
+        stub.GetPhoto(example_pb2.GetPhotoRequest(name=name))
+
+def get_in_batches(stub, names, batch_size):
+    for start in range(0, len(names), batch_size):
+        response = stub.BatchGetPhotos(example_pb2.BatchGetPhotosRequest(names=names[start:start + batch_size]))
+        assert not any(result.error for result in response.results)
+
+def run(label, storage, args):
+    model.configure(storage)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(ExamplePhotoServiceServicer(), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    try:
+        with grpc.insecure_channel('127.0.0.1:{}'.format(port)) as channel:
+            stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+            single = stub.CreateUser(example_pb2.User(display_name='single')).name
+            batched = stub.CreateUser(example_pb2.User(display_name='batched')).name
+
+            single_names, single_create = timed(create_one_by_one, stub, single, args.photos)
+            batch_names, batch_create = timed(create_in_batches, stub, batched, args.photos, args.batch_size)
+            _, single_get = timed(get_one_by_one, stub, single_names)
+            _, batch_get = timed(get_in_batches, stub, batch_names, args.batch_size)
+    finally:
+        server.stop(None)
+
+    print('{}: {} photos, batches of {}'.format(label, args.photos, args.batch_size))
+    for op, one_by_one, batch in (('create', single_create, batch_create), ('get', single_get, batch_get)):
+        print('    {:<7} one by one {:>8.0f} photos/s  batched {:>8.0f} photos/s  ({:.0f}x)'.format(
+            op, args.photos / one_by_one, args.photos / batch, one_by_one / batch))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--photos', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    run('memory', MemoryStorage(), args)
+    with tempfile.TemporaryDirectory() as directory:
+        run('sqlite', SQLiteStorage(os.path.join(directory, 'photos.db')), args)
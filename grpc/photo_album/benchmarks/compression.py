@@ -0,0 +1,144 @@
+"""Measures bytes on the wire and CPU time with and without compression,
+   for ListPhotos pages and for JPEG downloads and uploads.
+
+Usage:
+    python compression.py [--pages 500] [--transfers 50]
+"""
+import argparse
+import hashlib
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent import futures
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+sys.path.insert(1, os.path.join(ROOT, 'client'))
+
+import grpc
+
+from client import ExamplePhotoServiceClient, PhotoDataBlockRequestIterable
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from helpers import compression
+from models import local as model
+from models.memory import MemoryStorage
+from server import ExamplePhotoServiceServicer
+from storage_backends import make_photo
+
+PHOTO_PATH = os.path.join(ROOT, 'client', 'flower.jpg')
+
+class CountingProxy(object):
+    """Forwards TCP connections to a port and counts the bytes each way."""
+    def __init__(self, port):
+        self.target = ('127.0.0.1', port)
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        self.sent = 0
+        self.received = 0
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while True:
+            client, _ = self.listener.accept()
+            upstream = socket.create_connection(self.target)
+            threading.Thread(target=self.pump, args=(client, upstream, 'received'), daemon=True).start()
+            threading.Thread(target=self.pump, args=(upstream, client, 'sent'), daemon=True).start()
+
+    def pump(self, source, destination, counter):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                setattr(self, counter, getattr(self, counter) + len(data))
+                destination.sendall(data)
+        except OSError:
+            pass
+        destination.close()
+
+def measure(label, interceptors, server_compression, work):
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=4),
+        interceptors=interceptors,
+        compression=server_compression
+    )
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(ExamplePhotoServiceServicer(page_cache_bytes=0), server)
+    proxy = CountingProxy(server.add_insecure_port('127.0.0.1:0'))
+    server.start()
+    try:
+        with grpc.insecure_channel('127.0.0.1:{}'.format(proxy.port)) as channel:
+            stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+            work(stub, 1)
+            proxy.sent = proxy.received = 0
+            wall, cpu = time.perf_counter(), time.process_time()
+            calls = work(stub, None)
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    finally:
+        server.stop(None)
+    print('    {:<24} {:>9.0f} B/call to client {:>9.0f} B/call to server {:>7.0f}us CPU/call {:>7.0f}us/call'.format(
+        label, proxy.sent / calls, proxy.received / calls, cpu / calls * 1e6, wall / calls * 1e6))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--transfers', type=int, default=50)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    os.makedirs('photos')
+    model.configure(MemoryStorage())
+    parent = '//myapiservice.com/users/user-0'
+    model.create_user(parent, example_pb2.User(name=parent))
+    photos = [make_photo(parent, i) for i in range(1000)]
+    model.create_photos(parent, photos)
+    with open(PHOTO_PATH, 'rb') as f:
+        data = f.read()
+    model.upload_photo(photos[0].name, PHOTO_PATH, hashlib.new('md5', data).hexdigest())
+
+    def list_pages(stub, count):
+        count = count or args.pages
+        token = None
+        for _ in range(count):
+            request = example_pb2.ListPhotosRequest(parent=parent, order_by=1, page_token=token)
+            token = stub.ListPhotos(request).next_page_token or None
+        return count
+
+    def download(stub, count):
+        count = count or args.transfers
+        for _ in range(count):
+            for _ in stub.DownloadPhoto(example_pb2.DownloadPhotoRequest(name=photos[0].name)):
+                pass
+        return count
+
+    def upload_with(upload_compression):
+        def upload(stub, count):
+            count = count or args.transfers
+            for _ in range(count):
+                stub.UploadPhoto(PhotoDataBlockRequestIterable(photos[1].name, PHOTO_PATH), compression=upload_compression)
+            return count
+        return upload
+
+    print('ListPhotos, pages of 10:')
+    measure('none', None, None, list_pages)
+    for name in compression.ALGORITHMS:
+        methods = compression.parse_methods('ListPhotos={}'.format(name))
+        measure(name, [compression.CompressionInterceptor(methods)], None, list_pages)
+
+    print('DownloadPhoto, {} KB JPEG:'.format(len(data) // 1024))
+    measure('none', None, None, download)
+    measure('gzip, skipped if JPEG', [compression.CompressionInterceptor({'DownloadPhoto': grpc.Compression.Gzip})],
+            None, download)
+    measure('gzip, always', None, grpc.Compression.Gzip, download)
+
+    print('UploadPhoto, {} KB JPEG:'.format(len(data) // 1024))
+    client = ExamplePhotoServiceClient(compression='gzip')
+    measure('none', None, None, upload_with(None))
+    measure('gzip, skipped if JPEG', None, None,
+            upload_with(client.compression_for('UploadPhoto', len(data), data)))
+    measure('gzip, always', None, None, upload_with(grpc.Compression.Gzip))
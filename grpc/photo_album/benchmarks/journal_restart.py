@@ -0,0 +1,57 @@
+"""Measures how long the journaled in-memory store takes to restart.
+
+Usage:
+    python journal_restart.py [--photos 1000000] [--tail 10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from codegen import example_pb2
+from models.journal import JournaledStorage
+from storage_backends import API_SERVICE_NAME, make_photo
+
+USERS = 100
+BATCH_SIZE = 10000
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--photos', type=int, default=1000000)
+    parser.add_argument('--tail', type=int, default=10000,
+                        help='Mutations logged after the snapshot.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Never snapshot on its own; the benchmark takes one explicitly
+        storage = JournaledStorage(directory, snapshot_every=float('inf'))
+        parents = ['{}/users/user-{}'.format(API_SERVICE_NAME, u) for u in range(USERS)]
+        for parent in parents:
+            storage.create_user(parent, example_pb2.User(name=parent))
+        per_user = args.photos // USERS
+        for parent in parents:
+            for start in range(0, per_user, BATCH_SIZE):
+                count = min(BATCH_SIZE, per_user - start)
+                storage.create_photos(parent, [make_photo(parent, start + i) for i in range(count)])
+
+        start = time.perf_counter()
+        storage.snapshot()
+        snapshot_elapsed = time.perf_counter() - start
+        snapshot_size = os.path.getsize(storage.snapshot_path())
+
+        for i in range(args.tail):
+            storage.create_photo(parents[i % USERS], make_photo(parents[i % USERS], i))
+        storage.log.close()
+        del storage
+
+        start = time.perf_counter()
+        restored = JournaledStorage(directory)
+        restart_elapsed = time.perf_counter() - start
+
+        print('photos:          {}'.format(len(restored.photo_index)))
+        print('snapshot:        {:.1f} MB written in {:.2f}s'.format(snapshot_size / 1e6, snapshot_elapsed))
+        print('restart:         {:.2f}s ({:.2f}us per photo)'.format(
+            restart_elapsed, restart_elapsed / len(restored.photo_index) * 1e6))
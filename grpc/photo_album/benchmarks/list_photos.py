@@ -0,0 +1,52 @@
+"""Measures ListPhotos page reads in the in-memory store as the number of
+   photos per user grows.
+
+Usage:
+    python list_photos.py [--max-photos 1000000] [--pages 100]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from codegen import example_pb2
+from models import local as model
+from photo_lookup import API_SERVICE_NAME, seed
+
+ORDERS = (
+    example_pb2.ListPhotosRequest.DISPLAY_NAME, #pylint: disable=no-member
+    example_pb2.ListPhotosRequest.CREATED_AT #pylint: disable=no-member
+)
+
+def run(count, pages):
+    parent = '{}/users/user-{}'.format(API_SERVICE_NAME, count)
+    seed(parent, count)
+
+    results = []
+    for order_by in ORDERS:
+        start = time.perf_counter()
+        start_after = None
+        for _ in range(pages):
+            photos, if_has_more_photos = model.list_photos(parent, order_by, start_after, model.PAGE_SIZE)
+            if not if_has_more_photos:
+                start_after = None
+            else:
+                start_after = model.sort_key(photos[-1], order_by)
+        results.append((time.perf_counter() - start) / pages * 1e6)
+
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-photos', type=int, default=1000000)
+    parser.add_argument('--pages', type=int, default=100)
+    args = parser.parse_args()
+
+    print('{:>10} {:>20} {:>20}'.format('photos', 'by name (us/page)', 'by time (us/page)'))
+    count = 10
+    while count <= args.max_photos:
+        by_name_us, by_time_us = run(count, args.pages)
+        print('{:>10} {:>20.3f} {:>20.3f}'.format(count, by_name_us, by_time_us))
+        count *= 10
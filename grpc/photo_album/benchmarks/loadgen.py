@@ -0,0 +1,341 @@
+"""Drives a mix of RPCs at the photo service and reports throughput and
+   latency percentiles as JSON, so that runs can be compared across
+   commits.
+
+   The server is started in this process, or as a subprocess with
+   --subprocess, on a free localhost port and in a temporary directory,
+   with any server flags given in --server-args. It is seeded with users
+   and photos over RPC before the run. Load is applied either by a fixed
+   number of workers that each send one RPC after another (--concurrency),
+   or at a fixed rate regardless of how fast the server answers (--rate),
+   in which case latency is measured from when each RPC was due, so that
+   a server that falls behind shows it.
+
+Usage:
+    python loadgen.py [--mix get=50,list=25,create=10,stream=10,upload=5]
+                      [--concurrency 8 | --rate 500] [--duration 10] [--warmup 2]
+                      [--users 10] [--photos 1000] [--subprocess]
+                      [--server-args "--mode async --storage sqlite"] [--output run.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent import futures
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+sys.path.insert(1, os.path.join(ROOT, 'client'))
+
+import grpc
+
+from client import PhotoDataBlockRequestIterable
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from helpers import config
+from storage_backends import make_photo
+
+PHOTO_PATH = os.path.join(ROOT, 'client', 'flower.jpg')
+OPERATIONS = ('create', 'get', 'list', 'stream', 'upload')
+DEFAULT_MIX = 'get=50,list=25,create=10,stream=10,upload=5'
+# Photos requested by each StreamPhotos call
+STREAM_LENGTH = 20
+# Distinct images to upload; uploads beyond this many repeat one, which
+# the server stores only once
+UPLOAD_IMAGES = 64
+SEED_BATCH_SIZE = 1000
+PERCENTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p999', 0.999))
+SERVER_START_TIMEOUT = 30
+
+def parse_mix(mix):
+    """Parses a mix such as "get=50,list=50" into operations and weights."""
+    weights = {}
+    for item in mix.split(','):
+        op, _, weight = item.partition('=')
+        if op not in OPERATIONS:
+            raise ValueError('Unknown operation {}; choose from {}.'.format(op, ', '.join(OPERATIONS)))
+        weights[op] = float(weight or 1)
+    return weights
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+@contextlib.contextmanager
+def running_server(args):
+    """Starts the server on a free port and yields its address."""
+    port = free_port()
+    server_args = shlex.split(args.server_args) + ['--host', '127.0.0.1', '--port', str(port)]
+    address = '127.0.0.1:{}'.format(port)
+    if args.subprocess:
+        with open('server.log', 'w') as log:
+            process = subprocess.Popen(
+                [sys.executable, os.path.join(ROOT, 'server', 'server.py')] + server_args,
+                stdout=log, stderr=subprocess.STDOUT)
+        try:
+            wait_for_server(address)
+            yield address
+        finally:
+            process.terminate()
+            process.wait()
+        return
+
+    settings = config.parse_args(server_args)
+    if settings.mode == 'async':
+        import asyncio
+        import aio_server
+        target = lambda: asyncio.run(aio_server.serve(settings))
+    else:
+        import server
+        target = lambda: server.serve(settings)
+    # Keeps the server's start-up messages out of the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        threading.Thread(target=target, daemon=True).start()
+        wait_for_server(address)
+    yield address
+
+def wait_for_server(address):
+    with grpc.insecure_channel(address) as channel:
+        grpc.channel_ready_future(channel).result(timeout=SERVER_START_TIMEOUT)
+
+def seed(stub, users, photos_per_user):
+    """Creates users and photos.
+
+    Returns:
+        A tuple of the user names and a list of photo names.
+    """
+    parents = []
+    names = []
+    for u in range(users):
+        user = stub.CreateUser(example_pb2.User(display_name='user-{}'.format(u), email='user-{}@example.com'.format(u)))
+        parents.append(user.name)
+        for start in range(0, photos_per_user, SEED_BATCH_SIZE):
+            count = min(SEED_BATCH_SIZE, photos_per_user - start)
+            response = stub.BatchCreatePhotos(example_pb2.BatchCreatePhotosRequest(
+                parent=user.name,
+                photos=[make_photo(user.name, start + i) for i in range(count)]
+            ))
+            names.extend(photo.name for photo in response.photos)
+    return parents, names
+
+def write_images(count):
+    """Writes copies of the sample image that differ in trailing bytes."""
+    with open(PHOTO_PATH, 'rb') as f:
+        data = f.read()
+    paths = []
+    for i in range(count):
+        path = os.path.abspath('image-{}.jpg'.format(i))
+        with open(path, 'wb') as f:
+            f.write(data + str(i).encode())
+        paths.append(path)
+    return paths
+
+class Workload(object):
+    """Picks and sends the RPCs of the mix, and records their latencies."""
+    def __init__(self, stub, mix, parents, names, images):
+        self.stub = stub
+        self.ops = list(mix)
+        self.weights = [mix[op] for op in self.ops]
+        self.parents = parents
+        self.names = names
+        self.images = images
+        self.lock = threading.Lock()
+        self.recording = False
+        self.latencies = {op: [] for op in self.ops}
+        self.errors = {op: {} for op in self.ops}
+        # ListPhotos page tokens, so that listing walks through the pages
+        self.page_tokens = threading.local()
+
+    def run(self, due=None):
+        """Sends one RPC of the mix.
+
+        Arguments:
+            due: The perf_counter time the RPC was meant to start at; the
+                latency is measured from it if given.
+
+        Returns:
+            None.
+        """
+        op = random.choices(self.ops, self.weights)[0]
+        start = time.perf_counter() if due is None else due
+        error = None
+        try:
+            getattr(self, op)()
+        except grpc.RpcError as err:
+            error = err.code().name #pylint: disable=no-member
+        latency = time.perf_counter() - start
+        if not self.recording:
+            return
+        with self.lock:
+            if error:
+                self.errors[op][error] = self.errors[op].get(error, 0) + 1
+            else:
+                self.latencies[op].append(latency)
+
+    def create(self):
+        parent = random.choice(self.parents)
+        photo = self.stub.CreatePhoto(example_pb2.CreatePhotoRequest(
+            parent=parent,
+            photo=example_pb2.Photo(display_name='photo-{}'.format(random.randrange(1000000)))
+        ))
+        self.names.append(photo.name)
+
+    def get(self):
+        self.stub.GetPhoto(example_pb2.GetPhotoRequest(name=random.choice(self.names)))
+
+    def list(self):
+        if not hasattr(self.page_tokens, 'tokens'):
+            self.page_tokens.tokens = {}
+        tokens = self.page_tokens.tokens
+        parent = random.choice(self.parents)
+        order_by = random.choice((1, 2))
+        response = self.stub.ListPhotos(example_pb2.ListPhotosRequest(
+            parent=parent,
+            order_by=order_by,
+            page_token=tokens.get((parent, order_by), '')
+        ))
+        tokens[(parent, order_by)] = response.next_page_token
+
+    def stream(self):
+        requests = [example_pb2.GetPhotoRequest(name=random.choice(self.names)) for _ in range(STREAM_LENGTH)]
+        for _ in self.stub.StreamPhotos(iter(requests)):
+            pass
+
+    def upload(self):
+        self.stub.UploadPhoto(PhotoDataBlockRequestIterable(random.choice(self.names), random.choice(self.images)))
+
+    def report(self, elapsed):
+        """Summarizes the recorded RPCs.
+
+        Returns:
+            report (dict): The count, errors, throughput and latency
+                percentiles, in milliseconds, of each operation and of
+                all of them.
+        """
+        operations = {op: summarize(self.latencies[op], self.errors[op], elapsed) for op in self.ops}
+        errors = {}
+        for op in self.ops:
+            for code, count in self.errors[op].items():
+                errors[code] = errors.get(code, 0) + count
+        total = summarize([latency for op in self.ops for latency in self.latencies[op]], errors, elapsed)
+        return {'total': total, 'operations': operations}
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    summary = {
+        'count': len(latencies),
+        'errors': errors,
+        'throughput': len(latencies) / elapsed
+    }
+    if latencies:
+        summary['latency_ms'] = dict(
+            [(label, latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1e3)
+             for label, fraction in PERCENTILES] +
+            [('mean', sum(latencies) / len(latencies) * 1e3), ('max', latencies[-1] * 1e3)])
+    return summary
+
+def run_closed_loop(workload, concurrency, deadline):
+    """Keeps concurrency RPCs in flight until the deadline."""
+    def worker():
+        while time.perf_counter() < deadline:
+            workload.run()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def run_open_loop(workload, rate, concurrency, deadline):
+    """Starts RPCs at a fixed rate until the deadline. At most concurrency
+       RPCs are in flight; RPCs due while all are busy wait, and their
+       waiting time counts towards their latency.
+    """
+    with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        due = time.perf_counter()
+        while due < deadline:
+            time.sleep(max(0, due - time.perf_counter()))
+            executor.submit(workload.run, due)
+            due += 1 / rate
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help='Comma-separated operation=weight pairs; operations are {}.'.format(', '.join(OPERATIONS)))
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='RPCs in flight; with --rate, the most RPCs in flight.')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='RPCs to start per second; if unset, each worker sends its next RPC as soon as one ends.')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to measure for.')
+    parser.add_argument('--warmup', type=float, default=2, help='Seconds to run before measuring.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--photos', type=int, default=1000, help='Photos to seed for each user.')
+    parser.add_argument('--subprocess', action='store_true', help='Run the server as a subprocess.')
+    parser.add_argument('--server-args', default='', help='Flags for the server, e.g. "--mode async".')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the random choice of RPCs.')
+    parser.add_argument('--output', default='-', help='File to write the JSON report to; stdout by default.')
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+    random.seed(args.seed)
+    commit = git_commit()
+    output_path = args.output if args.output == '-' else os.path.abspath(args.output)
+
+    os.chdir(tempfile.mkdtemp())
+    os.makedirs('photos')
+    images = write_images(UPLOAD_IMAGES) if 'upload' in mix else []
+    with running_server(args) as address, grpc.insecure_channel(address) as channel:
+        stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+        start = time.perf_counter()
+        parents, names = seed(stub, args.users, args.photos)
+        print('Seeded {} users and {} photos in {:.1f}s.'.format(
+            len(parents), len(names), time.perf_counter() - start), file=sys.stderr)
+
+        workload = Workload(stub, mix, parents, names, images)
+        start = time.perf_counter()
+        measure_start = start + args.warmup
+        deadline = measure_start + args.duration
+        timer = threading.Timer(args.warmup, setattr, (workload, 'recording', True))
+        timer.start()
+        if args.rate:
+            run_open_loop(workload, args.rate, args.concurrency, deadline)
+        else:
+            run_closed_loop(workload, args.concurrency, deadline)
+        elapsed = time.perf_counter() - measure_start
+
+    report = {
+        'commit': commit,
+        'settings': {
+            'mix': mix,
+            'concurrency': args.concurrency,
+            'rate': args.rate or None,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'users': args.users,
+            'photos': args.photos,
+            'server': 'subprocess' if args.subprocess else 'in-process',
+            'server_args': args.server_args
+        },
+        'elapsed': elapsed
+    }
+    report.update(workload.report(elapsed))
+    output = json.dumps(report, indent=2)
+    if output_path == '-':
+        print(output)
+    else:
+        with open(output_path, 'w') as f:
+            f.write(output + '\n')
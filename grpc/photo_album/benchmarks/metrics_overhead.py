@@ -0,0 +1,84 @@
+"""Measures the overhead of the metrics interceptor.
+
+Usage:
+    python metrics_overhead.py [--calls 5000] [--rounds 3]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent import futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+import grpc
+
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from helpers import metrics
+from models import local as model
+from models.memory import MemoryStorage
+from server import ExamplePhotoServiceServicer
+
+def start_server(interceptors):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4), interceptors=interceptors)
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(ExamplePhotoServiceServicer(), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    return server, port
+
+def measure(port, names, calls):
+    """Returns the microseconds per unary call and per streamed photo."""
+    with grpc.insecure_channel('127.0.0.1:{}'.format(port)) as channel:
+        stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+        stub.GetPhoto(example_pb2.GetPhotoRequest(name=names[0]))
+
+        start = time.perf_counter()
+        for i in range(calls):
+            stub.GetPhoto(example_pb2.GetPhotoRequest(name=names[i % len(names)]))
+        unary = (time.perf_counter() - start) / calls * 1e6
+
+        requests = (example_pb2.GetPhotoRequest(name=names[i % len(names)]) for i in range(calls))
+        start = time.perf_counter()
+        for _ in stub.StreamPhotos(requests):
+            pass
+        streamed = (time.perf_counter() - start) / calls * 1e6
+    return unary, streamed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    model.configure(MemoryStorage())
+    parent = '//myapiservice.com/users/user-0'
+    model.create_user(parent, example_pb2.User(name=parent))
+    names = ['{}/photos/{}'.format(parent, i) for i in range(100)]
+    model.create_photos(parent, [example_pb2.Photo(name=name, display_name=name) for name in names])
+
+    registry = metrics.Metrics()
+    results = {'plain': [], 'metrics': []}
+    # Alternate the servers so that drift affects both alike
+    for _ in range(args.rounds):
+        for label, interceptors in (('plain', None), ('metrics', [metrics.MetricsInterceptor(registry)])):
+            server, port = start_server(interceptors)
+            results[label].append(measure(port, names, args.calls))
+            server.stop(None)
+
+    for label, runs in results.items():
+        print('{:<8} GetPhoto {:>7.1f}us/call   StreamPhotos {:>7.1f}us/photo'.format(
+            label, min(run[0] for run in runs), min(run[1] for run in runs)))
+
+    start = time.perf_counter()
+    for _ in range(100000):
+        registry.sent('/bench', 100)
+    record_us = (time.perf_counter() - start) / 100000 * 1e6
+    start = time.perf_counter()
+    for _ in range(100000):
+        registry.finish('/bench', grpc.StatusCode.OK, registry.start('/bench'))
+    rpc_us = (time.perf_counter() - start) / 100000 * 1e6
+    print('recording: {:.2f}us per message, {:.2f}us per RPC'.format(record_us, rpc_us))
+    start = time.perf_counter()
+    registry.render()
+    print('rendering: {:.2f}ms'.format((time.perf_counter() - start) * 1e3))
@@ -0,0 +1,69 @@
+"""Measures ListPhotos with and without the page cache when clients keep
+   re-listing the first pages of the same users.
+
+Usage:
+    python page_cache.py [--users 100] [--photos 1000] [--requests 50000] [--writes 2]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from codegen import example_pb2
+from models import local as model
+from models.memory import MemoryStorage
+from models.sqlite import SQLiteStorage
+from server import PAGE_CACHE_BYTES, ExamplePhotoServiceServicer
+from storage_backends import API_SERVICE_NAME, make_photo
+
+def seed(users, photos):
+    parents = []
+    for u in range(users):
+        parent = '{}/users/user-{}'.format(API_SERVICE_NAME, u)
+        model.create_user(parent, example_pb2.User(name=parent))
+        model.create_photos(parent, [make_photo(parent, i) for i in range(photos)])
+        parents.append(parent)
+    return parents
+
+def run(servicer, parents, args):
+    """Lists first and second pages, with a share of the requests creating
+       a photo instead. A few users get most of the traffic.
+    """
+    random.seed(0)
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        parent = parents[min(int(random.expovariate(10 / len(parents))), len(parents) - 1)]
+        if random.randrange(100) < args.writes:
+            servicer.CreatePhoto(example_pb2.CreatePhotoRequest(
+                parent=parent, photo=example_pb2.Photo(display_name='new')), None)
+            continue
+        request = example_pb2.ListPhotosRequest(parent=parent, order_by=random.choice((1, 2)))
+        response = servicer.ListPhotos(request, None)
+        if random.random() < 0.3:
+            servicer.ListPhotos(example_pb2.ListPhotosRequest(page_token=response.next_page_token), None)
+    return args.requests / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--photos', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=50000)
+    parser.add_argument('--writes', type=int, default=2, help='Share of writes, in percent.')
+    parser.add_argument('--cache-bytes', type=int, default=PAGE_CACHE_BYTES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, storage in (
+                ('memory', MemoryStorage()),
+                ('sqlite', SQLiteStorage(os.path.join(directory, 'photos.db')))):
+            model.configure(storage)
+            parents = seed(args.users, args.photos)
+            uncached = run(ExamplePhotoServiceServicer(page_cache_bytes=0), parents, args)
+            servicer = ExamplePhotoServiceServicer(page_cache_bytes=args.cache_bytes)
+            cached = run(servicer, parents, args)
+            print('{}: {:.0f} requests/s uncached, {:.0f} requests/s cached'.format(label, uncached, cached))
+            print('    {}'.format(servicer.page_cache.stats()))
@@ -0,0 +1,123 @@
+"""Measures the time to upload a 2 MB image through an upload session in
+   one stream and in parts over several streams, on a link with added
+   latency.
+
+Usage:
+    python parallel_upload.py [--rtt-ms 0,20,80] [--parallelism 1,2,4,8] [--uploads 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from concurrent import futures
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+sys.path.insert(1, os.path.join(ROOT, 'client'))
+
+import grpc
+
+from client import ExamplePhotoServiceClient
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from compression import CountingProxy
+from helpers import uploads
+from models import local as model
+from models.memory import MemoryStorage
+from server import ExamplePhotoServiceServicer
+from storage_backends import make_photo
+
+PHOTO_PATH = os.path.join(ROOT, 'client', 'flower.jpg')
+
+class DelayingProxy(CountingProxy):
+    """Forwards TCP connections and holds every chunk of data for a fixed
+       time each way, as a link with that latency would.
+    """
+    def __init__(self, port, delay):
+        self.delay = delay
+        super().__init__(port)
+
+    def pump(self, source, destination, counter):
+        chunks = queue.Queue()
+
+        def forward():
+            while True:
+                due, data = chunks.get()
+                if data is None:
+                    break
+                time.sleep(max(0, due - time.perf_counter()))
+                try:
+                    destination.sendall(data)
+                except OSError:
+                    break
+            destination.close()
+        threading.Thread(target=forward, daemon=True).start()
+
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                chunks.put((time.perf_counter() + self.delay, data))
+        except OSError:
+            pass
+        chunks.put((0, None))
+
+def measure(port, rtt, parallelism, photos, image_path):
+    proxy = DelayingProxy(port, rtt / 2)
+    client = ExamplePhotoServiceClient()
+    latencies = []
+    with grpc.insecure_channel('127.0.0.1:{}'.format(proxy.port)) as channel:
+        client.stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+        for photo in photos:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                session = client.upload_photo_resumable(photo.name, image_path, parallelism=parallelism)
+            if not session:
+                raise RuntimeError('Upload failed.')
+            latencies.append(time.perf_counter() - start)
+    return sorted(latencies)[len(latencies) // 2]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rtt-ms', default='0,20,80',
+                        help='Comma-separated round-trip times, in milliseconds, added by the link.')
+    parser.add_argument('--parallelism', default='1,2,4,8',
+                        help='Comma-separated numbers of parts uploaded at the same time.')
+    parser.add_argument('--uploads', type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    os.makedirs('photos')
+    # Pads the sample image to the largest size the server accepts
+    with open(PHOTO_PATH, 'rb') as f:
+        data = f.read()
+    image_path = os.path.abspath('large.jpg')
+    with open(image_path, 'wb') as f:
+        f.write(data + os.urandom(uploads.MAX_PHOTO_SIZE - len(data)))
+
+    model.configure(MemoryStorage())
+    parent = '//myapiservice.com/users/user-0'
+    model.create_user(parent, example_pb2.User(name=parent))
+    photos = [make_photo(parent, i) for i in range(1000)]
+    model.create_photos(parent, photos)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=16))
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(ExamplePhotoServiceServicer(), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+
+    print('Median time of {} uploads of a {} KB image:'.format(args.uploads, uploads.MAX_PHOTO_SIZE // 1024))
+    photo_index = 0
+    for rtt_ms in (int(value) for value in args.rtt_ms.split(',')):
+        print('  {} ms round trip:'.format(rtt_ms))
+        for parallelism in (int(value) for value in args.parallelism.split(',')):
+            median = measure(port, rtt_ms / 1000, parallelism,
+                             photos[photo_index:photo_index + args.uploads], image_path)
+            photo_index += args.uploads
+            print('    {} part{:<12} {:>8.1f}ms'.format(parallelism, 's' if parallelism > 1 else '', median * 1e3))
+    server.stop(None)
@@ -0,0 +1,87 @@
+"""Measures photo lookup and deletion in the in-memory store as the number
+   of photos per user grows.
+
+Usage:
+    python photo_lookup.py [--max-photos 1000000] [--lookups 10000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from google.protobuf import timestamp_pb2
+
+from codegen import example_pb2
+from models import local as model
+
+API_SERVICE_NAME = '//myapiservice.com'
+
+def seed(parent, count):
+    """Creates a user with the given number of photos.
+
+    Arguments:
+        parent: The resource name of the user.
+        count: The number of photos to create.
+
+    Returns:
+        names (list): The resource names of the photos created.
+    """
+    model.create_user(parent, example_pb2.User(name=parent))
+    names = []
+    for i in range(count):
+        name = '{}/photos/{:032x}'.format(parent, i)
+        photo = example_pb2.Photo(
+            name=name,
+            display_name='photo-{}'.format(i),
+            created_at=timestamp_pb2.Timestamp(seconds=i)
+        )
+        model.create_photo(parent, photo)
+        names.append(name)
+    return names
+
+def run(count, lookups):
+    parent = '{}/users/user-{}'.format(API_SERVICE_NAME, count)
+    names = seed(parent, count)
+    sample = [random.choice(names) for _ in range(lookups)]
+
+    start = time.perf_counter()
+    for name in sample:
+        model.get_photo(name)
+    get_elapsed = time.perf_counter() - start
+
+    missing = ['{}/photos/missing-{}'.format(parent, i) for i in range(lookups)]
+    start = time.perf_counter()
+    for name in missing:
+        model.get_photo(name)
+    miss_elapsed = time.perf_counter() - start
+
+    victims = random.sample(names, min(lookups, count))
+    photos = [model.get_photo(name) for name in victims]
+    start = time.perf_counter()
+    for name in victims:
+        model.delete_photo(name)
+    delete_elapsed = time.perf_counter() - start
+    for photo in photos:
+        model.create_photo(parent, photo)
+
+    return (
+        get_elapsed / lookups * 1e6,
+        miss_elapsed / lookups * 1e6,
+        delete_elapsed / len(victims) * 1e6
+    )
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-photos', type=int, default=1000000)
+    parser.add_argument('--lookups', type=int, default=10000)
+    args = parser.parse_args()
+
+    print('{:>10} {:>12} {:>12} {:>12}'.format('photos', 'get (us)', 'miss (us)', 'delete (us)'))
+    count = 10
+    while count <= args.max_photos:
+        get_us, miss_us, delete_us = run(count, args.lookups)
+        print('{:>10} {:>12.3f} {:>12.3f} {:>12.3f}'.format(count, get_us, miss_us, delete_us))
+        count *= 10
@@ -0,0 +1,50 @@
+"""Measures ListPhotos response sizes and serving time with and without a
+   read mask.
+
+Usage:
+    python read_mask.py [--pages 2000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from google.protobuf import field_mask_pb2
+
+from codegen import example_pb2
+from models import local as model
+from server import ExamplePhotoServiceServicer
+from storage_backends import API_SERVICE_NAME, make_photo
+
+MASKS = (
+    ('none', None),
+    ('name, created_at', ['name', 'created_at']),
+    ('name', ['name']),
+    ('created_at.seconds', ['created_at.seconds'])
+)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=2000)
+    args = parser.parse_args()
+
+    parent = '{}/users/user-0'.format(API_SERVICE_NAME)
+    model.create_user(parent, example_pb2.User(name=parent))
+    model.create_photos(parent, [make_photo(parent, i) for i in range(1000)])
+    uncached = ExamplePhotoServiceServicer(page_cache_bytes=0)
+    cached = ExamplePhotoServiceServicer()
+
+    print('{:<20} {:>8} {:>16} {:>16}'.format('read mask', 'size', 'uncached', 'cached'))
+    for label, paths in MASKS:
+        mask = field_mask_pb2.FieldMask(paths=paths) if paths else None
+        request = example_pb2.ListPhotosRequest(parent=parent, order_by=1, read_mask=mask)
+        size = uncached.ListPhotos(request, None).ByteSize()
+        results = []
+        for servicer in (uncached, cached):
+            start = time.perf_counter()
+            for _ in range(args.pages):
+                servicer.ListPhotos(request, None).SerializeToString()
+            results.append((time.perf_counter() - start) / args.pages * 1e6)
+        print('{:<20} {:>6} B {:>11.1f}us/page {:>11.1f}us/page'.format(label, size, *results))
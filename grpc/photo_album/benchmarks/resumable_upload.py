@@ -0,0 +1,154 @@
+"""Measures the bytes sent to upload a 2 MB image over a link that drops
+   connections, with UploadPhoto retried from the start and with a
+   resumable upload session.
+
+Usage:
+    python resumable_upload.py [--mean-kb 512,1024,2048] [--uploads 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent import futures
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+sys.path.insert(1, os.path.join(ROOT, 'client'))
+
+import grpc
+
+import client as client_module
+from client import ExamplePhotoServiceClient, PhotoDataBlockRequestIterable
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from compression import CountingProxy
+from helpers import uploads
+from models import local as model
+from models.memory import MemoryStorage
+from server import ExamplePhotoServiceServicer
+from storage_backends import make_photo
+
+PHOTO_PATH = os.path.join(ROOT, 'client', 'flower.jpg')
+# Gives up on an upload after this many attempts
+MAX_ATTEMPTS = 500
+CHANNEL_OPTIONS = [
+    ('grpc.initial_reconnect_backoff_ms', 10),
+    ('grpc.min_reconnect_backoff_ms', 10),
+    ('grpc.max_reconnect_backoff_ms', 50)
+]
+
+class DroppingProxy(CountingProxy):
+    """Forwards TCP connections and cuts each one after a random number of
+       bytes from the client, exponentially distributed around a mean.
+    """
+    def __init__(self, port, mean_bytes):
+        self.mean_bytes = mean_bytes
+        self.random = random.Random(0)
+        super().__init__(port)
+
+    def accept(self):
+        while True:
+            client, _ = self.listener.accept()
+            upstream = socket.create_connection(self.target)
+            budget = self.random.expovariate(1 / self.mean_bytes)
+            threading.Thread(target=self.pump_until, args=(client, upstream, budget), daemon=True).start()
+            threading.Thread(target=self.pump, args=(upstream, client, 'sent'), daemon=True).start()
+
+    def pump_until(self, source, destination, budget):
+        try:
+            while budget > 0:
+                data = source.recv(65536)
+                if not data:
+                    break
+                self.received += len(data)
+                budget -= len(data)
+                destination.sendall(data)
+        except OSError:
+            pass
+        # Shutting the sockets down, unlike closing them, also wakes the
+        # thread reading the other direction and sends both ends a FIN
+        for sock in (source, destination):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+def upload_from_start(stub, name, path):
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            stub.UploadPhoto(PhotoDataBlockRequestIterable(name, path))
+            return attempt
+        except grpc.RpcError:
+            time.sleep(client_module.RESUME_BACKOFF)
+    return None
+
+def upload_resumable(stub, name, path):
+    client = ExamplePhotoServiceClient()
+    calls = []
+
+    class CountingStub(object):
+        def __getattr__(self, method):
+            def call(*args, **kwargs):
+                if method == 'WriteUploadSession':
+                    calls.append(method)
+                return getattr(stub, method)(*args, **kwargs)
+            return call
+    client.stub = CountingStub()
+    with contextlib.redirect_stdout(io.StringIO()):
+        session = client.upload_photo_resumable(name, path, attempts=MAX_ATTEMPTS)
+    return len(calls) if session else None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mean-kb', default='512,1024,2048',
+                        help='Comma-separated mean bytes, in KB, a connection carries before it drops.')
+    parser.add_argument('--uploads', type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    os.makedirs('photos')
+    # Pads the sample image to the largest size the server accepts
+    with open(PHOTO_PATH, 'rb') as f:
+        data = f.read()
+    image_path = os.path.abspath('large.jpg')
+    with open(image_path, 'wb') as f:
+        f.write(data + os.urandom(uploads.MAX_PHOTO_SIZE - len(data)))
+    client_module.RESUME_BACKOFF = 0.01
+    client_module.MAX_RESUME_BACKOFF = 0.01
+
+    model.configure(MemoryStorage())
+    parent = '//myapiservice.com/users/user-0'
+    model.create_user(parent, example_pb2.User(name=parent))
+    photos = [make_photo(parent, i) for i in range(1000)]
+    model.create_photos(parent, photos)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=8))
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(ExamplePhotoServiceServicer(), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+
+    print('{} uploads of a {} KB image:'.format(args.uploads, uploads.MAX_PHOTO_SIZE // 1024))
+    photo_index = 0
+    for mean_kb in (int(value) for value in args.mean_kb.split(',')):
+        print('  connections drop after {} KB on average:'.format(mean_kb))
+        for label, upload in (('UploadPhoto from the start', upload_from_start), ('upload session', upload_resumable)):
+            proxy = DroppingProxy(port, mean_kb * 1024)
+            attempts = []
+            start = time.perf_counter()
+            with grpc.insecure_channel('127.0.0.1:{}'.format(proxy.port), options=CHANNEL_OPTIONS) as channel:
+                stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+                for _ in range(args.uploads):
+                    attempts.append(upload(stub, photos[photo_index].name, image_path))
+                    photo_index += 1
+            elapsed = time.perf_counter() - start
+            done = [count for count in attempts if count]
+            print('    {:<28} {:>8.0f} KB sent per upload  {:>6.1f} attempts per upload  {:>3}/{} done  {:>6.2f}s'.format(
+                label, proxy.received / 1024 / args.uploads, sum(done) / max(1, len(done)),
+                len(done), args.uploads, elapsed))
+    server.stop(None)
@@ -0,0 +1,127 @@
+"""Compares the storage backends on a mix of photo service operations.
+
+Usage:
+    python storage_backends.py [--photos 100000] [--operations 20000] [--threads 4]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+from google.protobuf import timestamp_pb2
+
+from codegen import example_pb2
+from models.memory import MemoryStorage
+from models.sqlite import SQLiteStorage
+from models.storage import PAGE_SIZE, normalize_order, sort_key
+
+API_SERVICE_NAME = '//myapiservice.com'
+USERS = 10
+# Share of each operation in the mix, in percent
+MIX = (
+    ('create', 10),
+    ('get', 50),
+    ('list', 35),
+    ('delete', 5)
+)
+
+def make_photo(parent, i):
+    return example_pb2.Photo(
+        name='{}/photos/{}'.format(parent, uuid.uuid4().hex),
+        display_name='photo-{}'.format(random.randrange(1000000)),
+        created_at=timestamp_pb2.Timestamp(seconds=i)
+    )
+
+def seed(storage, photos_per_user, batch_size):
+    """Creates users and photos, writing photos in batches.
+
+    Returns:
+        A tuple of the user names and the photo names of each user.
+    """
+    parents = []
+    names = {}
+    for u in range(USERS):
+        parent = '{}/users/user-{}'.format(API_SERVICE_NAME, u)
+        storage.create_user(parent, example_pb2.User(name=parent))
+        parents.append(parent)
+        names[parent] = []
+        for start in range(0, photos_per_user, batch_size):
+            batch = [make_photo(parent, i) for i in range(start, min(start + batch_size, photos_per_user))]
+            storage.create_photos(parent, batch)
+            names[parent].extend(photo.name for photo in batch)
+    return parents, names
+
+def worker(storage, parents, names, operations, latencies):
+    ops = [op for op, share in MIX for _ in range(share)]
+    cursors = {}
+    for i in range(operations):
+        op = random.choice(ops)
+        parent = random.choice(parents)
+        start = time.perf_counter()
+        if op == 'create':
+            photo = make_photo(parent, i)
+            storage.create_photo(parent, photo)
+            names[parent].append(photo.name)
+        elif op == 'get':
+            storage.get_photo(random.choice(names[parent]))
+        elif op == 'list':
+            order_by = random.choice((1, 2))
+            photos, if_has_more_photos = storage.list_photos(
+                parent, order_by, cursors.get((parent, order_by)), PAGE_SIZE)
+            cursors[(parent, order_by)] = (
+                sort_key(photos[-1], normalize_order(order_by)) if if_has_more_photos else None)
+        else:
+            try:
+                storage.delete_photo(names[parent].pop(random.randrange(len(names[parent]))))
+            except (ValueError, IndexError):
+                pass
+        latencies.setdefault(op, []).append(time.perf_counter() - start)
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def run(label, storage, args):
+    start = time.perf_counter()
+    parents, names = seed(storage, args.photos // USERS, args.batch_size)
+    seed_elapsed = time.perf_counter() - start
+
+    latencies = {}
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(storage, parents, names, args.operations // args.threads, latencies)
+        )
+        for _ in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print('{}: seeded {} photos in {:.2f}s, {:.0f} ops/s with {} threads'.format(
+        label, args.photos, seed_elapsed, args.operations / elapsed, args.threads))
+    for op, _ in MIX:
+        values = latencies.get(op, [0])
+        print('    {:<8} p50 {:>9.1f}us  p99 {:>9.1f}us'.format(
+            op, percentile(values, 0.5) * 1e6, percentile(values, 0.99) * 1e6))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--photos', type=int, default=100000)
+    parser.add_argument('--operations', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    run('memory', MemoryStorage(), args)
+    with tempfile.TemporaryDirectory() as directory:
+        run('sqlite', SQLiteStorage(os.path.join(directory, 'photos.db')), args)
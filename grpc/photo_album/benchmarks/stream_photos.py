@@ -0,0 +1,91 @@
+"""Compares sequential and pipelined StreamPhotos calls.
+
+Usage:
+    python stream_photos.py [--photos 10000] [--window 16] [--latency 0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent import futures
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+
+import grpc
+
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from models import local as model
+from models.memory import MemoryStorage
+from models.sqlite import SQLiteStorage
+from server import ExamplePhotoServiceServicer, PIPELINED_STREAM_MODE, STREAM_MODE_KEY
+from storage_backends import API_SERVICE_NAME, make_photo
+
+BATCH_SIZE = 1000
+
+def seed(count):
+    parent = '{}/users/user-0'.format(API_SERVICE_NAME)
+    model.create_user(parent, example_pb2.User(name=parent))
+    names = []
+    for start in range(0, count, BATCH_SIZE):
+        batch = [make_photo(parent, i) for i in range(start, min(start + BATCH_SIZE, count))]
+        model.create_photos(parent, batch)
+        names.extend(photo.name for photo in batch)
+    return names
+
+def stream(stub, names, metadata=None):
+    requests = (example_pb2.GetPhotoRequest(name=name) for name in names)
+    start = time.perf_counter()
+    received = sum(1 for result in stub.StreamPhotos(requests, metadata=metadata) if not result.error)
+    elapsed = time.perf_counter() - start
+    assert received == len(names)
+    return elapsed
+
+def add_latency(storage, latency):
+    """Makes photo lookups wait, as if the store were across a network."""
+    get_photo = storage.get_photo
+
+    def slow_get_photo(name):
+        time.sleep(latency)
+        return get_photo(name)
+
+    storage.get_photo = slow_get_photo
+
+def run(label, storage, args):
+    if args.latency:
+        add_latency(storage, args.latency / 1000)
+        label = '{} (+{}ms per lookup)'.format(label, args.latency)
+    model.configure(storage)
+    names = seed(args.photos)
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(
+        ExamplePhotoServiceServicer(args.window), server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    try:
+        with grpc.insecure_channel('127.0.0.1:{}'.format(port)) as channel:
+            stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+            stream(stub, names[:100])
+            sequential = stream(stub, names)
+            pipelined = stream(stub, names, [(STREAM_MODE_KEY, PIPELINED_STREAM_MODE)])
+    finally:
+        server.stop(None)
+
+    print('{}: {} photos'.format(label, len(names)))
+    print('    sequential {:>7.2f}s  {:>8.0f} photos/s'.format(sequential, len(names) / sequential))
+    print('    pipelined  {:>7.2f}s  {:>8.0f} photos/s (window {})'.format(
+        pipelined, len(names) / pipelined, args.window))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--photos', type=int, default=10000)
+    parser.add_argument('--window', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Milliseconds added to every photo lookup.')
+    args = parser.parse_args()
+
+    run('memory', MemoryStorage(), args)
+    with tempfile.TemporaryDirectory() as directory:
+        run('sqlite', SQLiteStorage(os.path.join(directory, 'photos.db')), args)
@@ -0,0 +1,114 @@
+"""Measures UploadPhoto latency with thumbnails disabled and made by the
+   background pipeline, the time the pipeline takes to catch up, and what
+   making thumbnails on the RPC thread would add to every upload.
+
+Usage:
+    python thumbnails.py [--uploads 200] [--concurrency 8] [--workers 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent import futures
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'server'))
+sys.path.insert(1, os.path.join(ROOT, 'client'))
+
+import grpc
+
+from client import PhotoDataBlockRequestIterable
+from codegen import example_pb2
+from codegen import example_pb2_grpc
+from helpers import thumbnails
+from models import blobs
+from models import local as model
+from models.memory import MemoryStorage
+from server import ExamplePhotoServiceServicer
+from storage_backends import make_photo
+
+PHOTO_PATH = os.path.join(ROOT, 'client', 'flower.jpg')
+
+def percentile(samples, fraction):
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+def write_images(count):
+    """Writes copies of the sample image that differ in trailing bytes, so
+       that each is stored, and resized, separately.
+    """
+    with open(PHOTO_PATH, 'rb') as f:
+        data = f.read()
+    paths = []
+    for i in range(count):
+        path = os.path.join('images', '{}.jpg'.format(i))
+        with open(path, 'wb') as f:
+            f.write(data + str(i).encode())
+        paths.append(path)
+    return paths
+
+def measure(label, servicer, paths, concurrency):
+    model.configure(MemoryStorage())
+    blobs.rebuild([])
+    parent = '//myapiservice.com/users/user-0'
+    model.create_user(parent, example_pb2.User(name=parent))
+    photos = [make_photo(parent, i) for i in range(len(paths))]
+    model.create_photos(parent, photos)
+
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=concurrency))
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(servicer, server)
+    port = server.add_insecure_port('127.0.0.1:0')
+    server.start()
+    try:
+        with grpc.insecure_channel('127.0.0.1:{}'.format(port)) as channel:
+            stub = example_pb2_grpc.ExamplePhotoServiceStub(channel)
+
+            def upload(i):
+                start = time.perf_counter()
+                stub.UploadPhoto(PhotoDataBlockRequestIterable(photos[i].name, paths[i]))
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            with futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+                latencies = list(executor.map(upload, range(len(paths))))
+            uploaded = time.perf_counter() - start
+            if servicer.thumbnails:
+                while servicer.thumbnails.stats()['backlog']:
+                    time.sleep(0.01)
+            settled = time.perf_counter() - start
+    finally:
+        server.stop(None)
+    print('  {:<28} p50 {:>6.1f}ms  p99 {:>6.1f}ms  {:>6.0f} uploads/s  all thumbnails after {:>5.2f}s'.format(
+        label, percentile(latencies, 0.5) * 1e3, percentile(latencies, 0.99) * 1e3,
+        len(paths) / uploaded, settled))
+    if servicer.thumbnails:
+        stats = servicer.thumbnails.stats()
+        print('  {:<28} {} completed, {} failed, {:.1f}ms per task'.format(
+            '', stats['completed'], stats['failed'], stats['task_seconds'] / max(1, stats['completed']) * 1e3))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--uploads', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=thumbnails.WORKERS)
+    args = parser.parse_args()
+    if not thumbnails.Image:
+        sys.exit('Pillow is required: pip install pillow')
+
+    os.chdir(tempfile.mkdtemp())
+    os.makedirs('photos')
+    os.makedirs('images')
+    paths = write_images(args.uploads)
+
+    start = time.perf_counter()
+    thumbnails.make_thumbnails(paths[0])
+    print('Making small and medium thumbnails of a {}x{} JPEG on the RPC thread: {:.1f}ms per upload'.format(
+        *thumbnails.Image.open(PHOTO_PATH).size, (time.perf_counter() - start) * 1e3))
+
+    print('{} uploads, {} at a time:'.format(args.uploads, args.concurrency))
+    measure('thumbnails disabled', ExamplePhotoServiceServicer(), paths, args.concurrency)
+    servicer = ExamplePhotoServiceServicer(
+        thumbnail_workers=args.workers, thumbnail_backlog=args.uploads)
+    # Starts the worker processes, which are spawned on first use
+    servicer.thumbnails.executor.submit(time.sleep, 0).result()
+    measure('pipeline, {} workers'.format(args.workers), servicer, paths, args.concurrency)
@@ -1,5 +1,10 @@
+from concurrent import futures
 import hashlib
+import itertools
+import threading
+import time
 import uuid
+import zlib
 
 from google.protobuf import field_mask_pb2
 import grpc
@@ -10,6 +15,73 @@ from codegen import example_pb2_grpc
 SERVER_ADDRESS = '0.0.0.0'
 PORT = 8080
 BLOCK_SIZE = 20000
+STREAM_MODE_KEY = 'stream-mode'
+PIPELINED_STREAM_MODE = 'pipelined'
+COMPRESSION_ALGORITHMS = {
+    'gzip': grpc.Compression.Gzip,
+    'deflate': grpc.Compression.Deflate
+}
+# Requests smaller than this many bytes are sent uncompressed
+COMPRESSION_THRESHOLD = 1024
+# Errors after which a resumable upload carries on from the committed offset
+RESUMABLE_CODES = (
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.ABORTED,
+    grpc.StatusCode.INTERNAL,
+    grpc.StatusCode.CANCELLED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED
+)
+RESUME_ATTEMPTS = 10
+# The number of parts uploaded at the same time, each over its own stream
+UPLOAD_PARALLELISM = 1
+# Seconds to wait before resuming, doubled after every failed attempt
+RESUME_BACKOFF = 0.5
+MAX_RESUME_BACKOFF = 8
+# Seconds a call may take before it fails with DEADLINE_EXCEEDED; the
+# server sees the deadline too and stops working on the call once it
+# passes. Calls that move image data get longer.
+DEFAULT_DEADLINE = 10
+DEADLINES = {
+    'UploadPhoto': 60,
+    'WriteUploadSession': 60,
+    'ComposeUploadSession': 30,
+    'DownloadPhoto': 60,
+    'StreamPhotos': 60,
+    'BatchCreatePhotos': 30,
+    'BatchGetPhotos': 30
+}
+
+# How calls are spread over the channels of a pool: in turn, or to the
+# channel with the fewest calls in flight
+ROUND_ROBIN = 'round_robin'
+LEAST_IN_FLIGHT = 'least_in_flight'
+
+def committed_offset(session, part_number=0):
+    """Returns the bytes an upload session has stored of the image, or of
+       one part of it.
+    """
+    if not part_number:
+        return session.committed_offset
+    for part in session.parts:
+        if part.part_number == part_number:
+            return part.size
+    return 0
+
+def is_compressible(data, sample_size=4096):
+    """Checks whether compressing data would save at least a tenth of its
+       size, by compressing a sample from its middle. Image data, e.g.
+       JPEG, is already compressed and fails the check.
+    """
+    start = max(0, len(data) // 2 - sample_size // 2)
+    sample = data[start:start + sample_size]
+    return len(zlib.compress(sample, 1)) < len(sample) * 0.9
+
+def read_mask(fields):
+    """Builds a read mask selecting the given photo fields, or None."""
+    if fields is None:
+        return None
+    return field_mask_pb2.FieldMask(paths=fields)
 
 class PhotoDataBlockRequestIterable(object):
     def __init__(self, name, photo_path):
@@ -39,9 +111,42 @@ class PhotoDataBlockRequestIterable(object):
         else:
             raise StopIteration
 
+class UploadSessionBlockIterable(object):
+    """Yields the blocks of an image, or of one part of it, from an
+       offset, for writing to an upload session. If nothing is left to
+       write, one empty block at the end is sent, which asks the server to
+       save the image.
+    """
+    def __init__(self, upload_id, data, offset, part_number=0):
+        self.upload_id = upload_id
+        self.data = data
+        self.loc = offset
+        self.part_number = part_number
+        self.done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.done:
+            raise StopIteration
+        data_block = self.data[self.loc:self.loc + BLOCK_SIZE]
+        request = example_pb2.PhotoDataBlock(
+            upload_id=self.upload_id,
+            part_number=self.part_number,
+            offset=self.loc,
+            data_block=data_block,
+            data_block_hash=hashlib.new('md5', data_block).hexdigest()
+        )
+        self.loc += len(data_block)
+        self.done = self.loc >= len(self.data)
+        return request
+
 class ListPhotosResponseIterable(object):
-    def __init__(self, stub, initial_response):
+    def __init__(self, stub, initial_response, read_mask=None, timeout=DEFAULT_DEADLINE):
         self.stub = stub
+        self.read_mask = read_mask
+        self.timeout = timeout
         self.initial_response = initial_response
         self.if_initial_response_returned = False
         self.next_page_token = initial_response.next_page_token
@@ -56,10 +161,11 @@ class ListPhotosResponseIterable(object):
         
         if self.next_page_token:
             request = example_pb2.ListPhotosRequest(
-                page_token = self.next_page_token
+                page_token = self.next_page_token,
+                read_mask = self.read_mask
             )
             try:
-                response = self.stub.ListPhotos(request)
+                response = self.stub.ListPhotos(request, timeout=self.timeout)
                 self.next_page_token = response.next_page_token
                 return response.photos
             except grpc.RpcError as err:
@@ -68,19 +174,161 @@ class ListPhotosResponseIterable(object):
         else:
             raise StopIteration
 
-class ExamplePhotoServiceClient(object):
+class InFlightCounter(grpc.UnaryUnaryClientInterceptor, grpc.UnaryStreamClientInterceptor,
+                      grpc.StreamUnaryClientInterceptor, grpc.StreamStreamClientInterceptor):
+    """Counts the calls in flight on a channel. A call is counted until it
+       ends, which for a response stream is once it is read to the end or
+       cancelled.
+    """
     def __init__(self):
-        """Initializer. 
-           Creates a gRPC channel for connecting to the server.
-           Adds the channel to the generated client stub.
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+    def finished(self, call=None): #pylint: disable=unused-argument
+        with self.lock:
+            self.in_flight -= 1
+
+    def intercept(self, continuation, client_call_details, request):
+        with self.lock:
+            self.in_flight += 1
+        try:
+            call = continuation(client_call_details, request)
+        except Exception:
+            self.finished()
+            raise
+        call.add_done_callback(self.finished)
+        return call
+
+    intercept_unary_unary = intercept
+    intercept_unary_stream = intercept
+    intercept_stream_unary = intercept
+    intercept_stream_stream = intercept
+
+class ChannelPool(object):
+    """Spreads calls over several channels to the server, each with a
+       connection of its own, so that many concurrent calls are not all
+       multiplexed over one connection and held up by its limit on
+       concurrent streams.
+    """
+    def __init__(self, target, size=1, dispatch=ROUND_ROBIN):
+        """Initializer.
+
         Arguments:
+            target: The address of the server.
+            size: The number of channels.
+            dispatch: ROUND_ROBIN to use the channels in turn, or
+                LEAST_IN_FLIGHT to pick the channel with the fewest calls
+                in flight.
+
+        Returns:
             None.
+        """
+        if dispatch not in (ROUND_ROBIN, LEAST_IN_FLIGHT):
+            raise ValueError('Unknown dispatch policy: {}.'.format(dispatch))
+        self.dispatch = dispatch
+        self.channels = []
+        self.counters = []
+        self.stubs = []
+        if size < 1:
+            raise ValueError('A channel pool needs at least one channel.')
+        if size == 1:
+            channel = grpc.insecure_channel(target)
+            self.channels.append(channel)
+            self.stubs.append(example_pb2_grpc.ExamplePhotoServiceStub(channel))
+        else:
+            for index in range(size):
+                # Channels with the same arguments share their connections;
+                # a local subchannel pool and an argument of its own keep
+                # each channel's connection apart
+                channel = grpc.insecure_channel(target, options=[
+                    ('grpc.use_local_subchannel_pool', 1),
+                    ('example.channel_index', index)
+                ])
+                counter = InFlightCounter()
+                self.channels.append(channel)
+                self.counters.append(counter)
+                self.stubs.append(example_pb2_grpc.ExamplePhotoServiceStub(
+                    grpc.intercept_channel(channel, counter)))
+        self.turns = itertools.count()
+
+    def stub(self):
+        """Returns the stub of the channel the next call should use."""
+        if len(self.stubs) == 1:
+            return self.stubs[0]
+        if self.dispatch == LEAST_IN_FLIGHT:
+            index = min(range(len(self.counters)), key=lambda i: self.counters[i].in_flight)
+        else:
+            index = next(self.turns) % len(self.stubs)
+        return self.stubs[index]
+
+    def in_flight(self):
+        """Returns the number of calls in flight on each channel."""
+        return [counter.in_flight for counter in self.counters]
+
+class ExamplePhotoServiceClient(object):
+    def __init__(self, compression=None, compression_threshold=COMPRESSION_THRESHOLD, deadlines=None,
+                 channels=1, dispatch=ROUND_ROBIN):
+        """Initializer. 
+           Creates gRPC channels for connecting to the server.
+           Adds each channel to a generated client stub.
+        Arguments:
+            compression: The algorithm, 'gzip' or 'deflate', to compress
+                large requests with, or a dict of algorithms keyed by
+                method name, e.g. {'UploadPhoto': 'gzip'}; requests are
+                not compressed by default.
+            compression_threshold: The size, in bytes, below which
+                requests are sent uncompressed.
+            deadlines (dict): Seconds calls may take, keyed by method
+                name, e.g. {'UploadPhoto': 120}, replacing the defaults in
+                DEADLINES; a method set to None has no deadline.
+            channels: The number of channels, each with its own
+                connection, to spread concurrent calls over.
+            dispatch: How calls are spread over the channels:
+                ROUND_ROBIN or LEAST_IN_FLIGHT.
         
         Returns:
             None.
         """
-        self.channel = grpc.insecure_channel(f'{SERVER_ADDRESS}:{PORT}')
-        self.stub = example_pb2_grpc.ExamplePhotoServiceStub(self.channel)
+        self.pool = ChannelPool(f'{SERVER_ADDRESS}:{PORT}', channels, dispatch)
+        self.channel = self.pool.channels[0]
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+        self.deadlines = dict(DEADLINES, **(deadlines or {}))
+
+    @property
+    def stub(self):
+        """The stub to make the next call with."""
+        return self.pool.stub()
+
+    @stub.setter
+    def stub(self, stub):
+        # Replaces the pool with a single stub, e.g. one over a proxy
+        self.pool.stubs = [stub]
+
+    def deadline_for(self, method):
+        """Returns the seconds a call of a method may take."""
+        return self.deadlines.get(method, DEFAULT_DEADLINE)
+
+    def compression_for(self, method, size, data=None):
+        """Picks the compression of a call.
+
+        Arguments:
+            method: The name of the method called.
+            size: The size of the request, or of the uploaded data, in bytes.
+            data: A sample of the uploaded data, if any; data that does not
+                compress is sent as is.
+
+        Returns:
+            compression (grpc.Compression): The compression, or None.
+        """
+        algorithm = self.compression
+        if isinstance(algorithm, dict):
+            algorithm = algorithm.get(method)
+        if not algorithm or size < self.compression_threshold:
+            return None
+        if data is not None and not is_compressible(data):
+            return None
+        return COMPRESSION_ALGORITHMS[algorithm]
 
     def create_user(self, display_name, email):
         """Creates a user.
@@ -98,7 +346,7 @@ class ExamplePhotoServiceClient(object):
         )
 
         try:
-            response = self.stub.CreateUser(request)
+            response = self.stub.CreateUser(request, timeout=self.deadline_for('CreateUser'))
             print('User created.')
             return response
         except grpc.RpcError as err:
@@ -111,7 +359,7 @@ class ExamplePhotoServiceClient(object):
         )
 
         try:
-            response = self.stub.GetUser(request)
+            response = self.stub.GetUser(request, timeout=self.deadline_for('GetUser'))
             print('User fetched.')
             return response
         except grpc.RpcError as err:
@@ -147,7 +395,7 @@ class ExamplePhotoServiceClient(object):
         )
 
         try:
-            response = self.stub.UpdateUser(request)
+            response = self.stub.UpdateUser(request, timeout=self.deadline_for('UpdateUser'))
             print('User updated.')
             return response
         except grpc.RpcError as err:
@@ -172,12 +420,12 @@ class ExamplePhotoServiceClient(object):
         )
 
         try:
-            response = self.stub.CreatePhoto(request)
+            response = self.stub.CreatePhoto(request, timeout=self.deadline_for('CreatePhoto'))
             print('Photo created.')
             return response
         except grpc.RpcError as err:
             print(err.details()) #pylint: disable=no-member
-            print('{}, {}'.format(err.code().name, err.code().value())) #pylint: disable=no-member
+            print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
     
     def upload_photo(self, name, photo_path):
         """Uploads a photo.
@@ -190,14 +438,181 @@ class ExamplePhotoServiceClient(object):
             None; outputs to the terminal.
         """
         data_block_iterable = PhotoDataBlockRequestIterable(name, photo_path)
+        compression = self.compression_for(
+            'UploadPhoto', len(data_block_iterable.data), data_block_iterable.data)
 
         try:
-            response = self.stub.UploadPhoto(data_block_iterable)
+            response = self.stub.UploadPhoto(
+                data_block_iterable, compression=compression, timeout=self.deadline_for('UploadPhoto'))
             print('Photo uploaded.')
             return response
         except grpc.RpcError as err:
             print(err.details()) #pylint: disable=no-member
-            print('{}, {}'.format(err.code().name, err.code().value())) #pylint: disable=no-member
+            print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
+
+    def upload_photo_resumable(self, name, photo_path, attempts=RESUME_ATTEMPTS,
+                               parallelism=UPLOAD_PARALLELISM):
+        """Uploads a photo through an upload session.
+           If the connection drops, the upload resumes from the last byte
+           the server stored instead of starting over. With a parallelism
+           above 1, the image is split into that many parts, uploaded at
+           the same time over separate streams and then composed on the
+           server, which helps on links where a single stream is slow.
+
+        Arguments:
+            name: The resource name of a photo.
+            photo_path: The path to a binary image file.
+            attempts: The most times to write to the session, or to each
+                part of it.
+            parallelism: The number of parts to upload at the same time.
+        
+        Returns:
+            session (UploadSession): The completed session; None if the
+                upload failed.
+        """
+        with open(photo_path, 'rb') as f:
+            data = f.read()
+
+        try:
+            session = self.stub.CreateUploadSession(example_pb2.CreateUploadSessionRequest(
+                name=name,
+                data_hash=hashlib.new('md5', data).hexdigest(),
+                size=len(data)
+            ), timeout=self.deadline_for('CreateUploadSession'))
+            if parallelism > 1:
+                session = self.upload_parts(session.upload_id, data, attempts, parallelism)
+            else:
+                session = self.write_upload_session(session.upload_id, data, attempts)
+        except grpc.RpcError as err:
+            print(err.details()) #pylint: disable=no-member
+            print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
+            return None
+
+        if session.complete:
+            print('Photo uploaded.')
+            return session
+        return None
+
+    def upload_parts(self, upload_id, data, attempts, parallelism):
+        """Uploads the parts of an image at the same time, then composes
+           them. Each part carries its md5 digest to the compose call, so
+           the server can tell which part, if any, was corrupted.
+
+        Returns:
+            session (UploadSession): The session after composing.
+        """
+        part_size = max(BLOCK_SIZE, -(-len(data) // parallelism))
+        parts = [data[offset:offset + part_size] for offset in range(0, len(data), part_size)]
+        with futures.ThreadPoolExecutor(max_workers=len(parts)) as executor:
+            writes = [
+                executor.submit(self.write_upload_session, upload_id, part, attempts, part_number)
+                for part_number, part in enumerate(parts, 1)
+            ]
+            for write in writes:
+                write.result()
+
+        request = example_pb2.ComposeUploadSessionRequest(
+            upload_id=upload_id,
+            parts=[
+                example_pb2.UploadPart(
+                    part_number=part_number,
+                    size=len(part),
+                    part_hash=hashlib.new('md5', part).hexdigest()
+                )
+                for part_number, part in enumerate(parts, 1)
+            ]
+        )
+        for attempt in range(attempts):
+            try:
+                if attempt:
+                    # A compose call that failed on the way back may
+                    # have completed the upload
+                    session = self.stub.GetUploadSession(
+                        example_pb2.GetUploadSessionRequest(upload_id=upload_id),
+                        timeout=self.deadline_for('GetUploadSession'))
+                    if session.complete:
+                        return session
+                return self.stub.ComposeUploadSession(request, timeout=self.deadline_for('ComposeUploadSession'))
+            except grpc.RpcError as err:
+                if err.code() not in RESUMABLE_CODES or attempt == attempts - 1: #pylint: disable=no-member
+                    raise
+                time.sleep(min(RESUME_BACKOFF * 2 ** attempt, MAX_RESUME_BACKOFF))
+
+    def write_upload_session(self, upload_id, data, attempts, part_number=0):
+        """Writes an image, or one part of it, to an upload session,
+           resuming from the committed offset after a resumable error.
+
+        Arguments:
+            upload_id: The ID of the session.
+            data (bytes): The image, or the part.
+            attempts: The most times to write.
+            part_number: The part to write, or 0 to write the whole image.
+
+        Returns:
+            session (UploadSession): The session after the last write.
+        """
+        session = None
+        offset = 0
+        for attempt in range(attempts):
+            try:
+                if attempt:
+                    session = self.stub.GetUploadSession(
+                        example_pb2.GetUploadSessionRequest(upload_id=upload_id),
+                        timeout=self.deadline_for('GetUploadSession'))
+                    if session.complete:
+                        return session
+                    offset = committed_offset(session, part_number)
+                session = self.stub.WriteUploadSession(
+                    UploadSessionBlockIterable(upload_id, data, offset, part_number),
+                    timeout=self.deadline_for('WriteUploadSession'))
+            except grpc.RpcError as err:
+                if err.code() not in RESUMABLE_CODES or attempt == attempts - 1: #pylint: disable=no-member
+                    raise
+                time.sleep(min(RESUME_BACKOFF * 2 ** attempt, MAX_RESUME_BACKOFF))
+                continue
+            if session.complete or part_number and committed_offset(session, part_number) == len(data):
+                return session
+        return session
+
+    def download_photo(self, name, photo_path, thumbnail=None):
+        """Downloads a photo.
+           Data blocks are verified and written to disk as they arrive.
+
+        Arguments:
+            name: The resource name of a photo.
+            photo_path: The path to save the binary image file at.
+            thumbnail: "small" or "medium" to download a thumbnail of the
+                photo instead; it is available once the photo's
+                thumbnail_state is READY.
+
+        Returns:
+            photo_path (str): The path of the saved image.
+        """
+        request = example_pb2.DownloadPhotoRequest(
+            name=name,
+            thumbnail=thumbnail or ''
+        )
+
+        data_hash = hashlib.new('md5')
+        expected_data_hash = None
+        try:
+            with open(photo_path, 'wb') as f:
+                for response in self.stub.DownloadPhoto(request, timeout=self.deadline_for('DownloadPhoto')):
+                    data_block = response.data_block
+                    if hashlib.new('md5', data_block).hexdigest() != response.data_block_hash:
+                        raise ValueError('Datablock is corrupted.')
+                    f.write(data_block)
+                    data_hash.update(data_block)
+                    expected_data_hash = response.data_hash
+        except grpc.RpcError as err:
+            print(err.details()) #pylint: disable=no-member
+            print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
+            return
+
+        if data_hash.hexdigest() != expected_data_hash:
+            raise ValueError('Data is corrupted.')
+        print('Photo downloaded.')
+        return photo_path
 
     def create_and_upload_photo(self, parent, display_name, photo_path):
         """Creates and uploads a photo.
@@ -216,13 +631,66 @@ class ExamplePhotoServiceClient(object):
         print('Photo created and uploaded')
         return photo
 
-    def list_photos(self, parent, order_by=1, page_token=None):
+    def batch_create_photos(self, parent, display_names):
+        """Creates several photos in one call.
+
+        Arguments:
+            parent: The resource name of a user.
+            display_names: The display names of the photos.
+        
+        Returns:
+            photos (list): The photos created, in the same order.
+        """
+        request = example_pb2.BatchCreatePhotosRequest(
+            parent=parent,
+            photos=[example_pb2.Photo(display_name=display_name) for display_name in display_names]
+        )
+
+        try:
+            response = self.stub.BatchCreatePhotos(
+                request,
+                compression=self.compression_for('BatchCreatePhotos', request.ByteSize()),
+                timeout=self.deadline_for('BatchCreatePhotos'))
+            print('Photos created.')
+            return list(response.photos)
+        except grpc.RpcError as err:
+            print(err.details()) #pylint: disable=no-member
+            print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
+
+    def batch_get_photos(self, names, fields=None):
+        """Gets several photos in one call.
+
+        Arguments:
+            names: A list of resource names of photos.
+            fields: The photo fields to fetch, e.g. ['name', 'created_at'];
+                all fields if None.
+        
+        Returns:
+            photos (list): The photos, in the same order, with None in place
+                of each photo that cannot be found.
+        """
+        request = example_pb2.BatchGetPhotosRequest(
+            names=names,
+            read_mask=read_mask(fields)
+        )
+
+        try:
+            response = self.stub.BatchGetPhotos(request, timeout=self.deadline_for('BatchGetPhotos'))
+            print('Photos fetched.')
+            return [None if result.error else result.photo for result in response.results]
+        except grpc.RpcError as err:
+            print(err.details()) #pylint: disable=no-member
+            print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
+
+    def list_photos(self, parent, order_by=1, page_token=None, fields=None):
         """Lists photos.
 
         Arguments:
             parent: The resource name of a user.
             order_by: The preferred order of returned results.
             page_token: The token for next page of results.
+            fields: The photo fields to fetch, e.g. ['name', 'created_at'];
+                all fields if None.
         
         Returns:
             list (ListPhotosResponseIterable): An iteration of photos.
@@ -230,23 +698,26 @@ class ExamplePhotoServiceClient(object):
         request = example_pb2.ListPhotosRequest(
             parent=parent,
             order_by=order_by,
-            page_token=page_token
+            page_token=page_token,
+            read_mask=read_mask(fields)
         )
 
         try:
-            response = self.stub.ListPhotos(request)
-            return ListPhotosResponseIterable(self.stub, response)
+            response = self.stub.ListPhotos(request, timeout=self.deadline_for('ListPhotos'))
+            return ListPhotosResponseIterable(
+                self.stub, response, request.read_mask, self.deadline_for('ListPhotos'))
         except grpc.RpcError as err:
             print(err.details()) #pylint: disable=no-member
             print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
 
-    def get_photo(self, name):
+    def get_photo(self, name, fields=None):
         request = example_pb2.GetPhotoRequest(
-            name=name
+            name=name,
+            read_mask=read_mask(fields)
         )
 
         try:
-            response = self.stub.GetPhoto(request)
+            response = self.stub.GetPhoto(request, timeout=self.deadline_for('GetPhoto'))
             print('Photo fetched.')
             return response
         except grpc.RpcError as err:
@@ -267,35 +738,43 @@ class ExamplePhotoServiceClient(object):
         )
 
         try:
-            response = self.stub.DeletePhoto(request)
+            response = self.stub.DeletePhoto(request, timeout=self.deadline_for('DeletePhoto'))
             print('Photo deleted.')
             return response
         except grpc.RpcError as err:
             print(err.details()) #pylint: disable=no-member
             print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
 
-    def stream_photos(self, names):
+    def stream_photos(self, names, pipelined=False, fields=None):
         """Streams photos.
 
         Arguments:
             names: A list of resource names of photos.
+            pipelined: Whether the server should resolve photos concurrently.
+                Photos still come back in order either way, and a photo
+                that cannot be returned is reported in its place.
+            fields: The photo fields to fetch; all fields if None.
         
         Returns:
             None; outputs to the terminal.
         """
+        mask = read_mask(fields)
+
         def convert_name_to_get_photo_request(name):
             return example_pb2.GetPhotoRequest(
-                name=name
+                name=name,
+                read_mask=mask
             )
         
         get_photo_requests = list(map(convert_name_to_get_photo_request, names))
         get_photo_request_iterator = iter(get_photo_requests)
         try:
-            response_iterator = self.stub.StreamPhotos(get_photo_request_iterator)
+            metadata = [(STREAM_MODE_KEY, PIPELINED_STREAM_MODE)] if pipelined else None
+            response_iterator = self.stub.StreamPhotos(
+                get_photo_request_iterator, metadata=metadata, timeout=self.deadline_for('StreamPhotos'))
+            print('Receving photos:')
+            for result in response_iterator:
+                print(result.error if result.error else result.photo)
         except grpc.RpcError as err:
             print(err.details()) #pylint: disable=no-member
             print('{}, {}'.format(err.code().name, err.code().value)) #pylint: disable=no-member
-        
-        print('Receving photos:')
-        for response in response_iterator:
-            print(response)
@@ -58,7 +58,42 @@ class ExamplePhotoServiceStub(object):
     self.StreamPhotos = channel.stream_stream(
         '/example.photoservice.ExamplePhotoService/StreamPhotos',
         request_serializer=example__pb2.GetPhotoRequest.SerializeToString,
-        response_deserializer=example__pb2.Photo.FromString,
+        response_deserializer=example__pb2.PhotoResult.FromString,
+        )
+    self.DownloadPhoto = channel.unary_stream(
+        '/example.photoservice.ExamplePhotoService/DownloadPhoto',
+        request_serializer=example__pb2.DownloadPhotoRequest.SerializeToString,
+        response_deserializer=example__pb2.PhotoDataBlock.FromString,
+        )
+    self.BatchCreatePhotos = channel.unary_unary(
+        '/example.photoservice.ExamplePhotoService/BatchCreatePhotos',
+        request_serializer=example__pb2.BatchCreatePhotosRequest.SerializeToString,
+        response_deserializer=example__pb2.BatchCreatePhotosResponse.FromString,
+        )
+    self.BatchGetPhotos = channel.unary_unary(
+        '/example.photoservice.ExamplePhotoService/BatchGetPhotos',
+        request_serializer=example__pb2.BatchGetPhotosRequest.SerializeToString,
+        response_deserializer=example__pb2.BatchGetPhotosResponse.FromString,
+        )
+    self.CreateUploadSession = channel.unary_unary(
+        '/example.photoservice.ExamplePhotoService/CreateUploadSession',
+        request_serializer=example__pb2.CreateUploadSessionRequest.SerializeToString,
+        response_deserializer=example__pb2.UploadSession.FromString,
+        )
+    self.GetUploadSession = channel.unary_unary(
+        '/example.photoservice.ExamplePhotoService/GetUploadSession',
+        request_serializer=example__pb2.GetUploadSessionRequest.SerializeToString,
+        response_deserializer=example__pb2.UploadSession.FromString,
+        )
+    self.WriteUploadSession = channel.stream_unary(
+        '/example.photoservice.ExamplePhotoService/WriteUploadSession',
+        request_serializer=example__pb2.PhotoDataBlock.SerializeToString,
+        response_deserializer=example__pb2.UploadSession.FromString,
+        )
+    self.ComposeUploadSession = channel.unary_unary(
+        '/example.photoservice.ExamplePhotoService/ComposeUploadSession',
+        request_serializer=example__pb2.ComposeUploadSessionRequest.SerializeToString,
+        response_deserializer=example__pb2.UploadSession.FromString,
         )
 
 
@@ -129,6 +164,55 @@ class ExamplePhotoServiceServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def DownloadPhoto(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def BatchCreatePhotos(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def BatchGetPhotos(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def CreateUploadSession(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def GetUploadSession(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def WriteUploadSession(self, request_iterator, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def ComposeUploadSession(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
 
 def add_ExamplePhotoServiceServicer_to_server(servicer, server):
   rpc_method_handlers = {
@@ -175,7 +259,42 @@ def add_ExamplePhotoServiceServicer_to_server(servicer, server):
       'StreamPhotos': grpc.stream_stream_rpc_method_handler(
           servicer.StreamPhotos,
           request_deserializer=example__pb2.GetPhotoRequest.FromString,
-          response_serializer=example__pb2.Photo.SerializeToString,
+          response_serializer=example__pb2.PhotoResult.SerializeToString,
+      ),
+      'DownloadPhoto': grpc.unary_stream_rpc_method_handler(
+          servicer.DownloadPhoto,
+          request_deserializer=example__pb2.DownloadPhotoRequest.FromString,
+          response_serializer=example__pb2.PhotoDataBlock.SerializeToString,
+      ),
+      'BatchCreatePhotos': grpc.unary_unary_rpc_method_handler(
+          servicer.BatchCreatePhotos,
+          request_deserializer=example__pb2.BatchCreatePhotosRequest.FromString,
+          response_serializer=example__pb2.BatchCreatePhotosResponse.SerializeToString,
+      ),
+      'BatchGetPhotos': grpc.unary_unary_rpc_method_handler(
+          servicer.BatchGetPhotos,
+          request_deserializer=example__pb2.BatchGetPhotosRequest.FromString,
+          response_serializer=example__pb2.BatchGetPhotosResponse.SerializeToString,
+      ),
+      'CreateUploadSession': grpc.unary_unary_rpc_method_handler(
+          servicer.CreateUploadSession,
+          request_deserializer=example__pb2.CreateUploadSessionRequest.FromString,
+          response_serializer=example__pb2.UploadSession.SerializeToString,
+      ),
+      'GetUploadSession': grpc.unary_unary_rpc_method_handler(
+          servicer.GetUploadSession,
+          request_deserializer=example__pb2.GetUploadSessionRequest.FromString,
+          response_serializer=example__pb2.UploadSession.SerializeToString,
+      ),
+      'WriteUploadSession': grpc.stream_unary_rpc_method_handler(
+          servicer.WriteUploadSession,
+          request_deserializer=example__pb2.PhotoDataBlock.FromString,
+          response_serializer=example__pb2.UploadSession.SerializeToString,
+      ),
+      'ComposeUploadSession': grpc.unary_unary_rpc_method_handler(
+          servicer.ComposeUploadSession,
+          request_deserializer=example__pb2.ComposeUploadSessionRequest.FromString,
+          response_serializer=example__pb2.UploadSession.SerializeToString,
       ),
   }
   generic_handler = grpc.method_handlers_generic_handler(
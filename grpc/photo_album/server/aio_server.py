@@ -0,0 +1,301 @@
+from concurrent import futures
+import asyncio
+
+from google.protobuf import empty_pb2
+import grpc
+
+from codegen import example_pb2_grpc
+from helpers import admission
+from helpers import compression
+from helpers import config
+from helpers import downloads
+from helpers import error_handler
+from helpers import metrics
+from helpers import pipeline
+from helpers import rate_limits
+from helpers import thumbnails
+from helpers import uploads
+from models import local as model
+from server import ExamplePhotoServiceServicer, configure_storage, start_metrics
+from server import start_admission_control
+from server import ensure_active, thumbnail_wait, thumbnails_exhausted
+from server import PAGE_CACHE_BYTES, PIPELINED_STREAM_MODE, STREAM_MODE_KEY, STREAM_WINDOW
+
+class AsyncExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
+    """Serves the photo service on an asyncio event loop.
+       Unary RPCs are answered by the synchronous servicer. With the
+       in-memory store they run directly on the loop; with a store that
+       does I/O they run in an executor, like the hashing, image sniffing
+       and disk writes of uploads, so that the loop never blocks.
+    """
+    def __init__(self, executor, stream_window=STREAM_WINDOW, page_cache_bytes=PAGE_CACHE_BYTES,
+                 thumbnail_workers=0, thumbnail_backlog=thumbnails.BACKLOG, limits=None,
+                 max_buckets=rate_limits.MAX_BUCKETS):
+        self.servicer = ExamplePhotoServiceServicer(
+            stream_window, page_cache_bytes=page_cache_bytes,
+            thumbnail_workers=thumbnail_workers, thumbnail_backlog=thumbnail_backlog,
+            limits=limits, max_buckets=max_buckets)
+        self.executor = executor
+        self.store_blocks = model.backend.blocking
+
+    async def run_in_executor(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def finish_in_executor(self, func, *args, on_cancel=None):
+        """Runs a call in the executor that later cleanup depends on.
+           If the RPC is cancelled meanwhile, e.g. as its deadline passes,
+           the call is waited for before the cancellation is passed on, so
+           that cleanup never runs alongside it.
+
+        Arguments:
+            func: The function to call.
+            args: Its arguments.
+            on_cancel: A function called with the result if the RPC was
+                cancelled, to undo what the call did.
+
+        Returns:
+            The result of the call.
+        """
+        future = asyncio.ensure_future(self.run_in_executor(func, *args))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            if not future.exception() and on_cancel:
+                on_cancel(future.result())
+            raise
+
+    def release_thumbnails(self, reserved=True):
+        """Gives back room in the thumbnail backlog that will not be used."""
+        if reserved and self.servicer.thumbnails:
+            self.servicer.thumbnails.release()
+
+    async def run_store(self, func, *args):
+        """Runs a call that reads or writes the store."""
+        if self.store_blocks:
+            return await self.run_in_executor(func, *args)
+        return func(*args)
+
+    async def CreateUser(self, request, context):
+        return await self.run_store(self.servicer.CreateUser, request, context)
+
+    async def GetUser(self, request, context):
+        return await self.run_store(self.servicer.GetUser, request, context)
+
+    async def UpdateUser(self, request, context):
+        return await self.run_store(self.servicer.UpdateUser, request, context)
+
+    async def CreatePhoto(self, request, context):
+        return await self.run_store(self.servicer.CreatePhoto, request, context)
+
+    async def ListPhotos(self, request, context):
+        return await self.run_store(self.servicer.ListPhotos, request, context)
+
+    async def GetPhoto(self, request, context):
+        return await self.run_store(self.servicer.GetPhoto, request, context)
+
+    async def DeletePhoto(self, request, context):
+        # Deleting may remove the photo's image from disk
+        return await self.run_in_executor(self.servicer.DeletePhoto, request, context)
+
+    async def BatchCreatePhotos(self, request, context):
+        # Batches take long enough to hold up other calls on the loop
+        return await self.run_in_executor(self.servicer.BatchCreatePhotos, request, context)
+
+    async def BatchGetPhotos(self, request, context):
+        return await self.run_in_executor(self.servicer.BatchGetPhotos, request, context)
+
+    async def UploadPhoto(self, request_iterator, context):
+        """Uploads a photo.
+           gRPC calls this method when clients call the UploadPhoto rpc (method).
+
+        Arguments:
+            request_iterator (async iterator): An iterator of incoming requests.
+            context: The gRPC connection context.
+
+        Returns:
+            An Empty Protocol Buffers message.
+        """
+        upload = uploads.PhotoUpload()
+        reserved = saved = False
+
+        def save():
+            nonlocal saved
+            self.servicer.save_upload(upload)
+            saved = True
+
+        try:
+            async for request in request_iterator:
+                await self.finish_in_executor(upload.write, request)
+            ensure_active(context)
+            # Room in the thumbnail backlog is taken only once every byte
+            # is received; waiting for it blocks
+            reserved = await self.finish_in_executor(
+                self.servicer.reserve_thumbnails, thumbnail_wait(context),
+                on_cancel=self.release_thumbnails)
+            if not reserved:
+                return thumbnails_exhausted(context)
+            await self.finish_in_executor(save)
+        except uploads.UploadError as err:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=err.code,
+                details=err.details
+            )
+        finally:
+            await self.finish_in_executor(upload.abort)
+            if not saved:
+                self.release_thumbnails(reserved)
+
+        return empty_pb2.Empty()
+
+    async def CreateUploadSession(self, request, context):
+        # Creating a session writes to disk
+        return await self.run_in_executor(self.servicer.CreateUploadSession, request, context)
+
+    async def GetUploadSession(self, request, context):
+        return await self.run_in_executor(self.servicer.GetUploadSession, request, context)
+
+    async def WriteUploadSession(self, request_iterator, context):
+        """Writes blocks to a resumable upload.
+           gRPC calls this method when clients call the WriteUploadSession rpc (method).
+
+        Arguments:
+            request_iterator (async iterator): An iterator of incoming requests.
+            context: The gRPC connection context.
+
+        Returns:
+            session (UploadSession): The session, with its new committed
+                offset.
+        """
+        sessions = self.servicer.upload_sessions
+        session = writer = None
+        try:
+            async for request in request_iterator:
+                if writer is None:
+                    # Opening takes the session's lock, which a cancelled
+                    # call must still give back
+                    session, writer = await self.finish_in_executor(
+                        sessions.open, request.upload_id, request.part_number,
+                        on_cancel=lambda opened: opened[1].close())
+                await self.finish_in_executor(writer.write, request)
+            if writer is None:
+                raise uploads.UploadError(
+                    grpc.StatusCode.INVALID_ARGUMENT, 'INVALID_ARGUMENT: No data received.')
+            if writer is session and session.committed_offset == session.size:
+                ensure_active(context)
+                await self.finish_in_executor(self.servicer.save_session, session, thumbnail_wait(context))
+        except uploads.UploadError as err:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=err.code,
+                details=err.details
+            )
+        finally:
+            if writer:
+                await self.finish_in_executor(writer.close)
+
+        return session.to_message()
+
+    async def ComposeUploadSession(self, request, context):
+        # Composing copies every part on disk
+        return await self.run_in_executor(self.servicer.ComposeUploadSession, request, context)
+
+    async def DownloadPhoto(self, request, context):
+        """Downloads a photo.
+           gRPC calls this method when clients call the DownloadPhoto rpc (method).
+
+        Arguments:
+            request (DownloadPhotoRequest): The incoming request.
+            context: The gRPC connection context.
+
+        Returns:
+            An async generator of PhotoDataBlocks.
+        """
+        # Hashing a thumbnail reads it from disk
+        photo_file = await self.run_in_executor(self.servicer.find_download, request, context)
+        if not photo_file:
+            return
+
+        path, data_hash = photo_file
+        blocks = downloads.read_blocks(request.name, path, data_hash)
+        try:
+            while True:
+                # Reading and hashing a block may touch the disk
+                block = await self.finish_in_executor(next, blocks, None)
+                if block is None:
+                    break
+                yield block
+        finally:
+            blocks.close()
+
+    async def StreamPhotos(self, request_iterator, context):
+        """Streams photos.
+           gRPC calls this method when clients call the StreamPhotos rpc (method).
+           Each request gets a PhotoResult, as with the synchronous servicer.
+
+        Arguments:
+            request_iterator (async iterator): An iterator of incoming requests.
+            context: The gRPC connection context.
+
+        Returns:
+            An async generator of PhotoResults.
+        """
+        async def resolve(request):
+            return await self.run_store(self.servicer.resolve_photo, request)
+
+        metadata = dict(context.invocation_metadata())
+        if metadata.get(STREAM_MODE_KEY) == PIPELINED_STREAM_MODE:
+            async for result in pipeline.async_ordered_map(
+                    resolve, request_iterator, self.servicer.stream_window):
+                yield result
+            return
+
+        async for request in request_iterator:
+            yield await resolve(request)
+
+async def serve(settings):
+    """Runs the photo service on an asyncio event loop until it is stopped.
+
+    Arguments:
+        settings (argparse.Namespace): The server settings.
+
+    Returns:
+        None.
+    """
+    configure_storage(settings)
+    executor = futures.ThreadPoolExecutor(max_workers=settings.max_workers)
+    servicer = AsyncExamplePhotoServiceServicer(
+        executor, settings.stream_window, settings.page_cache_bytes,
+        settings.thumbnail_workers, settings.thumbnail_backlog,
+        settings.rate_limits, settings.rate_limit_buckets)
+    registry = start_metrics(settings, servicer.servicer)
+    interceptors = []
+    if registry:
+        interceptors.append(metrics.AsyncMetricsInterceptor(registry))
+    control = start_admission_control(settings, registry)
+    if control:
+        interceptors.append(admission.AsyncAdmissionInterceptor(control))
+    if settings.compression:
+        interceptors.append(compression.AsyncCompressionInterceptor(
+            settings.compression, settings.compression_threshold))
+    if settings.profile_rate or settings.profile_token:
+        # cProfile follows one thread, while the event loop interleaves
+        # many RPCs on one thread and hands their work to others
+        print('RPC profiling is only available in sync mode; ignoring it.')
+    server = grpc.aio.server(
+        options=config.server_options(settings),
+        interceptors=interceptors,
+        maximum_concurrent_rpcs=settings.max_concurrent_rpcs
+    )
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(servicer, server)
+    address = '{}:{}'.format(settings.host, settings.port)
+    server.add_insecure_port(address)
+    await server.start()
+    print('API server (asyncio) started. Listening at {}.'.format(address))
+    print('Connection is insecure. No authentication enabled.')
+    await server.wait_for_termination()
+
+if __name__ == '__main__':
+    asyncio.run(serve(config.parse_args()))
@@ -1,3 +1,4 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # source: example.proto
 
@@ -22,12 +23,42 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   package='example.photoservice',
   syntax='proto3',
   serialized_options=None,
-  serialized_pb=_b('\n\rexample.proto\x12\x14\x65xample.photoservice\x1a\x1bgoogle/protobuf/empty.proto\x1a\x1fgoogle/protobuf/timestamp.proto\x1a google/protobuf/field_mask.proto\"9\n\x04User\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\"[\n\x05Photo\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x03 \x01(\t\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\x1e\n\x0eGetUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"u\n\x11UpdateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12(\n\x04user\x18\x02 \x01(\x0b\x32\x1a.example.photoservice.User\x12(\n\x04mask\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"P\n\x12\x43reatePhotoRequest\x12\x0e\n\x06parent\x18\x02 \x01(\t\x12*\n\x05photo\x18\x03 \x01(\x0b\x32\x1b.example.photoservice.Photo\"\xb4\x01\n\x11ListPhotosRequest\x12\x0e\n\x06parent\x18\x01 \x01(\t\x12\x41\n\x08order_by\x18\x02 \x01(\x0e\x32/.example.photoservice.ListPhotosRequest.OrderBy\x12\x12\n\npage_token\x18\x03 \x01(\t\"8\n\x07OrderBy\x12\x0b\n\x07\x44\x45\x46\x41ULT\x10\x00\x12\x10\n\x0c\x44ISPLAY_NAME\x10\x01\x12\x0e\n\nCREATED_AT\x10\x02\"Z\n\x12ListPhotosResponse\x12+\n\x06photos\x18\x01 \x03(\x0b\x32\x1b.example.photoservice.Photo\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"\x1f\n\x0fGetPhotoRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"\"\n\x12\x44\x65letePhotoRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"^\n\x0ePhotoDataBlock\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\ndata_block\x18\x03 \x01(\x0c\x12\x17\n\x0f\x64\x61ta_block_hash\x18\x04 \x01(\t\x12\x11\n\tdata_hash\x18\x05 \x01(\t2\xfa\x05\n\x13\x45xamplePhotoService\x12\x44\n\nCreateUser\x12\x1a.example.photoservice.User\x1a\x1a.example.photoservice.User\x12K\n\x07GetUser\x12$.example.photoservice.GetUserRequest\x1a\x1a.example.photoservice.User\x12Q\n\nUpdateUser\x12\'.example.photoservice.UpdateUserRequest\x1a\x1a.example.photoservice.User\x12T\n\x0b\x43reatePhoto\x12(.example.photoservice.CreatePhotoRequest\x1a\x1b.example.photoservice.Photo\x12_\n\nListPhotos\x12\'.example.photoservice.ListPhotosRequest\x1a(.example.photoservice.ListPhotosResponse\x12N\n\x08GetPhoto\x12%.example.photoservice.GetPhotoRequest\x1a\x1b.example.photoservice.Photo\x12O\n\x0b\x44\x65letePhoto\x12(.example.photoservice.DeletePhotoRequest\x1a\x16.google.protobuf.Empty\x12M\n\x0bUploadPhoto\x12$.example.photoservice.PhotoDataBlock\x1a\x16.google.protobuf.Empty(\x01\x12V\n\x0cStreamPhotos\x12%.example.photoservice.GetPhotoRequest\x1a\x1b.example.photoservice.Photo(\x01\x30\x01\x62\x06proto3')
+  serialized_pb=_b('\n\rexample.proto\x12\x14\x65xample.photoservice\x1a\x1bgoogle/protobuf/empty.proto\x1a\x1fgoogle/protobuf/timestamp.proto\x1a google/protobuf/field_mask.proto\"9\n\x04User\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x02 \x01(\t\x12\r\n\x05\x65mail\x18\x03 \x01(\t\"\xf7\x01\n\x05Photo\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x14\n\x0c\x64isplay_name\x18\x03 \x01(\t\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x43\n\x0fthumbnail_state\x18\x05 \x01(\x0e\x32*.example.photoservice.Photo.ThumbnailState\"U\n\x0eThumbnailState\x12\x1f\n\x1bTHUMBNAIL_STATE_UNSPECIFIED\x10\x00\x12\x0b\n\x07PENDING\x10\x01\x12\t\n\x05READY\x10\x02\x12\n\n\x06\x46\x41ILED\x10\x03\"\x1e\n\x0eGetUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"u\n\x11UpdateUserRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12(\n\x04user\x18\x02 \x01(\x0b\x32\x1a.example.photoservice.User\x12(\n\x04mask\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"P\n\x12\x43reatePhotoRequest\x12\x0e\n\x06parent\x18\x02 \x01(\t\x12*\n\x05photo\x18\x03 \x01(\x0b\x32\x1b.example.photoservice.Photo\"\xe3\x01\n\x11ListPhotosRequest\x12\x0e\n\x06parent\x18\x01 \x01(\t\x12\x41\n\x08order_by\x18\x02 \x01(\x0e\x32/.example.photoservice.ListPhotosRequest.OrderBy\x12\x12\n\npage_token\x18\x03 \x01(\t\x12-\n\tread_mask\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"8\n\x07OrderBy\x12\x0b\n\x07\x44\x45\x46\x41ULT\x10\x00\x12\x10\n\x0c\x44ISPLAY_NAME\x10\x01\x12\x0e\n\nCREATED_AT\x10\x02\"Z\n\x12ListPhotosResponse\x12+\n\x06photos\x18\x01 \x03(\x0b\x32\x1b.example.photoservice.Photo\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"N\n\x0fGetPhotoRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12-\n\tread_mask\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"V\n\x0bPhotoResult\x12,\n\x05photo\x18\x01 \x01(\x0b\x32\x1b.example.photoservice.PhotoH\x00\x12\x0f\n\x05\x65rror\x18\x02 \x01(\tH\x00\x42\x08\n\x06result\"\"\n\x12\x44\x65letePhotoRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\"7\n\x14\x44ownloadPhotoRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tthumbnail\x18\x02 \x01(\t\"W\n\x18\x42\x61tchCreatePhotosRequest\x12\x0e\n\x06parent\x18\x01 \x01(\t\x12+\n\x06photos\x18\x02 \x03(\x0b\x32\x1b.example.photoservice.Photo\"H\n\x19\x42\x61tchCreatePhotosResponse\x12+\n\x06photos\x18\x01 \x03(\x0b\x32\x1b.example.photoservice.Photo\"U\n\x15\x42\x61tchGetPhotosRequest\x12\r\n\x05names\x18\x01 \x03(\t\x12-\n\tread_mask\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"L\n\x16\x42\x61tchGetPhotosResponse\x12\x32\n\x07results\x18\x01 \x03(\x0b\x32!.example.photoservice.PhotoResult\"\x96\x01\n\x0ePhotoDataBlock\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x12\n\ndata_block\x18\x03 \x01(\x0c\x12\x17\n\x0f\x64\x61ta_block_hash\x18\x04 \x01(\t\x12\x11\n\tdata_hash\x18\x05 \x01(\t\x12\x11\n\tupload_id\x18\x06 \x01(\t\x12\x0e\n\x06offset\x18\x07 \x01(\x03\x12\x13\n\x0bpart_number\x18\x08 \x01(\x05\"K\n\x1a\x43reateUploadSessionRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x11\n\tdata_hash\x18\x02 \x01(\t\x12\x0c\n\x04size\x18\x03 \x01(\x03\",\n\x17GetUploadSessionRequest\x12\x11\n\tupload_id\x18\x01 \x01(\t\"\x9b\x01\n\rUploadSession\x12\x11\n\tupload_id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x0c\n\x04size\x18\x03 \x01(\x03\x12\x18\n\x10\x63ommitted_offset\x18\x04 \x01(\x03\x12\x10\n\x08\x63omplete\x18\x05 \x01(\x08\x12/\n\x05parts\x18\x06 \x03(\x0b\x32 .example.photoservice.UploadPart\"B\n\nUploadPart\x12\x13\n\x0bpart_number\x18\x01 \x01(\x05\x12\x0c\n\x04size\x18\x02 \x01(\x03\x12\x11\n\tpart_hash\x18\x03 \x01(\t\"a\n\x1b\x43omposeUploadSessionRequest\x12\x11\n\tupload_id\x18\x01 \x01(\t\x12/\n\x05parts\x18\x02 \x03(\x0b\x32 .example.photoservice.UploadPart2\xf1\x0b\n\x13\x45xamplePhotoService\x12\x44\n\nCreateUser\x12\x1a.example.photoservice.User\x1a\x1a.example.photoservice.User\x12K\n\x07GetUser\x12$.example.photoservice.GetUserRequest\x1a\x1a.example.photoservice.User\x12Q\n\nUpdateUser\x12\'.example.photoservice.UpdateUserRequest\x1a\x1a.example.photoservice.User\x12T\n\x0b\x43reatePhoto\x12(.example.photoservice.CreatePhotoRequest\x1a\x1b.example.photoservice.Photo\x12_\n\nListPhotos\x12\'.example.photoservice.ListPhotosRequest\x1a(.example.photoservice.ListPhotosResponse\x12N\n\x08GetPhoto\x12%.example.photoservice.GetPhotoRequest\x1a\x1b.example.photoservice.Photo\x12O\n\x0b\x44\x65letePhoto\x12(.example.photoservice.DeletePhotoRequest\x1a\x16.google.protobuf.Empty\x12M\n\x0bUploadPhoto\x12$.example.photoservice.PhotoDataBlock\x1a\x16.google.protobuf.Empty(\x01\x12\\\n\x0cStreamPhotos\x12%.example.photoservice.GetPhotoRequest\x1a!.example.photoservice.PhotoResult(\x01\x30\x01\x12\x63\n\rDownloadPhoto\x12*.example.photoservice.DownloadPhotoRequest\x1a$.example.photoservice.PhotoDataBlock0\x01\x12t\n\x11\x42\x61tchCreatePhotos\x12..example.photoservice.BatchCreatePhotosRequest\x1a/.example.photoservice.BatchCreatePhotosResponse\x12k\n\x0e\x42\x61tchGetPhotos\x12+.example.photoservice.BatchGetPhotosRequest\x1a,.example.photoservice.BatchGetPhotosResponse\x12l\n\x13\x43reateUploadSession\x12\x30.example.photoservice.CreateUploadSessionRequest\x1a#.example.photoservice.UploadSession\x12\x66\n\x10GetUploadSession\x12-.example.photoservice.GetUploadSessionRequest\x1a#.example.photoservice.UploadSession\x12\x61\n\x12WriteUploadSession\x12$.example.photoservice.PhotoDataBlock\x1a#.example.photoservice.UploadSession(\x01\x12n\n\x14\x43omposeUploadSession\x12\x31.example.photoservice.ComposeUploadSessionRequest\x1a#.example.photoservice.UploadSessionb\x06proto3')
   ,
   dependencies=[google_dot_protobuf_dot_empty__pb2.DESCRIPTOR,google_dot_protobuf_dot_timestamp__pb2.DESCRIPTOR,google_dot_protobuf_dot_field__mask__pb2.DESCRIPTOR,])
 
 
 
+_PHOTO_THUMBNAILSTATE = _descriptor.EnumDescriptor(
+  name='ThumbnailState',
+  full_name='example.photoservice.Photo.ThumbnailState',
+  filename=None,
+  file=DESCRIPTOR,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='THUMBNAIL_STATE_UNSPECIFIED', index=0, number=0,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='PENDING', index=1, number=1,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='READY', index=2, number=2,
+      serialized_options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='FAILED', index=3, number=3,
+      serialized_options=None,
+      type=None),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=357,
+  serialized_end=442,
+)
+_sym_db.RegisterEnumDescriptor(_PHOTO_THUMBNAILSTATE)
+
 _LISTPHOTOSREQUEST_ORDERBY = _descriptor.EnumDescriptor(
   name='OrderBy',
   full_name='example.photoservice.ListPhotosRequest.OrderBy',
@@ -49,8 +80,8 @@ _LISTPHOTOSREQUEST_ORDERBY = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=645,
-  serialized_end=701,
+  serialized_start=849,
+  serialized_end=905,
 )
 _sym_db.RegisterEnumDescriptor(_LISTPHOTOSREQUEST_ORDERBY)
 
@@ -128,11 +159,19 @@ _PHOTO = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='thumbnail_state', full_name='example.photoservice.Photo.thumbnail_state', index=3,
+      number=5, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
   nested_types=[],
   enum_types=[
+    _PHOTO_THUMBNAILSTATE,
   ],
   serialized_options=None,
   is_extendable=False,
@@ -140,8 +179,8 @@ _PHOTO = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=194,
-  serialized_end=285,
+  serialized_start=195,
+  serialized_end=442,
 )
 
 
@@ -171,8 +210,8 @@ _GETUSERREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=287,
-  serialized_end=317,
+  serialized_start=444,
+  serialized_end=474,
 )
 
 
@@ -216,8 +255,8 @@ _UPDATEUSERREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=319,
-  serialized_end=436,
+  serialized_start=476,
+  serialized_end=593,
 )
 
 
@@ -254,8 +293,8 @@ _CREATEPHOTOREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=438,
-  serialized_end=518,
+  serialized_start=595,
+  serialized_end=675,
 )
 
 
@@ -287,6 +326,13 @@ _LISTPHOTOSREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='read_mask', full_name='example.photoservice.ListPhotosRequest.read_mask', index=3,
+      number=4, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
@@ -300,8 +346,8 @@ _LISTPHOTOSREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=521,
-  serialized_end=701,
+  serialized_start=678,
+  serialized_end=905,
 )
 
 
@@ -338,8 +384,8 @@ _LISTPHOTOSRESPONSE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=703,
-  serialized_end=793,
+  serialized_start=907,
+  serialized_end=997,
 )
 
 
@@ -357,6 +403,51 @@ _GETPHOTOREQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='read_mask', full_name='example.photoservice.GetPhotoRequest.read_mask', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=999,
+  serialized_end=1077,
+)
+
+
+_PHOTORESULT = _descriptor.Descriptor(
+  name='PhotoResult',
+  full_name='example.photoservice.PhotoResult',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='photo', full_name='example.photoservice.PhotoResult.photo', index=0,
+      number=1, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='error', full_name='example.photoservice.PhotoResult.error', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
@@ -368,9 +459,12 @@ _GETPHOTOREQUEST = _descriptor.Descriptor(
   syntax='proto3',
   extension_ranges=[],
   oneofs=[
+    _descriptor.OneofDescriptor(
+      name='result', full_name='example.photoservice.PhotoResult.result',
+      index=0, containing_type=None, fields=[]),
   ],
-  serialized_start=795,
-  serialized_end=826,
+  serialized_start=1079,
+  serialized_end=1165,
 )
 
 
@@ -400,8 +494,184 @@ _DELETEPHOTOREQUEST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=828,
-  serialized_end=862,
+  serialized_start=1167,
+  serialized_end=1201,
+)
+
+
+_DOWNLOADPHOTOREQUEST = _descriptor.Descriptor(
+  name='DownloadPhotoRequest',
+  full_name='example.photoservice.DownloadPhotoRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='example.photoservice.DownloadPhotoRequest.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='thumbnail', full_name='example.photoservice.DownloadPhotoRequest.thumbnail', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1203,
+  serialized_end=1258,
+)
+
+
+_BATCHCREATEPHOTOSREQUEST = _descriptor.Descriptor(
+  name='BatchCreatePhotosRequest',
+  full_name='example.photoservice.BatchCreatePhotosRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='parent', full_name='example.photoservice.BatchCreatePhotosRequest.parent', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='photos', full_name='example.photoservice.BatchCreatePhotosRequest.photos', index=1,
+      number=2, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1260,
+  serialized_end=1347,
+)
+
+
+_BATCHCREATEPHOTOSRESPONSE = _descriptor.Descriptor(
+  name='BatchCreatePhotosResponse',
+  full_name='example.photoservice.BatchCreatePhotosResponse',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='photos', full_name='example.photoservice.BatchCreatePhotosResponse.photos', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1349,
+  serialized_end=1421,
+)
+
+
+_BATCHGETPHOTOSREQUEST = _descriptor.Descriptor(
+  name='BatchGetPhotosRequest',
+  full_name='example.photoservice.BatchGetPhotosRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='names', full_name='example.photoservice.BatchGetPhotosRequest.names', index=0,
+      number=1, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='read_mask', full_name='example.photoservice.BatchGetPhotosRequest.read_mask', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1423,
+  serialized_end=1508,
+)
+
+
+_BATCHGETPHOTOSRESPONSE = _descriptor.Descriptor(
+  name='BatchGetPhotosResponse',
+  full_name='example.photoservice.BatchGetPhotosResponse',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='results', full_name='example.photoservice.BatchGetPhotosResponse.results', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1510,
+  serialized_end=1586,
 )
 
 
@@ -440,6 +710,252 @@ _PHOTODATABLOCK = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='upload_id', full_name='example.photoservice.PhotoDataBlock.upload_id', index=4,
+      number=6, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='offset', full_name='example.photoservice.PhotoDataBlock.offset', index=5,
+      number=7, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='part_number', full_name='example.photoservice.PhotoDataBlock.part_number', index=6,
+      number=8, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1589,
+  serialized_end=1739,
+)
+
+
+_CREATEUPLOADSESSIONREQUEST = _descriptor.Descriptor(
+  name='CreateUploadSessionRequest',
+  full_name='example.photoservice.CreateUploadSessionRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='example.photoservice.CreateUploadSessionRequest.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='data_hash', full_name='example.photoservice.CreateUploadSessionRequest.data_hash', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='size', full_name='example.photoservice.CreateUploadSessionRequest.size', index=2,
+      number=3, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1741,
+  serialized_end=1816,
+)
+
+
+_GETUPLOADSESSIONREQUEST = _descriptor.Descriptor(
+  name='GetUploadSessionRequest',
+  full_name='example.photoservice.GetUploadSessionRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='upload_id', full_name='example.photoservice.GetUploadSessionRequest.upload_id', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1818,
+  serialized_end=1862,
+)
+
+
+_UPLOADSESSION = _descriptor.Descriptor(
+  name='UploadSession',
+  full_name='example.photoservice.UploadSession',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='upload_id', full_name='example.photoservice.UploadSession.upload_id', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='name', full_name='example.photoservice.UploadSession.name', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='size', full_name='example.photoservice.UploadSession.size', index=2,
+      number=3, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='committed_offset', full_name='example.photoservice.UploadSession.committed_offset', index=3,
+      number=4, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='complete', full_name='example.photoservice.UploadSession.complete', index=4,
+      number=5, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='parts', full_name='example.photoservice.UploadSession.parts', index=5,
+      number=6, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1865,
+  serialized_end=2020,
+)
+
+
+_UPLOADPART = _descriptor.Descriptor(
+  name='UploadPart',
+  full_name='example.photoservice.UploadPart',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='part_number', full_name='example.photoservice.UploadPart.part_number', index=0,
+      number=1, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='size', full_name='example.photoservice.UploadPart.size', index=1,
+      number=2, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='part_hash', full_name='example.photoservice.UploadPart.part_hash', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=2022,
+  serialized_end=2088,
+)
+
+
+_COMPOSEUPLOADSESSIONREQUEST = _descriptor.Descriptor(
+  name='ComposeUploadSessionRequest',
+  full_name='example.photoservice.ComposeUploadSessionRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='upload_id', full_name='example.photoservice.ComposeUploadSessionRequest.upload_id', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='parts', full_name='example.photoservice.ComposeUploadSessionRequest.parts', index=1,
+      number=2, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
@@ -452,17 +968,34 @@ _PHOTODATABLOCK = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=864,
-  serialized_end=958,
+  serialized_start=2090,
+  serialized_end=2187,
 )
 
 _PHOTO.fields_by_name['created_at'].message_type = google_dot_protobuf_dot_timestamp__pb2._TIMESTAMP
+_PHOTO.fields_by_name['thumbnail_state'].enum_type = _PHOTO_THUMBNAILSTATE
+_PHOTO_THUMBNAILSTATE.containing_type = _PHOTO
 _UPDATEUSERREQUEST.fields_by_name['user'].message_type = _USER
 _UPDATEUSERREQUEST.fields_by_name['mask'].message_type = google_dot_protobuf_dot_field__mask__pb2._FIELDMASK
 _CREATEPHOTOREQUEST.fields_by_name['photo'].message_type = _PHOTO
 _LISTPHOTOSREQUEST.fields_by_name['order_by'].enum_type = _LISTPHOTOSREQUEST_ORDERBY
+_LISTPHOTOSREQUEST.fields_by_name['read_mask'].message_type = google_dot_protobuf_dot_field__mask__pb2._FIELDMASK
 _LISTPHOTOSREQUEST_ORDERBY.containing_type = _LISTPHOTOSREQUEST
 _LISTPHOTOSRESPONSE.fields_by_name['photos'].message_type = _PHOTO
+_GETPHOTOREQUEST.fields_by_name['read_mask'].message_type = google_dot_protobuf_dot_field__mask__pb2._FIELDMASK
+_PHOTORESULT.fields_by_name['photo'].message_type = _PHOTO
+_PHOTORESULT.oneofs_by_name['result'].fields.append(
+  _PHOTORESULT.fields_by_name['photo'])
+_PHOTORESULT.fields_by_name['photo'].containing_oneof = _PHOTORESULT.oneofs_by_name['result']
+_PHOTORESULT.oneofs_by_name['result'].fields.append(
+  _PHOTORESULT.fields_by_name['error'])
+_PHOTORESULT.fields_by_name['error'].containing_oneof = _PHOTORESULT.oneofs_by_name['result']
+_BATCHCREATEPHOTOSREQUEST.fields_by_name['photos'].message_type = _PHOTO
+_BATCHCREATEPHOTOSRESPONSE.fields_by_name['photos'].message_type = _PHOTO
+_BATCHGETPHOTOSREQUEST.fields_by_name['read_mask'].message_type = google_dot_protobuf_dot_field__mask__pb2._FIELDMASK
+_BATCHGETPHOTOSRESPONSE.fields_by_name['results'].message_type = _PHOTORESULT
+_UPLOADSESSION.fields_by_name['parts'].message_type = _UPLOADPART
+_COMPOSEUPLOADSESSIONREQUEST.fields_by_name['parts'].message_type = _UPLOADPART
 DESCRIPTOR.message_types_by_name['User'] = _USER
 DESCRIPTOR.message_types_by_name['Photo'] = _PHOTO
 DESCRIPTOR.message_types_by_name['GetUserRequest'] = _GETUSERREQUEST
@@ -471,80 +1004,168 @@ DESCRIPTOR.message_types_by_name['CreatePhotoRequest'] = _CREATEPHOTOREQUEST
 DESCRIPTOR.message_types_by_name['ListPhotosRequest'] = _LISTPHOTOSREQUEST
 DESCRIPTOR.message_types_by_name['ListPhotosResponse'] = _LISTPHOTOSRESPONSE
 DESCRIPTOR.message_types_by_name['GetPhotoRequest'] = _GETPHOTOREQUEST
+DESCRIPTOR.message_types_by_name['PhotoResult'] = _PHOTORESULT
 DESCRIPTOR.message_types_by_name['DeletePhotoRequest'] = _DELETEPHOTOREQUEST
+DESCRIPTOR.message_types_by_name['DownloadPhotoRequest'] = _DOWNLOADPHOTOREQUEST
+DESCRIPTOR.message_types_by_name['BatchCreatePhotosRequest'] = _BATCHCREATEPHOTOSREQUEST
+DESCRIPTOR.message_types_by_name['BatchCreatePhotosResponse'] = _BATCHCREATEPHOTOSRESPONSE
+DESCRIPTOR.message_types_by_name['BatchGetPhotosRequest'] = _BATCHGETPHOTOSREQUEST
+DESCRIPTOR.message_types_by_name['BatchGetPhotosResponse'] = _BATCHGETPHOTOSRESPONSE
 DESCRIPTOR.message_types_by_name['PhotoDataBlock'] = _PHOTODATABLOCK
+DESCRIPTOR.message_types_by_name['CreateUploadSessionRequest'] = _CREATEUPLOADSESSIONREQUEST
+DESCRIPTOR.message_types_by_name['GetUploadSessionRequest'] = _GETUPLOADSESSIONREQUEST
+DESCRIPTOR.message_types_by_name['UploadSession'] = _UPLOADSESSION
+DESCRIPTOR.message_types_by_name['UploadPart'] = _UPLOADPART
+DESCRIPTOR.message_types_by_name['ComposeUploadSessionRequest'] = _COMPOSEUPLOADSESSIONREQUEST
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
-User = _reflection.GeneratedProtocolMessageType('User', (_message.Message,), dict(
-  DESCRIPTOR = _USER,
-  __module__ = 'example_pb2'
+User = _reflection.GeneratedProtocolMessageType('User', (_message.Message,), {
+  'DESCRIPTOR' : _USER,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.User)
-  ))
+  })
 _sym_db.RegisterMessage(User)
 
-Photo = _reflection.GeneratedProtocolMessageType('Photo', (_message.Message,), dict(
-  DESCRIPTOR = _PHOTO,
-  __module__ = 'example_pb2'
+Photo = _reflection.GeneratedProtocolMessageType('Photo', (_message.Message,), {
+  'DESCRIPTOR' : _PHOTO,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.Photo)
-  ))
+  })
 _sym_db.RegisterMessage(Photo)
 
-GetUserRequest = _reflection.GeneratedProtocolMessageType('GetUserRequest', (_message.Message,), dict(
-  DESCRIPTOR = _GETUSERREQUEST,
-  __module__ = 'example_pb2'
+GetUserRequest = _reflection.GeneratedProtocolMessageType('GetUserRequest', (_message.Message,), {
+  'DESCRIPTOR' : _GETUSERREQUEST,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.GetUserRequest)
-  ))
+  })
 _sym_db.RegisterMessage(GetUserRequest)
 
-UpdateUserRequest = _reflection.GeneratedProtocolMessageType('UpdateUserRequest', (_message.Message,), dict(
-  DESCRIPTOR = _UPDATEUSERREQUEST,
-  __module__ = 'example_pb2'
+UpdateUserRequest = _reflection.GeneratedProtocolMessageType('UpdateUserRequest', (_message.Message,), {
+  'DESCRIPTOR' : _UPDATEUSERREQUEST,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.UpdateUserRequest)
-  ))
+  })
 _sym_db.RegisterMessage(UpdateUserRequest)
 
-CreatePhotoRequest = _reflection.GeneratedProtocolMessageType('CreatePhotoRequest', (_message.Message,), dict(
-  DESCRIPTOR = _CREATEPHOTOREQUEST,
-  __module__ = 'example_pb2'
+CreatePhotoRequest = _reflection.GeneratedProtocolMessageType('CreatePhotoRequest', (_message.Message,), {
+  'DESCRIPTOR' : _CREATEPHOTOREQUEST,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.CreatePhotoRequest)
-  ))
+  })
 _sym_db.RegisterMessage(CreatePhotoRequest)
 
-ListPhotosRequest = _reflection.GeneratedProtocolMessageType('ListPhotosRequest', (_message.Message,), dict(
-  DESCRIPTOR = _LISTPHOTOSREQUEST,
-  __module__ = 'example_pb2'
+ListPhotosRequest = _reflection.GeneratedProtocolMessageType('ListPhotosRequest', (_message.Message,), {
+  'DESCRIPTOR' : _LISTPHOTOSREQUEST,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.ListPhotosRequest)
-  ))
+  })
 _sym_db.RegisterMessage(ListPhotosRequest)
 
-ListPhotosResponse = _reflection.GeneratedProtocolMessageType('ListPhotosResponse', (_message.Message,), dict(
-  DESCRIPTOR = _LISTPHOTOSRESPONSE,
-  __module__ = 'example_pb2'
+ListPhotosResponse = _reflection.GeneratedProtocolMessageType('ListPhotosResponse', (_message.Message,), {
+  'DESCRIPTOR' : _LISTPHOTOSRESPONSE,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.ListPhotosResponse)
-  ))
+  })
 _sym_db.RegisterMessage(ListPhotosResponse)
 
-GetPhotoRequest = _reflection.GeneratedProtocolMessageType('GetPhotoRequest', (_message.Message,), dict(
-  DESCRIPTOR = _GETPHOTOREQUEST,
-  __module__ = 'example_pb2'
+GetPhotoRequest = _reflection.GeneratedProtocolMessageType('GetPhotoRequest', (_message.Message,), {
+  'DESCRIPTOR' : _GETPHOTOREQUEST,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.GetPhotoRequest)
-  ))
+  })
 _sym_db.RegisterMessage(GetPhotoRequest)
 
-DeletePhotoRequest = _reflection.GeneratedProtocolMessageType('DeletePhotoRequest', (_message.Message,), dict(
-  DESCRIPTOR = _DELETEPHOTOREQUEST,
-  __module__ = 'example_pb2'
+PhotoResult = _reflection.GeneratedProtocolMessageType('PhotoResult', (_message.Message,), {
+  'DESCRIPTOR' : _PHOTORESULT,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.PhotoResult)
+  })
+_sym_db.RegisterMessage(PhotoResult)
+
+DeletePhotoRequest = _reflection.GeneratedProtocolMessageType('DeletePhotoRequest', (_message.Message,), {
+  'DESCRIPTOR' : _DELETEPHOTOREQUEST,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.DeletePhotoRequest)
-  ))
+  })
 _sym_db.RegisterMessage(DeletePhotoRequest)
 
-PhotoDataBlock = _reflection.GeneratedProtocolMessageType('PhotoDataBlock', (_message.Message,), dict(
-  DESCRIPTOR = _PHOTODATABLOCK,
-  __module__ = 'example_pb2'
+DownloadPhotoRequest = _reflection.GeneratedProtocolMessageType('DownloadPhotoRequest', (_message.Message,), {
+  'DESCRIPTOR' : _DOWNLOADPHOTOREQUEST,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.DownloadPhotoRequest)
+  })
+_sym_db.RegisterMessage(DownloadPhotoRequest)
+
+BatchCreatePhotosRequest = _reflection.GeneratedProtocolMessageType('BatchCreatePhotosRequest', (_message.Message,), {
+  'DESCRIPTOR' : _BATCHCREATEPHOTOSREQUEST,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.BatchCreatePhotosRequest)
+  })
+_sym_db.RegisterMessage(BatchCreatePhotosRequest)
+
+BatchCreatePhotosResponse = _reflection.GeneratedProtocolMessageType('BatchCreatePhotosResponse', (_message.Message,), {
+  'DESCRIPTOR' : _BATCHCREATEPHOTOSRESPONSE,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.BatchCreatePhotosResponse)
+  })
+_sym_db.RegisterMessage(BatchCreatePhotosResponse)
+
+BatchGetPhotosRequest = _reflection.GeneratedProtocolMessageType('BatchGetPhotosRequest', (_message.Message,), {
+  'DESCRIPTOR' : _BATCHGETPHOTOSREQUEST,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.BatchGetPhotosRequest)
+  })
+_sym_db.RegisterMessage(BatchGetPhotosRequest)
+
+BatchGetPhotosResponse = _reflection.GeneratedProtocolMessageType('BatchGetPhotosResponse', (_message.Message,), {
+  'DESCRIPTOR' : _BATCHGETPHOTOSRESPONSE,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.BatchGetPhotosResponse)
+  })
+_sym_db.RegisterMessage(BatchGetPhotosResponse)
+
+PhotoDataBlock = _reflection.GeneratedProtocolMessageType('PhotoDataBlock', (_message.Message,), {
+  'DESCRIPTOR' : _PHOTODATABLOCK,
+  '__module__' : 'example_pb2'
   # @@protoc_insertion_point(class_scope:example.photoservice.PhotoDataBlock)
-  ))
+  })
 _sym_db.RegisterMessage(PhotoDataBlock)
 
+CreateUploadSessionRequest = _reflection.GeneratedProtocolMessageType('CreateUploadSessionRequest', (_message.Message,), {
+  'DESCRIPTOR' : _CREATEUPLOADSESSIONREQUEST,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.CreateUploadSessionRequest)
+  })
+_sym_db.RegisterMessage(CreateUploadSessionRequest)
+
+GetUploadSessionRequest = _reflection.GeneratedProtocolMessageType('GetUploadSessionRequest', (_message.Message,), {
+  'DESCRIPTOR' : _GETUPLOADSESSIONREQUEST,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.GetUploadSessionRequest)
+  })
+_sym_db.RegisterMessage(GetUploadSessionRequest)
+
+UploadSession = _reflection.GeneratedProtocolMessageType('UploadSession', (_message.Message,), {
+  'DESCRIPTOR' : _UPLOADSESSION,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.UploadSession)
+  })
+_sym_db.RegisterMessage(UploadSession)
+
+UploadPart = _reflection.GeneratedProtocolMessageType('UploadPart', (_message.Message,), {
+  'DESCRIPTOR' : _UPLOADPART,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.UploadPart)
+  })
+_sym_db.RegisterMessage(UploadPart)
+
+ComposeUploadSessionRequest = _reflection.GeneratedProtocolMessageType('ComposeUploadSessionRequest', (_message.Message,), {
+  'DESCRIPTOR' : _COMPOSEUPLOADSESSIONREQUEST,
+  '__module__' : 'example_pb2'
+  # @@protoc_insertion_point(class_scope:example.photoservice.ComposeUploadSessionRequest)
+  })
+_sym_db.RegisterMessage(ComposeUploadSessionRequest)
+
 
 
 _EXAMPLEPHOTOSERVICE = _descriptor.ServiceDescriptor(
@@ -553,8 +1174,8 @@ _EXAMPLEPHOTOSERVICE = _descriptor.ServiceDescriptor(
   file=DESCRIPTOR,
   index=0,
   serialized_options=None,
-  serialized_start=961,
-  serialized_end=1723,
+  serialized_start=2190,
+  serialized_end=3711,
   methods=[
   _descriptor.MethodDescriptor(
     name='CreateUser',
@@ -634,7 +1255,70 @@ _EXAMPLEPHOTOSERVICE = _descriptor.ServiceDescriptor(
     index=8,
     containing_service=None,
     input_type=_GETPHOTOREQUEST,
-    output_type=_PHOTO,
+    output_type=_PHOTORESULT,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='DownloadPhoto',
+    full_name='example.photoservice.ExamplePhotoService.DownloadPhoto',
+    index=9,
+    containing_service=None,
+    input_type=_DOWNLOADPHOTOREQUEST,
+    output_type=_PHOTODATABLOCK,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='BatchCreatePhotos',
+    full_name='example.photoservice.ExamplePhotoService.BatchCreatePhotos',
+    index=10,
+    containing_service=None,
+    input_type=_BATCHCREATEPHOTOSREQUEST,
+    output_type=_BATCHCREATEPHOTOSRESPONSE,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='BatchGetPhotos',
+    full_name='example.photoservice.ExamplePhotoService.BatchGetPhotos',
+    index=11,
+    containing_service=None,
+    input_type=_BATCHGETPHOTOSREQUEST,
+    output_type=_BATCHGETPHOTOSRESPONSE,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='CreateUploadSession',
+    full_name='example.photoservice.ExamplePhotoService.CreateUploadSession',
+    index=12,
+    containing_service=None,
+    input_type=_CREATEUPLOADSESSIONREQUEST,
+    output_type=_UPLOADSESSION,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='GetUploadSession',
+    full_name='example.photoservice.ExamplePhotoService.GetUploadSession',
+    index=13,
+    containing_service=None,
+    input_type=_GETUPLOADSESSIONREQUEST,
+    output_type=_UPLOADSESSION,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='WriteUploadSession',
+    full_name='example.photoservice.ExamplePhotoService.WriteUploadSession',
+    index=14,
+    containing_service=None,
+    input_type=_PHOTODATABLOCK,
+    output_type=_UPLOADSESSION,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='ComposeUploadSession',
+    full_name='example.photoservice.ExamplePhotoService.ComposeUploadSession',
+    index=15,
+    containing_service=None,
+    input_type=_COMPOSEUPLOADSESSIONREQUEST,
+    output_type=_UPLOADSESSION,
     serialized_options=None,
   ),
 ])
@@ -1 +1,16 @@
-from . import error_handler
\ No newline at end of file
+from . import admission
+from . import compression
+from . import config
+from . import downloads
+from . import error_handler
+from . import interceptors
+from . import metrics
+from . import page_cache
+from . import page_token
+from . import pipeline
+from . import profiling
+from . import rate_limits
+from . import read_mask
+from . import thumbnails
+from . import upload_sessions
+from . import uploads
\ No newline at end of file
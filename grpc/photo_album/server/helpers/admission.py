@@ -0,0 +1,382 @@
+from concurrent import futures
+import asyncio
+import math
+import threading
+import time
+
+import grpc
+
+from .error_handler import throw_exception
+from .interceptors import replace_behavior
+from .metrics import status_code
+
+# Methods are limited by class, so that slow uploads cannot use up the
+# concurrency that cheap calls like GetUser need; methods not listed are
+# in the default class
+METHOD_CLASSES = {
+    'UploadPhoto': 'transfer',
+    'WriteUploadSession': 'transfer',
+    'ComposeUploadSession': 'transfer',
+    'DownloadPhoto': 'transfer',
+    'BatchCreatePhotos': 'batch',
+    'BatchGetPhotos': 'batch',
+    'StreamPhotos': 'batch'
+}
+DEFAULT_CLASS = 'default'
+# The initial, lowest and highest concurrency limit of each class
+LIMITS = {
+    'default': (20, 10, 200),
+    'batch': (8, 2, 50),
+    'transfer': (8, 2, 50)
+}
+# Calls that end with these codes suggest the server is overloaded
+OVERLOAD_CODES = (
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED
+)
+
+def parse_limits(value):
+    """Parses the highest concurrency limits of method classes.
+
+    Arguments:
+        value: A comma-separated list of class=limit pairs, e.g.
+            "default=100,transfer=20".
+
+    Returns:
+        limits (dict): The highest limit of each class name.
+    """
+    limits = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        name, _, limit = item.partition('=')
+        if name.strip() not in LIMITS:
+            raise ValueError('Unknown method class: {}.'.format(name))
+        limits[name.strip()] = int(limit)
+    return limits
+
+class GradientLimit(object):
+    """A concurrency limit that follows the latency of calls.
+       Calls are measured in windows of at least window seconds and
+       min_samples calls. After each window the limit is scaled by the
+       ratio of the long-term average latency to the window's: while
+       calls are as fast as usual it grows by about its square root, the
+       room a queue may take; once they slow down, because work is waiting
+       for threads, locks or the disk, it shrinks by up to half. Calls
+       that time out or are turned away downstream count as the worst
+       case. The limit only grows while at least half of it is used, so a
+       quiet period does not raise it past what was ever tested.
+    """
+    def __init__(self, initial, min_limit, max_limit, tolerance=2.0, smoothing=0.2,
+                 window=0.25, min_samples=10, long_window=40):
+        """Initializer.
+
+        Arguments:
+            initial: The limit to start with.
+            min_limit: The lowest the limit may go.
+            max_limit: The highest the limit may go.
+            tolerance: How much slower than the long-term average recent
+                calls may be before the limit shrinks.
+            smoothing: The weight of each update in the limit.
+            window: The shortest window, in seconds.
+            min_samples: The fewest calls in a window.
+            long_window: The number of windows the long-term latency
+                averages.
+
+        Returns:
+            None.
+        """
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.window = window
+        self.min_samples = min_samples
+        self.long_window = long_window
+        self.long_latency = None
+        self.start_window(time.monotonic())
+
+    def start_window(self, now):
+        self.window_start = now
+        self.samples = 0
+        self.latency_sum = 0.0
+        self.max_in_flight = 0
+        self.overloaded = False
+
+    def update(self, latency, in_flight, overloaded):
+        """Records a call that ended, and adjusts the limit at the end of
+           a window.
+
+        Arguments:
+            latency: The time the call took, in seconds.
+            in_flight: The number of calls running when it ended.
+            overloaded: Whether the call ended with a code that suggests
+                overload.
+
+        Returns:
+            None.
+        """
+        self.samples += 1
+        self.latency_sum += latency
+        self.max_in_flight = max(self.max_in_flight, in_flight)
+        self.overloaded = self.overloaded or overloaded
+        now = time.monotonic()
+        if self.samples < self.min_samples or now - self.window_start < self.window:
+            return
+
+        short_latency = self.latency_sum / self.samples
+        if self.long_latency is None:
+            self.long_latency = short_latency
+        else:
+            self.long_latency += (short_latency - self.long_latency) / self.long_window
+        # Lets the long-term average follow latency back down once a spell
+        # of slow calls is over
+        if self.long_latency > 2 * short_latency:
+            self.long_latency *= 0.95
+
+        if self.overloaded:
+            gradient = 0.5
+        else:
+            gradient = max(0.5, min(1.0, self.tolerance * self.long_latency / max(short_latency, 1e-9)))
+        if gradient < 1.0 or self.max_in_flight >= self.limit / 2:
+            target = self.limit * gradient + math.sqrt(self.limit)
+            limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+            self.limit = max(self.min_limit, min(self.max_limit, limit))
+        self.start_window(now)
+
+class Permit(object):
+    """A call's place under its class's limit."""
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.start = time.perf_counter()
+        self.released = False
+
+    def release(self, code=None):
+        """Gives the place back and, unless code is None, feeds the call's
+           latency to the limit. Later calls do nothing.
+        """
+        if not self.released:
+            self.released = True
+            self.limiter.release(self, code)
+
+class PermitPool(futures.ThreadPoolExecutor):
+    """Hands an admitted call to the server's thread pool and releases its
+       permit once gRPC's task for the call is done.
+       gRPC never runs the handler of a call cancelled while it waits for
+       a thread, but it still runs the task, so the permit is given back
+       either way. Nothing runs on this executor itself, which starts no
+       threads; it only exists so gRPC picks it through the behavior's
+       experimental_thread_pool.
+    """
+    def __init__(self, pool, permit):
+        super().__init__(max_workers=1)
+        self.pool = pool
+        self.permit = permit
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = self.pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda _: self.permit.release())
+        return future
+
+class ConcurrencyLimiter(object):
+    """Limits the calls of one method class that may run at once."""
+    def __init__(self, limit):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.in_flight = 0
+
+        self.admitted = 0
+        self.rejected = 0
+
+    def acquire(self):
+        """Admits a call if the class is under its limit.
+
+        Returns:
+            permit (Permit): The call's permit, to release when it ends;
+                None if the call is rejected.
+        """
+        with self.lock:
+            if self.in_flight >= int(self.limit.limit):
+                self.rejected += 1
+                return None
+            self.in_flight += 1
+            self.admitted += 1
+        return Permit(self)
+
+    def release(self, permit, code):
+        latency = time.perf_counter() - permit.start
+        with self.lock:
+            if code is not None:
+                self.limit.update(latency, self.in_flight, code in OVERLOAD_CODES)
+            self.in_flight -= 1
+
+    def stats(self):
+        """Returns the limiter's counters.
+
+        Returns:
+            stats (dict): The current limit, the calls running, and the
+                calls admitted and rejected so far.
+        """
+        with self.lock:
+            return {
+                'limit': int(self.limit.limit),
+                'in_flight': self.in_flight,
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
+
+class AdmissionControl(object):
+    """Rejects calls early with RESOURCE_EXHAUSTED once a method class has
+       as many calls running as its adaptive limit allows, rather than
+       letting them queue until their deadlines pass.
+    """
+    def __init__(self, max_limits=None):
+        """Initializer.
+
+        Arguments:
+            max_limits (dict): The highest limit of each class name, to
+                override LIMITS with.
+
+        Returns:
+            None.
+        """
+        self.limiters = {}
+        for name, (initial, min_limit, max_limit) in LIMITS.items():
+            max_limit = (max_limits or {}).get(name, max_limit)
+            self.limiters[name] = ConcurrencyLimiter(GradientLimit(
+                min(initial, max_limit), min(min_limit, max_limit), max_limit))
+
+    def limiter(self, method):
+        """Returns the limiter of a method, by its full name."""
+        name = method.rsplit('/', 1)[-1]
+        return self.limiters[METHOD_CLASSES.get(name, DEFAULT_CLASS)]
+
+def reject(context):
+    return throw_exception(
+        grpc_context=context,
+        code=grpc.StatusCode.RESOURCE_EXHAUSTED,
+        details='RESOURCE_EXHAUSTED: The server is overloaded; try again later.'
+    )
+
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    """Applies admission control to the RPCs of a thread pool server.
+       Calls are admitted as they arrive, before they wait for a thread,
+       so their latency includes any time spent queued. Rejections are
+       sent from a thread of their own rather than the server's pool, so
+       they do not wait behind the work they are meant to shed.
+    """
+    def __init__(self, admission, pool):
+        """Initializer.
+
+        Arguments:
+            admission (AdmissionControl): The limits to apply.
+            pool (futures.ThreadPoolExecutor): The server's thread pool,
+                which admitted calls run on.
+
+        Returns:
+            None.
+        """
+        self.admission = admission
+        self.pool = pool
+        self.reject_pool = futures.ThreadPoolExecutor(max_workers=1)
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        permit = self.admission.limiter(handler_call_details.method).acquire()
+        behavior = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+
+        if permit is None:
+            if handler.response_streaming:
+                def rejected_stream(request, context): #pylint: disable=unused-argument
+                    reject(context)
+                    return iter(())
+                wrapped = rejected_stream
+            else:
+                def rejected(request, context): #pylint: disable=unused-argument
+                    return reject(context)
+                wrapped = rejected
+            wrapped.experimental_thread_pool = self.reject_pool
+        elif handler.response_streaming:
+            def admitted_stream(request, context):
+                failed = True
+                try:
+                    yield from behavior(request, context)
+                    failed = False
+                finally:
+                    permit.release(status_code(context, failed, not context.is_active()))
+            wrapped = admitted_stream
+        else:
+            def admitted(request, context):
+                failed = True
+                try:
+                    response = behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    permit.release(status_code(context, failed, not context.is_active()))
+            wrapped = admitted
+        if permit is not None:
+            wrapped.experimental_thread_pool = PermitPool(self.pool, permit)
+
+        return replace_behavior(handler, wrapped)
+
+class AsyncAdmissionInterceptor(grpc.aio.ServerInterceptor):
+    """Applies admission control to the RPCs of an asyncio server.
+       Calls are admitted when their handler starts, which follows their
+       arrival with no queue in between, so the permit is released in the
+       same frame that takes it.
+    """
+    def __init__(self, admission):
+        self.admission = admission
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        limiter = self.admission.limiter(handler_call_details.method)
+        behavior = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+
+        if handler.response_streaming:
+            async def admitted_stream(request, context):
+                permit = limiter.acquire()
+                if permit is None:
+                    reject(context)
+                    return
+                code = None
+                try:
+                    async for response in behavior(request, context):
+                        yield response
+                    code = status_code(context, False, context.cancelled())
+                except asyncio.CancelledError:
+                    code = status_code(context, True, True)
+                    raise
+                except BaseException:
+                    code = status_code(context, True, context.cancelled())
+                    raise
+                finally:
+                    permit.release(code or grpc.StatusCode.UNKNOWN)
+            wrapped = admitted_stream
+        else:
+            async def admitted(request, context):
+                permit = limiter.acquire()
+                if permit is None:
+                    return reject(context)
+                code = None
+                try:
+                    response = await behavior(request, context)
+                    code = status_code(context, False, context.cancelled())
+                    return response
+                except asyncio.CancelledError:
+                    code = status_code(context, True, True)
+                    raise
+                except BaseException:
+                    code = status_code(context, True, context.cancelled())
+                    raise
+                finally:
+                    permit.release(code or grpc.StatusCode.UNKNOWN)
+            wrapped = admitted
+
+        return replace_behavior(handler, wrapped)
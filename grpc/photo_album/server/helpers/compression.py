@@ -0,0 +1,144 @@
+import zlib
+
+import grpc
+
+from .interceptors import replace_behavior
+
+ALGORITHMS = {
+    'gzip': grpc.Compression.Gzip,
+    'deflate': grpc.Compression.Deflate
+}
+# Messages smaller than this many bytes are sent uncompressed
+THRESHOLD = 1024
+# Data that level 1 deflate cannot shrink by a tenth, e.g. JPEG or PNG
+# image data, is not worth compressing again
+SAMPLE_SIZE = 4096
+MIN_SAVING = 0.1
+
+def parse_methods(value):
+    """Parses per-method compression settings.
+
+    Arguments:
+        value: A comma-separated list of method=algorithm pairs, e.g.
+            "ListPhotos=gzip,DownloadPhoto=deflate"; "*" stands for every
+            method not listed.
+
+    Returns:
+        methods (dict): The grpc.Compression of each method name.
+    """
+    methods = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        method, _, algorithm = item.partition('=')
+        if algorithm.strip() not in ALGORITHMS:
+            raise ValueError('Unknown compression algorithm: {}.'.format(algorithm))
+        methods[method.strip()] = ALGORITHMS[algorithm.strip()]
+    return methods
+
+def is_compressible(data):
+    """Checks whether compressing data would save space, by compressing a
+       sample of it. The sample is taken from the middle, as file headers,
+       e.g. JPEG's metadata and tables, compress well even when the rest
+       does not.
+
+    Arguments:
+        data: A bytes-like object.
+
+    Returns:
+        A bool.
+    """
+    start = max(0, len(data) // 2 - SAMPLE_SIZE // 2)
+    sample = bytes(data[start:start + SAMPLE_SIZE])
+    return len(zlib.compress(sample, 1)) < len(sample) * (1 - MIN_SAVING)
+
+class StreamPolicy(object):
+    """Decides which messages of a response stream are compressed.
+       Messages below the threshold are sent raw. Whether the stream's data
+       compresses at all is judged once, from its first large message, so
+       a stream of JPEG blocks skips compression after one sample.
+    """
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.compressible = None
+
+    def should_compress(self, message):
+        if message.ByteSize() < self.threshold:
+            return False
+        if self.compressible is None:
+            self.compressible = is_compressible(message.SerializeToString())
+        return self.compressible
+
+class CompressionInterceptor(grpc.ServerInterceptor):
+    """Compresses the responses of the configured methods of a thread pool
+       server.
+    """
+    def __init__(self, methods, threshold=THRESHOLD):
+        self.methods = methods
+        self.threshold = threshold
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        name = handler_call_details.method.rsplit('/', 1)[-1]
+        algorithm = self.methods.get(name, self.methods.get('*'))
+        if handler is None or algorithm is None:
+            return handler
+        threshold = self.threshold
+
+        if handler.response_streaming:
+            behavior = handler.unary_stream or handler.stream_stream
+
+            def compressed_stream(request, context):
+                context.set_compression(algorithm)
+                policy = StreamPolicy(threshold)
+                for response in behavior(request, context):
+                    if not policy.should_compress(response):
+                        context.disable_next_message_compression()
+                    yield response
+            return replace_behavior(handler, compressed_stream)
+
+        behavior = handler.unary_unary or handler.stream_unary
+
+        def compressed(request, context):
+            response = behavior(request, context)
+            if response.ByteSize() >= threshold:
+                context.set_compression(algorithm)
+            return response
+        return replace_behavior(handler, compressed)
+
+class AsyncCompressionInterceptor(grpc.aio.ServerInterceptor):
+    """Compresses the responses of the configured methods of an asyncio
+       server.
+    """
+    def __init__(self, methods, threshold=THRESHOLD):
+        self.methods = methods
+        self.threshold = threshold
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        name = handler_call_details.method.rsplit('/', 1)[-1]
+        algorithm = self.methods.get(name, self.methods.get('*'))
+        if handler is None or algorithm is None:
+            return handler
+        threshold = self.threshold
+
+        if handler.response_streaming:
+            behavior = handler.unary_stream or handler.stream_stream
+
+            async def compressed_stream(request, context):
+                context.set_compression(algorithm)
+                policy = StreamPolicy(threshold)
+                async for response in behavior(request, context):
+                    if not policy.should_compress(response):
+                        context.disable_next_message_compression()
+                    yield response
+            return replace_behavior(handler, compressed_stream)
+
+        behavior = handler.unary_unary or handler.stream_unary
+
+        async def compressed(request, context):
+            response = await behavior(request, context)
+            if response.ByteSize() >= threshold:
+                context.set_compression(algorithm)
+            return response
+        return replace_behavior(handler, compressed)
@@ -0,0 +1,246 @@
+import argparse
+import os
+
+from . import admission
+from . import compression
+from . import profiling
+from . import rate_limits
+from . import thumbnails
+
+def env_int(key, default):
+    value = os.environ.get(key)
+    return int(value) if value else default
+
+def env_float(key, default):
+    value = os.environ.get(key)
+    return float(value) if value else default
+
+def float_list(value):
+    """Parses a comma-separated list of numbers."""
+    return tuple(float(item) for item in value.split(',') if item.strip())
+
+def parse_args(args=None):
+    """Parses the server settings.
+       Each setting can be passed on the command line or set with an
+       environment variable; command-line flags take precedence.
+
+    Arguments:
+        args: The command-line arguments; defaults to sys.argv.
+
+    Returns:
+        settings (argparse.Namespace): The server settings.
+    """
+    parser = argparse.ArgumentParser(description='Runs the example photo service.')
+    parser.add_argument(
+        '--mode',
+        choices=('sync', 'async'),
+        default=os.environ.get('SERVER_MODE', 'sync'),
+        help='Serve RPCs from a thread pool (sync) or an asyncio event '
+             'loop (async) (env: SERVER_MODE).'
+    )
+    parser.add_argument(
+        '--storage',
+        choices=('memory', 'journal', 'sqlite'),
+        default=os.environ.get('STORAGE', 'memory'),
+        help='Keep users and photos in memory, in memory backed by a log '
+             'and snapshots, or in an SQLite database (env: STORAGE).'
+    )
+    parser.add_argument(
+        '--database',
+        default=os.environ.get('DATABASE', 'photos.db'),
+        help='Path of the SQLite database (env: DATABASE).'
+    )
+    parser.add_argument(
+        '--journal-dir',
+        default=os.environ.get('JOURNAL_DIR', 'journal'),
+        help='Directory of the mutation log and snapshots (env: JOURNAL_DIR).'
+    )
+    parser.add_argument(
+        '--snapshot-every',
+        type=int,
+        default=env_int('SNAPSHOT_EVERY', 1000000),
+        help='Number of logged mutations after which a snapshot is taken '
+             '(env: SNAPSHOT_EVERY).'
+    )
+    parser.add_argument(
+        '--host',
+        default=os.environ.get('HOST', '0.0.0.0'),
+        help='Address to listen at (env: HOST).'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=env_int('PORT', 8080),
+        help='Port to listen at (env: PORT).'
+    )
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=env_int('MAX_WORKERS', 10),
+        help='Number of threads serving RPCs, or running blocking work in '
+             'async mode (env: MAX_WORKERS).'
+    )
+    parser.add_argument(
+        '--max-concurrent-rpcs',
+        type=int,
+        default=env_int('MAX_CONCURRENT_RPCS', 0) or None,
+        help='RPCs accepted at once before new ones are rejected with '
+             'RESOURCE_EXHAUSTED; unlimited if unset (env: MAX_CONCURRENT_RPCS).'
+    )
+    parser.add_argument(
+        '--admission-control',
+        choices=('off', 'gradient'),
+        default=os.environ.get('ADMISSION_CONTROL', 'off'),
+        help='Reject RPCs with RESOURCE_EXHAUSTED once their method class '
+             'has as many running as a limit that adapts to latency '
+             '(gradient) (env: ADMISSION_CONTROL).'
+    )
+    parser.add_argument(
+        '--admission-max-limits',
+        type=admission.parse_limits,
+        default=os.environ.get('ADMISSION_MAX_LIMITS', ''),
+        help='Comma-separated class=limit pairs capping the concurrency '
+             'limits of the default, batch and transfer method classes, '
+             'e.g. "transfer=20" (env: ADMISSION_MAX_LIMITS).'
+    )
+    parser.add_argument(
+        '--rate-limits',
+        type=rate_limits.parse_limits,
+        default=os.environ.get('RATE_LIMITS', ''),
+        help='Comma-separated method=rate[/burst] pairs limiting the '
+             'requests per second each user may send to a method, e.g. '
+             '"CreatePhoto=5/20,ListPhotos=20"; requests over the limit '
+             'are rejected with RESOURCE_EXHAUSTED (env: RATE_LIMITS).'
+    )
+    parser.add_argument(
+        '--rate-limit-buckets',
+        type=int,
+        default=env_int('RATE_LIMIT_BUCKETS', rate_limits.MAX_BUCKETS),
+        help='Most users whose rate limit state is kept per method; idle '
+             'users are forgotten sooner (env: RATE_LIMIT_BUCKETS).'
+    )
+    parser.add_argument(
+        '--max-message-size',
+        type=int,
+        default=env_int('MAX_MESSAGE_SIZE', 4 * 1024 * 1024),
+        help='Largest message, in bytes, the server sends or receives '
+             '(env: MAX_MESSAGE_SIZE).'
+    )
+    parser.add_argument(
+        '--keepalive-time',
+        type=float,
+        default=env_float('KEEPALIVE_TIME', 60.0),
+        help='Seconds between pings the server sends on each connection; '
+             'calls on connections that stop answering are cancelled, so '
+             'their handlers do not wait for data that never comes '
+             '(env: KEEPALIVE_TIME).'
+    )
+    parser.add_argument(
+        '--keepalive-timeout',
+        type=float,
+        default=env_float('KEEPALIVE_TIMEOUT', 20.0),
+        help='Seconds to wait for a ping to be answered before closing the '
+             'connection (env: KEEPALIVE_TIMEOUT).'
+    )
+    parser.add_argument(
+        '--stream-window',
+        type=int,
+        default=env_int('STREAM_WINDOW', 16),
+        help='Number of photos a pipelined StreamPhotos call resolves at '
+             'once (env: STREAM_WINDOW).'
+    )
+    parser.add_argument(
+        '--page-cache-bytes',
+        type=int,
+        default=env_int('PAGE_CACHE_BYTES', 8 * 1024 * 1024),
+        help='Size of the ListPhotos page cache, in bytes; 0 disables it '
+             '(env: PAGE_CACHE_BYTES).'
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        default=env_int('METRICS_PORT', 0),
+        help='Port to serve Prometheus metrics at, under /metrics; metrics '
+             'are not collected if unset (env: METRICS_PORT).'
+    )
+    parser.add_argument(
+        '--metrics-host',
+        default=os.environ.get('METRICS_HOST', '127.0.0.1'),
+        help='Address to serve metrics at (env: METRICS_HOST).'
+    )
+    parser.add_argument(
+        '--metrics-buckets',
+        type=float_list,
+        default=os.environ.get('METRICS_BUCKETS'),
+        help='Comma-separated upper bounds, in seconds, of the RPC latency '
+             'histogram buckets (env: METRICS_BUCKETS).'
+    )
+    parser.add_argument(
+        '--compression',
+        type=compression.parse_methods,
+        default=os.environ.get('COMPRESSION', ''),
+        help='Comma-separated method=gzip|deflate pairs naming the methods '
+             'whose responses are compressed, e.g. "ListPhotos=gzip"; "*" '
+             'matches every other method (env: COMPRESSION).'
+    )
+    parser.add_argument(
+        '--compression-threshold',
+        type=int,
+        default=env_int('COMPRESSION_THRESHOLD', compression.THRESHOLD),
+        help='Size, in bytes, below which responses are sent uncompressed '
+             '(env: COMPRESSION_THRESHOLD).'
+    )
+    parser.add_argument(
+        '--thumbnail-workers',
+        type=int,
+        default=env_int('THUMBNAIL_WORKERS', thumbnails.WORKERS),
+        help='Number of processes making thumbnails of uploaded images; 0 '
+             'disables thumbnails, as does a missing Pillow package '
+             '(env: THUMBNAIL_WORKERS).'
+    )
+    parser.add_argument(
+        '--thumbnail-backlog',
+        type=int,
+        default=env_int('THUMBNAIL_BACKLOG', thumbnails.BACKLOG),
+        help='Most uploads that may be waiting for thumbnails; further '
+             'uploads are rejected with RESOURCE_EXHAUSTED '
+             '(env: THUMBNAIL_BACKLOG).'
+    )
+    parser.add_argument(
+        '--profile-rate',
+        type=float,
+        default=env_float('PROFILE_RATE', 0.0),
+        help='Fraction of RPCs to run under cProfile, from 0 to 1; sync mode '
+             'only (env: PROFILE_RATE).'
+    )
+    parser.add_argument(
+        '--profile-token',
+        default=os.environ.get('PROFILE_TOKEN'),
+        help='Token that trusted callers send in the {} metadata to have '
+             'their RPC profiled (env: PROFILE_TOKEN).'.format(profiling.TOKEN_KEY)
+    )
+    parser.add_argument(
+        '--profile-max-per-second',
+        type=float,
+        default=env_float('PROFILE_MAX_PER_SECOND', profiling.MAX_PER_SECOND),
+        help='Most RPCs profiled per second (env: PROFILE_MAX_PER_SECOND).'
+    )
+    parser.add_argument(
+        '--profile-dir',
+        default=os.environ.get('PROFILE_DIR', profiling.PROFILE_DIR),
+        help='Directory that per-method profiles are written to on SIGUSR1 '
+             '(env: PROFILE_DIR).'
+    )
+    return parser.parse_args(args)
+
+def server_options(settings):
+    """Returns the gRPC channel options for the given settings."""
+    return [
+        ('grpc.max_send_message_length', settings.max_message_size),
+        ('grpc.max_receive_message_length', settings.max_message_size),
+        ('grpc.keepalive_time_ms', int(settings.keepalive_time * 1000)),
+        ('grpc.keepalive_timeout_ms', int(settings.keepalive_timeout * 1000)),
+        # Newer gRPC releases time out unanswered pings with this setting
+        # instead
+        ('grpc.http2.ping_timeout_ms', int(settings.keepalive_timeout * 1000))
+    ]
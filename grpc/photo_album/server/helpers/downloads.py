@@ -0,0 +1,42 @@
+import hashlib
+import mmap
+
+from codegen import example_pb2
+
+# The size, in bytes, of the data blocks sent to clients
+BLOCK_SIZE = 64 * 1024
+
+def read_blocks(name, path, data_hash, block_size=BLOCK_SIZE):
+    """Reads a saved image as a series of data blocks.
+       The file is memory-mapped and sliced with memoryviews, so only one
+       block at a time is copied out of the page cache.
+
+    Arguments:
+        name: The resource name of the photo.
+        path: The path of the saved image.
+        data_hash: The md5 digest of the whole image.
+        block_size: The size of each block, in bytes.
+
+    Returns:
+        A generator of PhotoDataBlocks.
+    """
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            for loc in range(0, len(view), block_size):
+                with view[loc:loc + block_size] as data_block:
+                    yield example_pb2.PhotoDataBlock(
+                        name=name,
+                        data_block=data_block.tobytes(),
+                        data_block_hash=hashlib.new('md5', data_block).hexdigest(),
+                        data_hash=data_hash
+                    )
+
+def file_hash(path):
+    """Returns the md5 digest of a file, for files whose digest is not
+       stored, e.g. thumbnails.
+    """
+    with open(path, 'rb') as f:
+        data_hash = hashlib.md5()
+        for data_block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            data_hash.update(data_block)
+    return data_hash.hexdigest()
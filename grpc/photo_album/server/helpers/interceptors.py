@@ -0,0 +1,32 @@
+import grpc
+
+HANDLER_FACTORIES = {
+    (False, False): grpc.unary_unary_rpc_method_handler,
+    (False, True): grpc.unary_stream_rpc_method_handler,
+    (True, False): grpc.stream_unary_rpc_method_handler,
+    (True, True): grpc.stream_stream_rpc_method_handler
+}
+
+def keep_thread_pool(handler, behavior):
+    """Copies the thread pool a handler's behavior asked gRPC to run it
+       on, if any, to a behavior that wraps it, since gRPC only looks at
+       the outermost behavior.
+    """
+    inner = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+    pool = getattr(inner, 'experimental_thread_pool', None)
+    if pool is not None and not hasattr(behavior, 'experimental_thread_pool'):
+        behavior.experimental_thread_pool = pool
+    return behavior
+
+def replace_behavior(handler, behavior):
+    """Rebuilds a method handler around a new behavior, keeping its kind,
+       serializers and thread pool. Interceptors use it to wrap a method's
+       behavior.
+    """
+    keep_thread_pool(handler, behavior)
+    factory = HANDLER_FACTORIES[(handler.request_streaming, handler.response_streaming)]
+    return factory(
+        behavior,
+        request_deserializer=handler.request_deserializer,
+        response_serializer=handler.response_serializer
+    )
@@ -0,0 +1,327 @@
+import asyncio
+import bisect
+import http.server
+import threading
+import time
+
+import grpc
+
+from .interceptors import HANDLER_FACTORIES, keep_thread_pool
+
+# Upper bounds, in seconds, of the RPC latency histogram buckets
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+STATUS_CODES = {code.value[0]: code for code in grpc.StatusCode}
+
+class Metrics(object):
+    """Collects per-method RPC metrics and renders them in the Prometheus
+       text format.
+       Methods are keyed by their full name, e.g.
+       /example.photoservice.ExamplePhotoService/GetPhoto. Every update
+       takes one short lock, so recording costs a few microseconds.
+    """
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+
+        self.started = {}
+        self.in_flight = {}
+        # Finished RPCs, keyed by method and status code name
+        self.handled = {}
+        # Latency histogram of each method: a count per bucket, the last
+        # for latencies above every bound, and the sum of all latencies
+        self.latency_counts = {}
+        self.latency_sums = {}
+        self.messages_received = {}
+        self.messages_sent = {}
+        self.bytes_received = {}
+        self.bytes_sent = {}
+        # (prefix, stats function, names of gauges) of other components
+        self.collectors = []
+
+    def start(self, method):
+        """Records the start of an RPC.
+
+        Returns:
+            The start time, to pass to finish().
+        """
+        with self.lock:
+            self.started[method] = self.started.get(method, 0) + 1
+            self.in_flight[method] = self.in_flight.get(method, 0) + 1
+        return time.perf_counter()
+
+    def finish(self, method, code, start):
+        """Records the end of an RPC.
+
+        Arguments:
+            method: The full name of the method.
+            code (grpc.StatusCode): The status the RPC ended with.
+            start: The start time returned by start().
+
+        Returns:
+            None.
+        """
+        elapsed = time.perf_counter() - start
+        bucket = bisect.bisect_left(self.buckets, elapsed)
+        with self.lock:
+            self.in_flight[method] -= 1
+            key = (method, code.name)
+            self.handled[key] = self.handled.get(key, 0) + 1
+            counts = self.latency_counts.get(method)
+            if counts is None:
+                counts = self.latency_counts[method] = [0] * (len(self.buckets) + 1)
+            counts[bucket] += 1
+            self.latency_sums[method] = self.latency_sums.get(method, 0) + elapsed
+
+    def received(self, method, size):
+        with self.lock:
+            self.messages_received[method] = self.messages_received.get(method, 0) + 1
+            self.bytes_received[method] = self.bytes_received.get(method, 0) + size
+
+    def sent(self, method, size):
+        with self.lock:
+            self.messages_sent[method] = self.messages_sent.get(method, 0) + 1
+            self.bytes_sent[method] = self.bytes_sent.get(method, 0) + size
+
+    def add_collector(self, prefix, stats, gauges=()):
+        """Exports the counters of another component.
+
+        Arguments:
+            prefix: The prefix of the exported metric names.
+            stats: A function returning a dict of counter and gauge values.
+            gauges: The keys of the dict that are gauges; other keys are
+                exported as counters.
+
+        Returns:
+            None.
+        """
+        self.collectors.append((prefix, stats, gauges))
+
+    def render(self):
+        """Renders all metrics in the Prometheus text exposition format.
+
+        Returns:
+            text (str): The metrics.
+        """
+        with self.lock:
+            started = dict(self.started)
+            in_flight = dict(self.in_flight)
+            handled = dict(self.handled)
+            latency_counts = {method: list(counts) for method, counts in self.latency_counts.items()}
+            latency_sums = dict(self.latency_sums)
+            per_method = (
+                ('grpc_server_msg_received_total', 'Messages received from clients.', dict(self.messages_received)),
+                ('grpc_server_msg_sent_total', 'Messages sent to clients.', dict(self.messages_sent)),
+                ('grpc_server_received_bytes_total', 'Serialized bytes received from clients.', dict(self.bytes_received)),
+                ('grpc_server_sent_bytes_total', 'Serialized bytes sent to clients.', dict(self.bytes_sent))
+            )
+
+        lines = []
+        add_family(lines, 'grpc_server_started_total', 'counter', 'RPCs started.',
+                   ((method_labels(method), value) for method, value in started.items()))
+        add_family(lines, 'grpc_server_handled_total', 'counter', 'RPCs finished, by status code.',
+                   ((method_labels(method, grpc_code=code), value) for (method, code), value in handled.items()))
+        add_family(lines, 'grpc_server_in_flight', 'gauge', 'RPCs being served.',
+                   ((method_labels(method), value) for method, value in in_flight.items()))
+        for name, help_text, values in per_method:
+            add_family(lines, name, 'counter', help_text,
+                       ((method_labels(method), value) for method, value in values.items()))
+
+        lines.append('# HELP grpc_server_handling_seconds Time taken to serve RPCs.')
+        lines.append('# TYPE grpc_server_handling_seconds histogram')
+        for method, counts in latency_counts.items():
+            labels = method_labels(method)
+            total = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                total += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append('grpc_server_handling_seconds_bucket{{{},le="{}"}} {}'.format(labels, le, total))
+            lines.append('grpc_server_handling_seconds_sum{{{}}} {!r}'.format(labels, latency_sums[method]))
+            lines.append('grpc_server_handling_seconds_count{{{}}} {}'.format(labels, total))
+
+        for prefix, stats, gauges in self.collectors:
+            for key, value in stats().items():
+                if key in gauges:
+                    add_family(lines, '{}_{}'.format(prefix, key), 'gauge', None, (('', value),))
+                else:
+                    add_family(lines, '{}_{}_total'.format(prefix, key), 'counter', None, (('', value),))
+
+        return '\n'.join(lines) + '\n'
+
+def method_labels(method, **extra):
+    service, _, name = method.lstrip('/').rpartition('/')
+    labels = 'grpc_service="{}",grpc_method="{}"'.format(service, name)
+    for key, value in extra.items():
+        labels += ',{}="{}"'.format(key, value)
+    return labels
+
+def add_family(lines, name, metric_type, help_text, samples):
+    if help_text:
+        lines.append('# HELP {} {}'.format(name, help_text))
+    lines.append('# TYPE {} {}'.format(name, metric_type))
+    for labels, value in samples:
+        lines.append('{}{{{}}} {}'.format(name, labels, value) if labels else '{} {}'.format(name, value))
+
+def status_code(context, failed, cancelled):
+    """Works out the status an RPC ended with.
+
+    Arguments:
+        context: The gRPC connection context.
+        failed: Whether the handler raised or was closed early.
+        cancelled: Whether the call was cancelled or has otherwise ended.
+
+    Returns:
+        code (grpc.StatusCode): The status code.
+    """
+    code = context.code()
+    if code is not None:
+        # The asyncio server reports codes as integers
+        return STATUS_CODES.get(code, code)
+    remaining = context.time_remaining()
+    if remaining is not None and remaining <= 0:
+        return grpc.StatusCode.DEADLINE_EXCEEDED
+    if cancelled:
+        return grpc.StatusCode.CANCELLED
+    if failed:
+        return grpc.StatusCode.UNKNOWN
+    return grpc.StatusCode.OK
+
+def instrument(handler, method, metrics, wrap_behavior):
+    """Rebuilds a method handler so that its messages are counted and its
+       behavior is wrapped.
+    """
+    def deserialize(data):
+        metrics.received(method, len(data))
+        return handler.request_deserializer(data) if handler.request_deserializer else data
+
+    def serialize(message):
+        data = handler.response_serializer(message) if handler.response_serializer else message
+        metrics.sent(method, len(data))
+        return data
+
+    behavior = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+    factory = HANDLER_FACTORIES[(handler.request_streaming, handler.response_streaming)]
+    return factory(
+        keep_thread_pool(handler, wrap_behavior(behavior, handler.response_streaming)),
+        request_deserializer=deserialize,
+        response_serializer=serialize
+    )
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Records metrics for every RPC of a thread pool server."""
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+        metrics = self.metrics
+
+        def wrap_behavior(behavior, response_streaming):
+            if response_streaming:
+                def observed_stream(request, context):
+                    start = metrics.start(method)
+                    failed = True
+                    try:
+                        yield from behavior(request, context)
+                        failed = False
+                    finally:
+                        metrics.finish(method, status_code(context, failed, not context.is_active()), start)
+                return observed_stream
+
+            def observed(request, context):
+                start = metrics.start(method)
+                failed = True
+                try:
+                    response = behavior(request, context)
+                    failed = False
+                    return response
+                finally:
+                    metrics.finish(method, status_code(context, failed, not context.is_active()), start)
+            return observed
+
+        return instrument(handler, method, metrics, wrap_behavior)
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """Records metrics for every RPC of an asyncio server."""
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+        metrics = self.metrics
+
+        def wrap_behavior(behavior, response_streaming):
+            if response_streaming:
+                async def observed_stream(request, context):
+                    start = metrics.start(method)
+                    code = grpc.StatusCode.UNKNOWN
+                    try:
+                        async for response in behavior(request, context):
+                            yield response
+                        code = status_code(context, False, context.cancelled())
+                    except asyncio.CancelledError:
+                        code = status_code(context, True, True)
+                        raise
+                    except BaseException:
+                        code = status_code(context, True, context.cancelled())
+                        raise
+                    finally:
+                        metrics.finish(method, code, start)
+                return observed_stream
+
+            async def observed(request, context):
+                start = metrics.start(method)
+                code = grpc.StatusCode.UNKNOWN
+                try:
+                    response = await behavior(request, context)
+                    code = status_code(context, False, context.cancelled())
+                    return response
+                except asyncio.CancelledError:
+                    code = status_code(context, True, True)
+                    raise
+                except BaseException:
+                    code = status_code(context, True, context.cancelled())
+                    raise
+                finally:
+                    metrics.finish(method, code, start)
+            return observed
+
+        return instrument(handler, method, metrics, wrap_behavior)
+
+def serve_http(metrics, host, port):
+    """Serves the metrics at /metrics over HTTP from a background thread.
+
+    Arguments:
+        metrics (Metrics): The metrics to serve.
+        host: The address to listen at.
+        port: The port to listen at.
+
+    Returns:
+        server (http.server.ThreadingHTTPServer): The running HTTP server.
+    """
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self): #pylint: disable=invalid-name
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args): #pylint: disable=redefined-builtin
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
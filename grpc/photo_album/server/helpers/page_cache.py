@@ -0,0 +1,105 @@
+import collections
+import threading
+
+class PageCache(object):
+    """Caches ListPhotos responses, keyed by the page they answer.
+       The cache holds at most max_bytes of serialized responses and evicts
+       the least recently used page first. Every user has a generation
+       number that changes whenever one of the user's photos is created or
+       deleted; a page computed under an older generation is never stored,
+       so a listing that raced with a write cannot outlive it.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        # Responses and their sizes, keyed by (parent, order, cursor, page
+        # size, read mask), from least to most recently used
+        self.entries = collections.OrderedDict()
+        # Keys of the cached pages of each user
+        self.keys_by_parent = {}
+        self.generations = {}
+        self.size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, parent):
+        """Returns the current generation of a user's photos. Read it before
+           listing photos and pass it to put().
+        """
+        return self.generations.get(parent, 0)
+
+    def get(self, key):
+        """Returns the cached response for a page, or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, response, generation):
+        """Caches the response for a page.
+
+        Arguments:
+            key (tuple): The page, as (parent, order, cursor, page size,
+                read mask paths).
+            response (ListPhotosResponse): The response. It must not be
+                modified afterwards.
+            generation: The generation of the user's photos the response
+                was computed under.
+
+        Returns:
+            None.
+        """
+        size = response.ByteSize()
+        if size > self.max_bytes:
+            return
+        parent = key[0]
+        with self.lock:
+            if self.generations.get(parent, 0) != generation or key in self.entries:
+                return
+            self.entries[key] = (response, size)
+            self.keys_by_parent.setdefault(parent, set()).add(key)
+            self.size += size
+            while self.size > self.max_bytes:
+                self.remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def invalidate(self, parent):
+        """Drops the cached pages of a user after its photos change."""
+        with self.lock:
+            self.generations[parent] = self.generations.get(parent, 0) + 1
+            for key in list(self.keys_by_parent.get(parent, ())):
+                self.remove(key)
+                self.invalidations += 1
+
+    def remove(self, key):
+        # Callers hold self.lock
+        _, size = self.entries.pop(key)
+        self.size -= size
+        parent_keys = self.keys_by_parent[key[0]]
+        parent_keys.discard(key)
+        if not parent_keys:
+            del self.keys_by_parent[key[0]]
+
+    def stats(self):
+        """Returns the cache's counters.
+
+        Returns:
+            stats (dict): Hits, misses, evictions and invalidations so far,
+                and the number of pages and bytes currently cached.
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self.entries),
+                'bytes': self.size
+            }
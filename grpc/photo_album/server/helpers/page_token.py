@@ -0,0 +1,53 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+
+# Replicas must share the same secret to accept each other's page tokens.
+# Without one, tokens are only valid until the server restarts.
+SECRET = os.environ.get('PAGE_TOKEN_SECRET', '').encode() or os.urandom(32)
+SIGNATURE_SIZE = 16
+
+def encode(token_context):
+    """Encodes a token context as an opaque, signed page token.
+
+    Arguments:
+        token_context (dict): The listing the token continues, i.e. its
+            parent, order, page size and the sort key of the last photo
+            returned.
+
+    Returns:
+        token (str): A URL-safe page token.
+    """
+    payload = json.dumps(token_context, separators=(',', ':')).encode()
+    signature = hmac.new(SECRET, payload, hashlib.sha256).digest()[:SIGNATURE_SIZE]
+    return base64.urlsafe_b64encode(signature + payload).decode().rstrip('=')
+
+def decode(token):
+    """Decodes a page token.
+
+    Arguments:
+        token (str): A page token created by encode().
+
+    Returns:
+        token_context (dict): The token context, or None if the token is
+            malformed or its signature does not match.
+    """
+    try:
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (binascii.Error, ValueError):
+        return None
+
+    signature, payload = data[:SIGNATURE_SIZE], data[SIGNATURE_SIZE:]
+    expected = hmac.new(SECRET, payload, hashlib.sha256).digest()[:SIGNATURE_SIZE]
+    if not hmac.compare_digest(signature, expected):
+        return None
+
+    try:
+        token_context = json.loads(payload)
+    except ValueError:
+        return None
+    token_context['start_after'] = tuple(token_context['start_after'])
+    return token_context
@@ -0,0 +1,117 @@
+import asyncio
+import queue
+import threading
+
+# Stands in for the result of an item dropped by ordered_map
+SKIPPED = object()
+
+def ordered_map(func, iterable, executor, window, cancelled=None):
+    """Applies a function to the items of an iterable concurrently and
+       yields the results in input order.
+       A separate thread reads the iterable, so results are yielded as soon
+       as they are ready even when the producer waits for them before
+       sending more items. At most `window` items are in flight at a time.
+       An error raised by the iterable, e.g. when a call is cancelled, is
+       raised again once the results before it are yielded. If the
+       generator is closed early, or once cancelled() returns True, items
+       not yet started are dropped and yield nothing.
+
+    Arguments:
+        func: The function to apply.
+        iterable: The items, e.g. a gRPC request iterator.
+        executor (concurrent.futures.Executor): Runs the function.
+        window: The maximum number of items in flight.
+        cancelled: A function that returns True once the results are no
+            longer wanted, e.g. when a call is cancelled.
+
+    Returns:
+        A generator of results.
+    """
+    pending = queue.Queue()
+    slots = threading.Semaphore(window)
+    stopped = threading.Event()
+    errors = []
+
+    def apply(item):
+        if cancelled and cancelled():
+            return SKIPPED
+        return func(item)
+
+    def read():
+        try:
+            for item in iterable:
+                while not slots.acquire(timeout=0.1):
+                    if stopped.is_set():
+                        return
+                future = executor.submit(apply, item)
+                pending.put(future)
+                if stopped.is_set():
+                    future.cancel()
+                    return
+        except Exception as err: #pylint: disable=broad-except
+            errors.append(err)
+        finally:
+            pending.put(None)
+
+    threading.Thread(target=read, daemon=True).start()
+    try:
+        while True:
+            future = pending.get()
+            if future is None:
+                break
+            result = future.result()
+            slots.release()
+            if result is not SKIPPED:
+                yield result
+        if errors:
+            raise errors[0]
+    finally:
+        stopped.set()
+        # Frees the executor from work whose results no one will read
+        while True:
+            try:
+                future = pending.get_nowait()
+            except queue.Empty:
+                break
+            if future is not None:
+                future.cancel()
+
+async def async_ordered_map(func, aiterable, window):
+    """Awaits a coroutine function on the items of an async iterable
+       concurrently and yields the results in input order; see ordered_map.
+
+    Arguments:
+        func: The coroutine function to apply.
+        aiterable: The items, e.g. a gRPC request iterator.
+        window: The maximum number of items in flight.
+
+    Returns:
+        An async generator of results.
+    """
+    pending = asyncio.Queue()
+    slots = asyncio.Semaphore(window)
+
+    async def read():
+        try:
+            async for item in aiterable:
+                await slots.acquire()
+                pending.put_nowait(asyncio.ensure_future(func(item)))
+        finally:
+            pending.put_nowait(None)
+
+    reader = asyncio.ensure_future(read())
+    try:
+        while True:
+            task = await pending.get()
+            if task is None:
+                break
+            result = await task
+            slots.release()
+            yield result
+        await reader
+    finally:
+        reader.cancel()
+        while not pending.empty():
+            task = pending.get_nowait()
+            if task is not None:
+                task.cancel()
@@ -0,0 +1,224 @@
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import threading
+import time
+
+import grpc
+
+from .interceptors import replace_behavior
+
+# Trusted callers send the configured token under this metadata key to
+# have their RPC profiled
+TOKEN_KEY = 'x-profile-token'
+PROFILE_DIR = 'profiles'
+# The most RPCs profiled per second, whether sampled or requested
+MAX_PER_SECOND = 1.0
+# Stacks deeper than this, or worth less than a microsecond, are left out
+# of collapsed stacks
+MAX_STACK_DEPTH = 64
+MIN_STACK_MICROSECONDS = 1
+
+def function_label(func):
+    filename, line, name = func
+    if filename == '~':
+        # Built-in functions, e.g. <built-in method time.sleep>
+        return name
+    return '{} ({}:{})'.format(name, os.path.basename(filename), line)
+
+def collapse(stats):
+    """Converts profile statistics to collapsed stacks, the input format of
+       flame graph tools: one "caller;callee;... microseconds" line per
+       stack.
+       cProfile records calls between pairs of functions, not whole
+       stacks, so a function's time is split between the stacks leading
+       to it in proportion to the time each caller spent in it.
+
+    Arguments:
+        stats (pstats.Stats): The statistics.
+
+    Returns:
+        lines (list): The collapsed stacks, heaviest first.
+    """
+    entries = stats.stats #pylint: disable=no-member
+    callees = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    weights = {}
+
+    def walk(func, stack, fraction):
+        _, _, own_time, total_time, _ = entries[func]
+        if own_time * fraction * 1e6 >= MIN_STACK_MICROSECONDS:
+            key = ';'.join(function_label(frame) for frame in stack)
+            weights[key] = weights.get(key, 0) + own_time * fraction
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, ()):
+            callee_time = entries[callee][3]
+            if callee in stack or not callee_time:
+                continue
+            callee_fraction = fraction * min(1.0, edge_time / callee_time)
+            if callee_time * callee_fraction * 1e6 >= MIN_STACK_MICROSECONDS:
+                walk(callee, stack + [callee], callee_fraction)
+
+    for func, (_, _, _, _, callers) in entries.items():
+        if not callers:
+            walk(func, [func], 1.0)
+    return ['{} {}'.format(stack, round(weight * 1e6))
+            for stack, weight in sorted(weights.items(), key=lambda item: -item[1])]
+
+class Profiler(object):
+    """Runs a sample of RPCs under cProfile and aggregates their statistics
+       by method.
+       A fraction of all RPCs is sampled, and trusted callers may ask for
+       their RPC to be profiled by sending the configured token. Either
+       way, at most one RPC is profiled at a time and at most
+       max_per_second are profiled per second, which bounds the overhead
+       no matter the load; RPCs over the budget run unprofiled.
+    """
+    def __init__(self, rate=0.0, token=None, max_per_second=MAX_PER_SECOND, directory=PROFILE_DIR):
+        """Initializer.
+
+        Arguments:
+            rate: The fraction of RPCs to sample, from 0 to 1.
+            token: The token trusted callers send under TOKEN_KEY to have
+                their RPC profiled; None if callers cannot ask.
+            max_per_second: The most RPCs profiled per second.
+            directory: Where dump() writes the statistics.
+
+        Returns:
+            None.
+        """
+        self.rate = rate
+        self.token = token
+        self.interval = 1 / max_per_second
+        self.directory = directory
+        self.lock = threading.Lock()
+        # Held while an RPC is profiled
+        self.active = threading.Lock()
+        self.last_started = -self.interval
+        # pstats.Stats of each method, by its full name
+        self.method_stats = {}
+
+        self.profiled = 0
+        self.skipped = 0
+
+    def requested(self, context):
+        if not self.token:
+            return False
+        for key, value in context.invocation_metadata():
+            if key == TOKEN_KEY:
+                return hmac.compare_digest(value.encode(), self.token.encode())
+        return False
+
+    def start(self, context):
+        """Starts profiling an RPC if it is sampled or requested and the
+           budget allows it.
+
+        Returns:
+            profile (cProfile.Profile): The running profile, to pass to
+                finish(); None if the RPC is not profiled.
+        """
+        if not (self.rate and random.random() < self.rate) and not self.requested(context):
+            return None
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_started < self.interval or not self.active.acquire(blocking=False):
+                self.skipped += 1
+                return None
+            self.last_started = now
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is running in this process
+            self.active.release()
+            return None
+        return profile
+
+    def finish(self, method, profile):
+        """Stops profiling an RPC and adds its statistics to its method's."""
+        profile.disable()
+        self.active.release()
+        with self.lock:
+            if method in self.method_stats:
+                self.method_stats[method].add(profile)
+            else:
+                self.method_stats[method] = pstats.Stats(profile)
+            self.profiled += 1
+
+    def dump(self):
+        """Writes the statistics of each profiled method, e.g.
+           GetPhoto.pstats, for pstats and snakeviz, and
+           GetPhoto.collapsed, for flame graph tools.
+
+        Returns:
+            paths (list): The paths of the written files.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        paths = []
+        with self.lock:
+            for method, stats in self.method_stats.items():
+                root = os.path.join(self.directory, method.rsplit('/', 1)[-1])
+                stats.dump_stats(root + '.pstats')
+                with open(root + '.collapsed', 'w') as f:
+                    f.writelines(line + '\n' for line in collapse(stats))
+                paths.extend((root + '.pstats', root + '.collapsed'))
+        return paths
+
+    def stats(self):
+        """Returns the profiler's counters.
+
+        Returns:
+            stats (dict): The RPCs profiled and the sampled or requested
+                RPCs skipped over the budget, so far.
+        """
+        with self.lock:
+            return {
+                'profiled': self.profiled,
+                'skipped': self.skipped
+            }
+
+class ProfilingInterceptor(grpc.ServerInterceptor):
+    """Profiles a sample of the RPCs of a thread pool server.
+       Each RPC runs on a single thread, which is the one cProfile
+       observes, so a profile covers the RPC's own work only.
+    """
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+        profiler = self.profiler
+        behavior = handler.unary_unary or handler.unary_stream or handler.stream_unary or handler.stream_stream
+
+        if handler.response_streaming:
+            def profiled_stream(request, context):
+                profile = profiler.start(context)
+                if profile is None:
+                    yield from behavior(request, context)
+                    return
+                try:
+                    yield from behavior(request, context)
+                finally:
+                    profiler.finish(method, profile)
+            wrapped = profiled_stream
+        else:
+            def profiled(request, context):
+                profile = profiler.start(context)
+                if profile is None:
+                    return behavior(request, context)
+                try:
+                    return behavior(request, context)
+                finally:
+                    profiler.finish(method, profile)
+            wrapped = profiled
+
+        return replace_behavior(handler, wrapped)
@@ -0,0 +1,48 @@
+def make_trimmer(mask, message_class):
+    """Prepares a read mask for applying to many messages.
+       Trimmed messages are built field by field from the stored ones, so
+       only the fields the mask selects are copied. Masks with nested
+       paths, e.g. "created_at.seconds", fall back to FieldMask.MergeMessage.
+       Raises ValueError if the mask names a field the messages do not have.
+
+    Arguments:
+        mask (FieldMask): The fields to keep.
+        message_class: The class of the messages to trim, e.g. Photo.
+
+    Returns:
+        trim: A function that returns a trimmed copy of a message, or None
+            if the mask is empty and messages are returned whole.
+    """
+    if not mask.paths:
+        return None
+    descriptor = message_class.DESCRIPTOR
+    if not mask.IsValidForDescriptor(descriptor):
+        raise ValueError('Read mask is invalid.')
+
+    if any('.' in path for path in mask.paths):
+        def trim_nested(message):
+            trimmed = message_class()
+            mask.MergeMessage(message, trimmed)
+            return trimmed
+        return trim_nested
+
+    scalar_fields = []
+    composite_fields = []
+    for path in set(mask.paths):
+        field = descriptor.fields_by_name[path]
+        if field.label == field.LABEL_REPEATED:
+            composite_fields.append((path, False))
+        elif field.message_type:
+            composite_fields.append((path, True))
+        else:
+            scalar_fields.append(path)
+
+    def trim(message):
+        trimmed = message_class()
+        for name in scalar_fields:
+            setattr(trimmed, name, getattr(message, name))
+        for name, singular in composite_fields:
+            if not singular or message.HasField(name):
+                getattr(trimmed, name).MergeFrom(getattr(message, name))
+        return trimmed
+    return trim
@@ -0,0 +1,191 @@
+from concurrent import futures
+import multiprocessing
+import os
+import threading
+import time
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# The longest edge, in pixels, of each thumbnail size
+SIZES = {
+    'small': 128,
+    'medium': 512
+}
+WORKERS = 2
+# The most uploads that may be waiting for or having thumbnails made
+BACKLOG = 64
+# How often, in seconds, workers check that the server is still running
+PARENT_CHECK_INTERVAL = 1
+
+def thumbnail_path(path, size):
+    """Returns the path of a thumbnail of a saved image; thumbnails are
+       stored beside the image, e.g. ab12.small.jpeg next to ab12.jpeg.
+    """
+    root, ext = os.path.splitext(path)
+    return '{}.{}{}'.format(root, size, ext)
+
+def has_thumbnails(path, sizes=SIZES):
+    return all(os.path.exists(thumbnail_path(path, size)) for size in sizes)
+
+def watch_parent(parent_pid):
+    """Makes a worker process exit once the server that started it is
+       gone. Workers are otherwise left behind when the server is killed,
+       as each of them keeps the task queue open.
+    """
+    def watch():
+        while os.getppid() == parent_pid:
+            time.sleep(PARENT_CHECK_INTERVAL)
+        os._exit(0) #pylint: disable=protected-access
+    threading.Thread(target=watch, daemon=True).start()
+
+def make_thumbnails(path, sizes=SIZES):
+    """Writes the thumbnails of a saved image. Runs in a worker process.
+       Images are stored by content, so thumbnails that already exist are
+       kept. Each thumbnail is written to a temporary file first and then
+       renamed, so a thumbnail is either complete or missing.
+
+    Arguments:
+        path: The path of the saved image.
+        sizes (dict): The longest edge, in pixels, of each thumbnail size.
+
+    Returns:
+        elapsed (float): The time taken, in seconds.
+    """
+    start = time.perf_counter()
+    with Image.open(path) as image:
+        image.load()
+        for size, edge in sizes.items():
+            target = thumbnail_path(path, size)
+            if os.path.exists(target):
+                continue
+            variant = image.copy()
+            variant.thumbnail((edge, edge))
+            temp_path = '{}.{}.part'.format(target, os.getpid())
+            variant.save(temp_path, format=image.format)
+            os.replace(temp_path, target)
+    return time.perf_counter() - start
+
+class ThumbnailPipeline(object):
+    """Makes thumbnails of uploaded images in a pool of worker processes.
+       Resizing is CPU-bound, so it runs outside the server's processes
+       and never holds up an RPC thread. The backlog is bounded: uploads
+       reserve a slot before they are accepted, and reserve() fails once
+       every slot is taken, which lets the server push back on clients
+       instead of queueing work without limit.
+    """
+    def __init__(self, on_done, workers=WORKERS, backlog=BACKLOG):
+        """Initializer.
+
+        Arguments:
+            on_done: A function called with the photo name, the image path
+                and whether the thumbnails were made, when a task ends.
+            workers: The number of worker processes.
+            backlog: The most tasks that may be reserved, queued or running.
+
+        Returns:
+            None.
+        """
+        self.on_done = on_done
+        self.workers = workers
+        self.backlog = backlog
+        # Worker processes are spawned rather than forked, as forking a
+        # process that runs gRPC threads is unsafe
+        self.executor = futures.ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=watch_parent,
+            initargs=(os.getpid(),)
+        )
+        self.slots = threading.BoundedSemaphore(backlog)
+        self.lock = threading.Lock()
+
+        # Slots taken, and tasks handed to the pool that have not ended
+        self.reserved = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.task_seconds = 0.0
+
+    def reserve(self, timeout=None):
+        """Takes a backlog slot for an upload, waiting up to timeout
+           seconds for one to free up.
+
+        Returns:
+            A bool; False if the backlog is full.
+        """
+        if not self.slots.acquire(timeout=timeout):
+            with self.lock:
+                self.rejected += 1
+            return False
+        with self.lock:
+            self.reserved += 1
+        return True
+
+    def release(self):
+        """Returns a reserved slot that will not be used."""
+        with self.lock:
+            self.reserved -= 1
+        self.slots.release()
+
+    def submit(self, name, path):
+        """Queues a task to make the thumbnails of an image, using a slot
+           taken with reserve().
+
+        Arguments:
+            name: The resource name of the photo.
+            path: The path of the saved image.
+
+        Returns:
+            None.
+        """
+        with self.lock:
+            self.submitted += 1
+        try:
+            future = self.executor.submit(make_thumbnails, path)
+        except RuntimeError:
+            # The pool is shut down or broken
+            self.finish(name, path, False, 0.0)
+            return
+        future.add_done_callback(lambda done: self.task_done(name, path, done))
+
+    def task_done(self, name, path, future):
+        try:
+            elapsed = future.result()
+        except Exception: #pylint: disable=broad-except
+            self.finish(name, path, False, 0.0)
+            return
+        self.finish(name, path, True, elapsed)
+
+    def finish(self, name, path, succeeded, elapsed):
+        with self.lock:
+            self.reserved -= 1
+            self.submitted -= 1
+            if succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.task_seconds += elapsed
+        self.slots.release()
+        self.on_done(name, path, succeeded)
+
+    def stats(self):
+        """Returns the pipeline's counters.
+
+        Returns:
+            stats (dict): The slots in use, the tasks waiting for a worker,
+                the tasks completed, failed and rejected so far, and the
+                time workers spent on tasks, in seconds.
+        """
+        with self.lock:
+            return {
+                'backlog': self.reserved,
+                'queue_depth': max(0, self.submitted - self.workers),
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'task_seconds': self.task_seconds
+            }
@@ -0,0 +1,472 @@
+import glob
+import hashlib
+import imghdr
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+import grpc
+
+from codegen import example_pb2
+from .uploads import PHOTO_DIR, UploadError
+
+SESSION_DIR = os.path.join(PHOTO_DIR, 'sessions')
+# Sessions not written to for this many seconds are discarded
+SESSION_TTL = 24 * 60 * 60
+# How often, in seconds, expired sessions are looked for
+EXPIRE_INTERVAL = 60
+# The most parts an image may be uploaded in
+MAX_PARTS = 64
+UPLOAD_ID_PATTERN = re.compile('[0-9a-f]{32}')
+READ_SIZE = 64 * 1024
+
+def read_file(path):
+    """Yields the content of a file in blocks."""
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(READ_SIZE), b'')
+
+def new_data(request, committed_offset, max_size):
+    """Verifies a data block written from a committed offset and returns
+       the part of it that is not stored yet. A block that starts past the
+       committed offset is rejected, as the bytes before it are missing.
+
+    Arguments:
+        request (PhotoDataBlock): The block.
+        committed_offset: The number of bytes stored so far.
+        max_size: The most bytes that may be stored.
+
+    Returns:
+        data (memoryview): The new bytes; empty if all are stored already.
+    """
+    data_block = request.data_block
+    if hashlib.new('md5', data_block).hexdigest() != request.data_block_hash:
+        raise UploadError(
+            grpc.StatusCode.DATA_LOSS, 'DATA_LOSS: Datablock is corrupted.')
+
+    skip = committed_offset - request.offset
+    if skip < 0:
+        raise UploadError(
+            grpc.StatusCode.OUT_OF_RANGE,
+            'OUT_OF_RANGE: Data must be written from offset {}.'.format(committed_offset))
+    data = memoryview(data_block)[skip:]
+    if committed_offset + len(data) > max_size:
+        raise UploadError(
+            grpc.StatusCode.OUT_OF_RANGE, 'OUT_OF_RANGE: Data exceeds the size of the image.')
+    return data
+
+class UploadPart(object):
+    """A numbered part of an image, written to its own file so that parts
+       can be uploaded at the same time over separate connections. Like a
+       session, a part's committed offset is the size of its file.
+    """
+    def __init__(self, path, part_number, max_size):
+        self.path = path
+        self.part_number = part_number
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.file = None
+        self.committed_offset = os.path.getsize(path) if os.path.exists(path) else 0
+        # The md5 digest of the committed bytes; rebuilt from the file when
+        # the part is resumed by another server process
+        self.hash = None
+
+    def open(self):
+        """Opens the part for writing. Callers hold self.lock."""
+        self.file = open(self.path, 'ab')
+        self.committed_offset = self.file.tell()
+        if self.hash is None:
+            self.hash = hashlib.md5()
+            for data_block in read_file(self.path):
+                self.hash.update(data_block)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+        self.lock.release()
+
+    def write(self, request):
+        """Verifies a data block of the part and stores its new bytes."""
+        data = new_data(request, self.committed_offset, self.max_size)
+        if not data:
+            return
+        self.file.write(data)
+        self.file.flush()
+        self.hash.update(data)
+        self.committed_offset += len(data)
+
+    def digest(self):
+        """Returns the md5 digest of the part. Callers hold self.lock."""
+        if self.hash is None:
+            self.hash = hashlib.md5()
+            for data_block in read_file(self.path):
+                self.hash.update(data_block)
+        return self.hash.hexdigest()
+
+    def to_message(self):
+        return example_pb2.UploadPart(part_number=self.part_number, size=self.committed_offset)
+
+class UploadSession(object):
+    """An upload that survives dropped connections.
+       Received blocks are appended to a file in the session directory and
+       flushed to the OS as they arrive, so the committed offset is simply
+       the size of the file, and a restarted server picks the session up
+       where it stopped. The session's details are kept beside the data in
+       a small JSON file.
+       The image is either written in order, by one connection at a time,
+       or in numbered parts, one connection per part, that are composed
+       into the image at the end.
+    """
+    def __init__(self, directory, upload_id, name, data_hash, size, complete=False):
+        self.upload_id = upload_id
+        self.name = name
+        self.data_hash = data_hash
+        self.size = size
+        self.complete = complete
+        self.path = os.path.join(directory, '{}.part'.format(upload_id))
+        self.info_path = os.path.join(directory, '{}.json'.format(upload_id))
+        self.lock = threading.Lock()
+        self.file = None
+        self.photo_format = None
+        # Kept up to date by writers from here on, under self.lock
+        if complete:
+            self.committed_offset = size
+        else:
+            self.committed_offset = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        # Digests of the committed bytes; rebuilt from the file when a
+        # session is resumed by another server process
+        self.hash = None
+        self.content_hash = None
+        # Parts keyed by part number, found on disk when the session loads
+        self.parts_lock = threading.Lock()
+        self.parts = {}
+        for part_path in glob.glob(self.part_path('*')):
+            part_number = int(part_path.rsplit('.', 2)[-2])
+            self.parts[part_number] = UploadPart(part_path, part_number, size)
+
+    def part_path(self, part_number):
+        root, ext = os.path.splitext(self.path)
+        return '{}.{}{}'.format(root, part_number, ext)
+
+    def part(self, part_number):
+        """Returns a part of the image, starting it if needed."""
+        if not 0 < part_number <= MAX_PARTS:
+            raise UploadError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                'INVALID_ARGUMENT: Part numbers must be between 1 and {}.'.format(MAX_PARTS))
+        with self.parts_lock:
+            part = self.parts.get(part_number)
+            if part is None:
+                part = self.parts[part_number] = UploadPart(
+                    self.part_path(part_number), part_number, self.size)
+            return part
+
+    def save_info(self):
+        info = {
+            'name': self.name,
+            'data_hash': self.data_hash,
+            'size': self.size,
+            'complete': self.complete
+        }
+        with open(self.info_path + '.tmp', 'w') as f:
+            json.dump(info, f)
+        os.replace(self.info_path + '.tmp', self.info_path)
+
+    def open(self):
+        """Opens the session for writing. Callers hold self.lock."""
+        self.file = open(self.path, 'ab')
+        self.committed_offset = self.file.tell()
+        if self.hash is None:
+            self.hash = hashlib.md5()
+            self.content_hash = hashlib.sha256()
+            for data_block in read_file(self.path):
+                self.hash.update(data_block)
+                self.content_hash.update(data_block)
+
+    def close(self):
+        """Closes the session's file and lets another connection write."""
+        if self.file:
+            self.file.close()
+            self.file = None
+        self.lock.release()
+
+    def write(self, request):
+        """Verifies a data block and stores the part of it that is not
+           stored yet.
+
+        Arguments:
+            request (PhotoDataBlock): A block of the image.
+
+        Returns:
+            None.
+        """
+        if self.parts:
+            raise UploadError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                'FAILED_PRECONDITION: Image is being written in parts.')
+        data = new_data(request, self.committed_offset, self.size)
+        if data:
+            self.append(data)
+
+    def append(self, data):
+        if self.committed_offset == 0:
+            # The first block carries the image header, so unsupported
+            # files are rejected before the rest of them is sent.
+            self.photo_format = imghdr.what('', bytes(data[:32]))
+            if not self.photo_format:
+                raise UploadError(
+                    grpc.StatusCode.FAILED_PRECONDITION,
+                    'FAILED_PRECONDITION: File type is not supported.')
+
+        self.file.write(data)
+        self.file.flush()
+        self.hash.update(data)
+        self.content_hash.update(data)
+        self.committed_offset += len(data)
+
+    def compose(self, parts):
+        """Writes the given parts, in order, into the image. Callers hold
+           self.lock. Every part must be fully written and match its
+           digest, and no part may be being written.
+
+        Arguments:
+            parts: UploadPart messages naming every part of the image, in
+                part number order, with their sizes and md5 digests.
+
+        Returns:
+            None.
+        """
+        if self.committed_offset:
+            raise UploadError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                'FAILED_PRECONDITION: Image was written without parts.')
+        part_numbers = [requested.part_number for requested in parts]
+        if not parts or part_numbers != sorted(set(part_numbers)):
+            raise UploadError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                'INVALID_ARGUMENT: Parts must be listed once each, in order.')
+        if sum(requested.size for requested in parts) != self.size:
+            raise UploadError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                'INVALID_ARGUMENT: Parts do not add up to the size of the image.')
+
+        with self.parts_lock:
+            stored_parts = [self.parts.get(part_number) for part_number in part_numbers]
+        if None in stored_parts:
+            raise UploadError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                'FAILED_PRECONDITION: Part {} was not written.'.format(
+                    part_numbers[stored_parts.index(None)]))
+
+        locked = []
+        try:
+            for part in stored_parts:
+                if not part.lock.acquire(blocking=False):
+                    raise UploadError(
+                        grpc.StatusCode.ABORTED,
+                        'ABORTED: Part {} is being written.'.format(part.part_number))
+                locked.append(part)
+            for requested, part in zip(parts, stored_parts):
+                if part.committed_offset != requested.size:
+                    raise UploadError(
+                        grpc.StatusCode.FAILED_PRECONDITION,
+                        'FAILED_PRECONDITION: Part {} is incomplete.'.format(part.part_number))
+                if part.digest() != requested.part_hash:
+                    raise UploadError(
+                        grpc.StatusCode.DATA_LOSS,
+                        'DATA_LOSS: Part {} is corrupted.'.format(part.part_number))
+            for part in stored_parts:
+                for data_block in read_file(part.path):
+                    self.append(data_block)
+        except Exception:
+            # Drops what was composed, so parts can be fixed and composed again
+            self.file.truncate(0)
+            self.file.seek(0)
+            self.committed_offset = 0
+            self.hash = hashlib.md5()
+            self.content_hash = hashlib.sha256()
+            raise
+        finally:
+            for part in locked:
+                part.lock.release()
+
+    def commit(self):
+        """Verifies the whole image and closes the session's file, which
+           is then ready to be moved into storage.
+
+        Returns:
+            digest (str): The SHA-256 digest of the image.
+        """
+        if self.photo_format is None:
+            self.photo_format = imghdr.what(self.path)
+            if not self.photo_format:
+                raise UploadError(
+                    grpc.StatusCode.FAILED_PRECONDITION,
+                    'FAILED_PRECONDITION: File type is not supported.')
+        if self.hash.hexdigest() != self.data_hash:
+            raise UploadError(
+                grpc.StatusCode.DATA_LOSS, 'DATA_LOSS: Data is corrupted.')
+
+        self.file.close()
+        return self.content_hash.hexdigest()
+
+    def to_message(self):
+        with self.parts_lock:
+            parts = [self.parts[part_number].to_message() for part_number in sorted(self.parts)]
+        return example_pb2.UploadSession(
+            upload_id=self.upload_id,
+            name=self.name,
+            size=self.size,
+            committed_offset=self.committed_offset,
+            complete=self.complete,
+            parts=parts
+        )
+
+class UploadSessions(object):
+    """Creates, finds and expires upload sessions.
+       Sessions are loaded from the session directory on first use, so
+       uploads can be resumed across server restarts.
+    """
+    def __init__(self, directory=SESSION_DIR, ttl=SESSION_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.expired_at = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def create(self, name, data_hash, size):
+        """Starts an upload session.
+
+        Arguments:
+            name: The resource name of the photo.
+            data_hash: The md5 digest of the whole image.
+            size: The size of the image, in bytes.
+
+        Returns:
+            session (UploadSession): The new session.
+        """
+        self.expire()
+        session = UploadSession(self.directory, uuid.uuid4().hex, name, data_hash, size)
+        session.save_info()
+        open(session.path, 'wb').close()
+        with self.lock:
+            self.sessions[session.upload_id] = session
+        return session
+
+    def get(self, upload_id):
+        """Returns the session with the given ID, or None if it does not
+           exist or has expired.
+        """
+        if not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+            return None
+        with self.lock:
+            session = self.sessions.get(upload_id)
+            if session is None:
+                session = self.load(upload_id)
+            return session
+
+    def load(self, upload_id):
+        # Callers hold self.lock
+        info_path = os.path.join(self.directory, '{}.json'.format(upload_id))
+        try:
+            with open(info_path) as f:
+                info = json.load(f)
+        except (OSError, ValueError):
+            return None
+        session = UploadSession(
+            self.directory, upload_id, info['name'], info['data_hash'], info['size'], info['complete'])
+        self.sessions[upload_id] = session
+        return session
+
+    def open(self, upload_id, part_number=0):
+        """Opens a session, or one part of it, for writing. Call close() on
+           the returned writer when done. Raises UploadError if the session
+           does not exist or is complete, if the writer is in use by
+           another connection, or if parts and in-order writes are mixed.
+
+        Arguments:
+            upload_id: The ID of the session.
+            part_number: The part to write, or 0 to write the image in order.
+
+        Returns:
+            A tuple of the session and the writer, an UploadSession or an
+            UploadPart.
+        """
+        session = self.get(upload_id)
+        if session is None:
+            raise UploadError(
+                grpc.StatusCode.NOT_FOUND, 'NOT_FOUND: Cannot find specified upload session.')
+        writer = session.part(part_number) if part_number else session
+        if not writer.lock.acquire(blocking=False):
+            raise UploadError(
+                grpc.StatusCode.ABORTED,
+                'ABORTED: Upload session is being written by another connection.')
+        if session.complete:
+            writer.lock.release()
+            raise UploadError(
+                grpc.StatusCode.FAILED_PRECONDITION, 'FAILED_PRECONDITION: Upload is complete.')
+        if part_number and session.committed_offset:
+            writer.lock.release()
+            raise UploadError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                'FAILED_PRECONDITION: Image is being written without parts.')
+        writer.open()
+        return session, writer
+
+    def complete(self, session):
+        """Marks a session whose image was saved as complete."""
+        session.complete = True
+        session.committed_offset = session.size
+        session.save_info()
+        self.remove_parts(session)
+
+    def remove_parts(self, session):
+        with session.parts_lock:
+            parts = list(session.parts.values())
+            session.parts.clear()
+        for part in parts:
+            if os.path.exists(part.path):
+                os.remove(part.path)
+
+    def discard(self, session):
+        """Removes a session whose data cannot be used."""
+        with self.lock:
+            self.sessions.pop(session.upload_id, None)
+        self.remove_parts(session)
+        for path in (session.path, session.info_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def expire(self):
+        """Removes the sessions no one wrote to within the TTL. Runs at
+           most once every EXPIRE_INTERVAL seconds.
+        """
+        now = time.time()
+        with self.lock:
+            if now - self.expired_at < EXPIRE_INTERVAL:
+                return
+            self.expired_at = now
+
+        # The last write to each session, to its data, parts or details
+        last_written = {}
+        paths = {}
+        for entry in os.scandir(self.directory):
+            upload_id = entry.name.split('.', 1)[0]
+            last_written[upload_id] = max(last_written.get(upload_id, 0), entry.stat().st_mtime)
+            paths.setdefault(upload_id, []).append(entry.path)
+
+        for upload_id, written in last_written.items():
+            if now - written < self.ttl:
+                continue
+            with self.lock:
+                session = self.sessions.get(upload_id)
+                if session and session.lock.locked():
+                    continue
+                self.sessions.pop(upload_id, None)
+            for path in paths[upload_id]:
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,96 @@
+import hashlib
+import imghdr
+import os
+import tempfile
+
+import grpc
+
+PHOTO_DIR = 'photos'
+# The largest image, in bytes, that can be uploaded
+MAX_PHOTO_SIZE = 2 * 1024 * 1024
+
+class UploadError(Exception):
+    """Raised when an upload is rejected; carries the gRPC status to report."""
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code = code
+        self.details = details
+
+class PhotoUpload(object):
+    """Writes an uploaded image to disk block by block.
+       Blocks go to a temporary file in the photo directory as they arrive
+       and are hashed incrementally, so neither the image nor a second
+       hashing pass is ever needed in memory. Besides the md5 digest that
+       clients send, a SHA-256 digest of the content is kept for
+       content-addressed storage.
+    """
+    def __init__(self, directory=PHOTO_DIR, max_size=MAX_PHOTO_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.name = None
+        self.data_hash = None
+        self.photo_format = None
+        self.size = 0
+        self.hash = hashlib.md5()
+        self.content_hash = hashlib.sha256()
+        self.file = tempfile.NamedTemporaryFile(
+            dir=directory, suffix='.part', delete=False)
+
+    def write(self, request):
+        """Verifies a data block and appends it to the image.
+
+        Arguments:
+            request (PhotoDataBlock): A block of the image.
+
+        Returns:
+            None.
+        """
+        data_block = request.data_block
+        m = hashlib.new('md5', data_block).hexdigest()
+        if m != request.data_block_hash:
+            raise UploadError(
+                grpc.StatusCode.DATA_LOSS, 'DATA_LOSS: Datablock is corrupted.')
+
+        if self.name is None:
+            # The first block carries the image header, so unsupported
+            # files are rejected before the rest of them is sent.
+            self.photo_format = imghdr.what('', data_block)
+            if not self.photo_format:
+                raise UploadError(
+                    grpc.StatusCode.FAILED_PRECONDITION,
+                    'FAILED_PRECONDITION: File type is not supported.')
+            self.name = request.name
+            self.data_hash = request.data_hash
+
+        self.size += len(data_block)
+        if self.size > self.max_size:
+            raise UploadError(
+                grpc.StatusCode.FAILED_PRECONDITION,
+                'FAILED_PRECONDITION: Image is oversized.')
+
+        self.file.write(data_block)
+        self.hash.update(data_block)
+        self.content_hash.update(data_block)
+
+    def commit(self):
+        """Verifies the whole image and closes the temporary file, which
+           is then ready to be moved into storage.
+
+        Returns:
+            digest (str): The SHA-256 digest of the image.
+        """
+        if self.name is None:
+            raise UploadError(
+                grpc.StatusCode.INVALID_ARGUMENT, 'INVALID_ARGUMENT: No data received.')
+        if self.hash.hexdigest() != self.data_hash:
+            raise UploadError(
+                grpc.StatusCode.DATA_LOSS, 'DATA_LOSS: Data is corrupted.')
+
+        self.file.close()
+        return self.content_hash.hexdigest()
+
+    def abort(self):
+        """Discards the temporary file, unless it was moved into storage."""
+        self.file.close()
+        if os.path.exists(self.file.name):
+            os.remove(self.file.name)
@@ -1 +1,6 @@
+from . import blobs
+from . import journal
 from . import local
+from . import memory
+from . import sqlite
+from . import storage
\ No newline at end of file
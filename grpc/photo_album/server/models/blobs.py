@@ -0,0 +1,79 @@
+import glob
+import os
+import threading
+
+BLOB_DIR = os.path.join('photos', 'blobs')
+
+# Guards the reference counts together with the files they describe, so a
+# blob is never removed while another upload of the same content adds it
+lock = threading.Lock()
+
+# Number of photos referencing each blob, keyed by blob path
+refs = {}
+
+def blob_path(digest, photo_format):
+    return os.path.join(BLOB_DIR, digest[:2], '{}.{}'.format(digest, photo_format))
+
+def put(temp_path, digest, photo_format):
+    """Stores an image by the digest of its content and takes a reference
+       to it. If the same content is already stored, the new copy is
+       discarded and only the reference count changes.
+
+    Arguments:
+        temp_path: The path of the image to store; the file is consumed.
+        digest: The SHA-256 digest of the image.
+        photo_format: The format of the image.
+
+    Returns:
+        path (str): The path of the stored blob.
+    """
+    path = blob_path(digest, photo_format)
+    with lock:
+        if path in refs or os.path.exists(path):
+            os.remove(temp_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        refs[path] = refs.get(path, 0) + 1
+    return path
+
+def release(path):
+    """Drops a reference to a blob and removes the blob, and any variants
+       of it stored beside it such as thumbnails, once no photo references
+       it.
+
+    Arguments:
+        path: The path of the blob.
+
+    Returns:
+        None.
+    """
+    with lock:
+        count = refs.get(path, 0) - 1
+        if count > 0:
+            refs[path] = count
+            return
+        refs.pop(path, None)
+        if os.path.exists(path):
+            os.remove(path)
+        for variant_path in glob.glob(glob.escape(os.path.splitext(path)[0]) + '.*'):
+            try:
+                os.remove(variant_path)
+            except FileNotFoundError:
+                # A worker renamed a thumbnail it was writing
+                pass
+
+def rebuild(paths):
+    """Recounts references from the saved images of stored photos, e.g.
+       after a restart with a persistent storage backend.
+
+    Arguments:
+        paths: The path of the saved image of every photo that has one.
+
+    Returns:
+        None.
+    """
+    with lock:
+        refs.clear()
+        for path in paths:
+            refs[path] = refs.get(path, 0) + 1
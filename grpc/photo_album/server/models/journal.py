@@ -0,0 +1,227 @@
+import glob
+import mmap
+import os
+import struct
+import threading
+
+from codegen import example_pb2
+from .memory import MemoryStorage
+from .storage import SORT_ORDERS, get_parent, sort_key
+
+# Record types. Users and photos are written as serialized messages;
+# deletions and uploads as UTF-8 strings.
+PUT_USER = 1
+PUT_PHOTO = 2
+DELETE_PHOTO = 3
+UPLOAD_PHOTO = 4
+UPDATE_PHOTO = 5
+
+# Every record is its type and payload length followed by the payload
+RECORD_HEADER = struct.Struct('<BI')
+SNAPSHOT_MAGIC = b'PHOTOSNAPSHOT1'
+SNAPSHOT_HEADER = struct.Struct('<{}sQ'.format(len(SNAPSHOT_MAGIC)))
+
+def read_records(buffer, offset=0):
+    """Reads the records in a buffer.
+       A record cut short, as left by a crash in the middle of a write,
+       ends the iteration.
+
+    Arguments:
+        buffer: A bytes-like object, e.g. a memory-mapped file.
+        offset: Where the first record starts.
+
+    Returns:
+        A generator of (record type, payload, end offset) tuples.
+    """
+    size = len(buffer)
+    while offset + RECORD_HEADER.size <= size:
+        record_type, length = RECORD_HEADER.unpack_from(buffer, offset)
+        start = offset + RECORD_HEADER.size
+        if start + length > size:
+            return
+        offset = start + length
+        yield record_type, buffer[start:offset], offset
+
+def encode_record(record_type, payload):
+    return RECORD_HEADER.pack(record_type, len(payload)) + payload
+
+class JournaledStorage(MemoryStorage):
+    """Keeps users and photos in memory and makes them durable with an
+       append-only log of mutations plus periodic snapshots.
+       The log is split into generations. Taking a snapshot starts a new
+       generation, writes the state as of that moment without blocking
+       writers for longer than it takes to copy a few lists, and then drops
+       the older generations. On startup the latest snapshot is memory-mapped
+       and bulk-loaded, and the log generations after it are replayed.
+    """
+    # Mutations append to the log
+    blocking = True
+
+    def __init__(self, directory, snapshot_every=1000000):
+        super().__init__()
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.snapshot_lock = threading.Lock()
+        self.generation = 0
+        self.records = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.load()
+        self.log = open(self.log_path(self.generation), 'ab')
+
+    def log_path(self, generation):
+        return os.path.join(self.directory, 'log.{:08d}'.format(generation))
+
+    def snapshot_path(self):
+        return os.path.join(self.directory, 'snapshot')
+
+    def log_generations(self):
+        paths = glob.glob(os.path.join(self.directory, 'log.*'))
+        return sorted(int(path.rsplit('.', 1)[1]) for path in paths)
+
+    def load(self):
+        """Restores the state from the latest snapshot and the log."""
+        path = self.snapshot_path()
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, self.generation = SNAPSHOT_HEADER.unpack_from(mapped, 0)
+                if magic != SNAPSHOT_MAGIC:
+                    raise ValueError('{} is not a snapshot.'.format(path))
+                self.load_snapshot(read_records(mapped, SNAPSHOT_HEADER.size))
+
+        for generation in self.log_generations():
+            if generation < self.generation:
+                continue
+            self.generation = generation
+            self.replay(self.log_path(generation))
+
+    def load_snapshot(self, records):
+        """Bulk-loads snapshot records. The sort indexes are built with
+           one sort per user at the end instead of an insertion per photo.
+        """
+        for record_type, payload, _ in records:
+            if record_type == PUT_USER:
+                user = example_pb2.User.FromString(payload)
+                self.users[user.name] = user
+            elif record_type == PUT_PHOTO:
+                photo = example_pb2.Photo.FromString(payload)
+                parent = get_parent(photo.name)
+                self.photos.setdefault(parent, {})[photo.name] = photo
+                self.photo_index[photo.name] = photo
+            elif record_type == UPLOAD_PHOTO:
+                name, path, data_hash = payload.decode().split('\0')
+                self.photo_files[name] = (path, data_hash)
+
+        for parent, photo_library in self.photos.items():
+            self.sort_indexes[parent] = {
+                order_by: sorted(sort_key(photo, order_by) for photo in photo_library.values())
+                for order_by in SORT_ORDERS
+            }
+
+    def replay(self, path):
+        """Applies the records of a log file and cuts off a torn last record."""
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        end = 0
+        for record_type, payload, end in read_records(data):
+            if record_type == PUT_USER:
+                user = example_pb2.User.FromString(payload)
+                MemoryStorage.create_user(self, user.name, user)
+            elif record_type == PUT_PHOTO:
+                photo = example_pb2.Photo.FromString(payload)
+                MemoryStorage.create_photos(self, get_parent(photo.name), [photo])
+            elif record_type == UPDATE_PHOTO:
+                MemoryStorage.update_photo(self, example_pb2.Photo.FromString(payload))
+            elif record_type == DELETE_PHOTO:
+                MemoryStorage.delete_photo(self, payload.decode())
+            elif record_type == UPLOAD_PHOTO:
+                name, path, data_hash = payload.decode().split('\0')
+                MemoryStorage.upload_photo(self, name, path, data_hash)
+            self.records += 1
+
+        if end < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+
+    def append(self, record_type, *payloads):
+        """Appends records of one type to the log. Callers hold self.lock,
+           so records are logged in the order their mutations are applied.
+           The log is flushed to the OS on every call, which survives a
+           crash of the server but not of the machine.
+        """
+        for payload in payloads:
+            self.log.write(encode_record(record_type, payload))
+        self.log.flush()
+        self.records += len(payloads)
+        if self.records >= self.snapshot_every:
+            self.records = 0
+            threading.Thread(target=self.snapshot, daemon=True).start()
+
+    def create_user(self, name, user):
+        with self.lock:
+            super().create_user(name, user)
+            self.append(PUT_USER, user.SerializeToString())
+
+    def update_user(self, name, user):
+        with self.lock:
+            super().update_user(name, user)
+            self.append(PUT_USER, user.SerializeToString())
+
+    def create_photos(self, parent, photos):
+        with self.lock:
+            super().create_photos(parent, photos)
+            self.append(PUT_PHOTO, *(photo.SerializeToString() for photo in photos))
+
+    def update_photo(self, photo):
+        with self.lock:
+            super().update_photo(photo)
+            self.append(UPDATE_PHOTO, photo.SerializeToString())
+
+    def delete_photo(self, name):
+        with self.lock:
+            photo_file = super().delete_photo(name)
+            self.append(DELETE_PHOTO, name.encode())
+        return photo_file
+
+    def upload_photo(self, name, path, data_hash):
+        with self.lock:
+            previous_path = super().upload_photo(name, path, data_hash)
+            self.append(UPLOAD_PHOTO, '\0'.join((name, path, data_hash)).encode())
+        return previous_path
+
+    def snapshot(self):
+        """Writes a snapshot of the current state and drops the log
+           generations it covers.
+
+        Returns:
+            None.
+        """
+        with self.snapshot_lock:
+            # Stored messages are never modified in place, so copying the
+            # containers is enough to freeze the state
+            with self.lock:
+                users = list(self.users.values())
+                photos = list(self.photo_index.values())
+                photo_files = list(self.photo_files.items())
+                self.log.close()
+                self.generation += 1
+                self.log = open(self.log_path(self.generation), 'ab')
+                generation = self.generation
+
+            path = self.snapshot_path()
+            with open(path + '.tmp', 'wb') as f:
+                f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, generation))
+                for user in users:
+                    f.write(encode_record(PUT_USER, user.SerializeToString()))
+                for photo in photos:
+                    f.write(encode_record(PUT_PHOTO, photo.SerializeToString()))
+                for name, (photo_path, data_hash) in photo_files:
+                    f.write(encode_record(UPLOAD_PHOTO, '\0'.join((name, photo_path, data_hash)).encode()))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + '.tmp', path)
+
+            for old_generation in self.log_generations():
+                if old_generation < generation:
+                    os.remove(self.log_path(old_generation))
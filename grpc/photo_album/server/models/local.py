@@ -1,73 +1,60 @@
-from codegen import example_pb2
+from .memory import MemoryStorage
+from .storage import PAGE_SIZE, SORT_ORDERS, get_parent, normalize_order, sort_key
 
-users = {}
-photos = {}
-tokens = {}
+# The backend that stores users and photos; see configure()
+backend = MemoryStorage()
 
-PAGE_SIZE = 10
+def configure(storage):
+    """Replaces the storage backend.
+
+    Arguments:
+        storage (Storage): The backend to use, e.g. a MemoryStorage or an
+            SQLiteStorage.
+
+    Returns:
+        None.
+    """
+    global backend #pylint: disable=global-statement
+    backend = storage
 
 def create_user(name, user):
-    users[name] = user
+    backend.create_user(name, user)
 
 def update_user(name, user):
-    users[name] = user
+    backend.update_user(name, user)
 
 def delete_user(name):
     pass
 
 def get_user(name):
-    return users.get(name)
+    return backend.get_user(name)
 
 def create_photo(parent, photo):
-    user = users.get(parent)
-    if not user:
-        raise ValueError('Parent not found.')
-    photo_library = photos.get(parent, [])
-    photo_library.append(photo)
-    photos[parent] = photo_library
-
-def upload_photo(name, data):
-    pass
+    backend.create_photo(parent, photo)
+
+def create_photos(parent, photos):
+    backend.create_photos(parent, photos)
+
+def update_photo(photo):
+    backend.update_photo(photo)
+
+def upload_photo(name, path, data_hash):
+    return backend.upload_photo(name, path, data_hash)
+
+def get_photo_file(name):
+    return backend.get_photo_file(name)
+
+def photo_file_paths():
+    return backend.photo_file_paths()
+
+def list_photos(parent, order_by, start_after, page_size):
+    return backend.list_photos(parent, order_by, start_after, page_size)
 
-def list_photos(parent, order_by, offset, page_size):
-    user = users.get(parent)
-    if not user:
-        raise ValueError('Parent not found.')
-    photo_library = photos.get(parent, [])
-
-    return sort_photos(photo_library, order_by, offset, page_size)
-
-def sort_photos(photo_library, order_by, offset, page_size):
-    if order_by == example_pb2.ListPhotosRequest.CREATED_AT: #pylint: disable=no-member
-        sorted_photos = sorted(photo_library, key=lambda x:x.created_at)
-    else:
-        sorted_photos = sorted(photo_library, key=lambda x:x.display_name)
-    
-    if_has_more_photos = True
-    if len(photo_library) < offset + page_size:
-        if_has_more_photos = False
-
-    return sorted_photos[offset:offset + page_size], if_has_more_photos
-    
 def delete_photo(name):
-    parent = name.split('/photos')[0]
-    photo_library = photos.get(parent, [])
-    for i in range(0, len(photo_library)):
-        if photo_library[i].name == name:
-            photo_library.pop(i)
-            return
-    
-    raise ValueError
+    return backend.delete_photo(name)
 
 def get_photo(name):
-    parent = name.split('/photos')[0]
-    photo_library = photos.get(parent, [])
-    for photo in photo_library:
-        if photo.name == name:
-            return photo
-
-def get_token_context(token):
-    return tokens.get(token)
+    return backend.get_photo(name)
 
-def add_token_context(token, context):
-    tokens[token] = context
+def get_photos(names):
+    return backend.get_photos(names)
@@ -0,0 +1,122 @@
+import bisect
+import threading
+
+from .storage import SORT_ORDERS, Storage, get_parent, normalize_order, sort_key
+
+class MemoryStorage(Storage):
+    """Keeps users and photos in dicts. Fast, but nothing survives a restart."""
+    blocking = False
+
+    def __init__(self):
+        # Guards every mutation, and every read that spans more than one of
+        # the structures below, so the store can be shared by the server's
+        # threads
+        self.lock = threading.RLock()
+
+        self.users = {}
+        # Photos of each user, keyed by parent and then by photo name
+        self.photos = {}
+        # Index of all photos, keyed by photo name
+        self.photo_index = {}
+        # Sorted (sort key, photo name) pairs of each user's photos, keyed by
+        # parent and then by sort order
+        self.sort_indexes = {}
+        # Saved images of photos, as (path, md5 digest) pairs keyed by photo name
+        self.photo_files = {}
+
+    def create_user(self, name, user):
+        with self.lock:
+            self.users[name] = user
+
+    def update_user(self, name, user):
+        with self.lock:
+            self.users[name] = user
+
+    def get_user(self, name):
+        return self.users.get(name)
+
+    def create_photo(self, parent, photo):
+        self.create_photos(parent, [photo])
+
+    def create_photos(self, parent, photos):
+        with self.lock:
+            if parent not in self.users:
+                raise ValueError('Parent not found.')
+            photo_library = self.photos.setdefault(parent, {})
+            parent_indexes = self.sort_indexes.setdefault(parent, {})
+            for photo in photos:
+                photo_library[photo.name] = photo
+                self.photo_index[photo.name] = photo
+            for order_by in SORT_ORDERS:
+                index = parent_indexes.setdefault(order_by, [])
+                if len(photos) == 1:
+                    bisect.insort(index, sort_key(photos[0], order_by))
+                else:
+                    # Sorting once merges a batch in O(n + k log k) instead
+                    # of shifting the index for every photo
+                    index.extend(sort_key(photo, order_by) for photo in photos)
+                    index.sort()
+
+    def update_photo(self, photo):
+        with self.lock:
+            previous = self.photo_index.get(photo.name)
+            if previous is None:
+                raise ValueError('Photo not found.')
+            parent = get_parent(photo.name)
+            self.photos[parent][photo.name] = photo
+            self.photo_index[photo.name] = photo
+            for order_by, index in self.sort_indexes[parent].items():
+                key = sort_key(photo, order_by)
+                previous_key = sort_key(previous, order_by)
+                if key != previous_key:
+                    del index[bisect.bisect_left(index, previous_key)]
+                    bisect.insort(index, key)
+
+    def get_photo(self, name):
+        return self.photo_index.get(name)
+
+    def get_photos(self, names):
+        with self.lock:
+            return [self.photo_index.get(name) for name in names]
+
+    def list_photos(self, parent, order_by, start_after, page_size):
+        with self.lock:
+            if parent not in self.users:
+                raise ValueError('Parent not found.')
+            index = self.sort_indexes.get(parent, {}).get(normalize_order(order_by), [])
+
+            start = bisect.bisect_right(index, start_after) if start_after else 0
+            sorted_photos = [self.photo_index[key[-1]] for key in index[start:start + page_size]]
+            if_has_more_photos = start + page_size < len(index)
+
+        return sorted_photos, if_has_more_photos
+
+    def delete_photo(self, name):
+        with self.lock:
+            photo = self.photo_index.pop(name, None)
+            if photo is None:
+                raise ValueError('Photo not found.')
+
+            parent = get_parent(name)
+            del self.photos[parent][name]
+            photo_file = self.photo_files.pop(name, None)
+
+            for order_by, index in self.sort_indexes[parent].items():
+                key = sort_key(photo, order_by)
+                del index[bisect.bisect_left(index, key)]
+        return photo_file
+
+    def upload_photo(self, name, path, data_hash):
+        with self.lock:
+            if name not in self.photo_index:
+                raise ValueError('Photo not found.')
+            previous = self.photo_files.get(name)
+            self.photo_files[name] = (path, data_hash)
+        return previous[0] if previous else None
+
+    def get_photo_file(self, name):
+        return self.photo_files.get(name)
+
+    def photo_file_paths(self):
+        with self.lock:
+            return [path for path, _ in self.photo_files.values()]
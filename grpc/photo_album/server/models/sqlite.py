@@ -0,0 +1,190 @@
+import sqlite3
+import threading
+
+from codegen import example_pb2
+from .storage import Storage, normalize_order
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    name TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS photos (
+    name TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    created_seconds INTEGER NOT NULL,
+    created_nanos INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    path TEXT,
+    data_hash TEXT
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS photos_by_display_name
+    ON photos (parent, display_name, name);
+
+CREATE INDEX IF NOT EXISTS photos_by_created_at
+    ON photos (parent, created_seconds, created_nanos, name);
+'''
+
+# Statements are kept as constants so that sqlite3's statement cache
+# prepares each of them once per connection.
+UPSERT_USER = 'INSERT OR REPLACE INTO users (name, data) VALUES (?, ?)'
+SELECT_USER = 'SELECT data FROM users WHERE name = ?'
+USER_EXISTS = 'SELECT 1 FROM users WHERE name = ?'
+INSERT_PHOTO = '''INSERT INTO photos
+    (name, parent, display_name, created_seconds, created_nanos, data)
+    VALUES (?, ?, ?, ?, ?, ?)'''
+UPDATE_PHOTO = '''UPDATE photos
+    SET display_name = ?, created_seconds = ?, created_nanos = ?, data = ?
+    WHERE name = ?'''
+SELECT_PHOTO = 'SELECT data FROM photos WHERE name = ?'
+SELECT_PHOTOS = 'SELECT name, data FROM photos WHERE name IN ({})'
+# Stays below SQLite's default limit of 999 parameters per statement
+SELECT_PHOTOS_CHUNK = 500
+SELECT_PHOTO_FILE = 'SELECT path, data_hash FROM photos WHERE name = ?'
+SELECT_PHOTO_FILE_PATHS = 'SELECT path FROM photos WHERE path IS NOT NULL'
+UPDATE_PHOTO_FILE = 'UPDATE photos SET path = ?, data_hash = ? WHERE name = ?'
+DELETE_PHOTO = 'DELETE FROM photos WHERE name = ?'
+
+LIST_PHOTOS = {
+    example_pb2.ListPhotosRequest.DISPLAY_NAME: ( #pylint: disable=no-member
+        '''SELECT data FROM photos WHERE parent = ?
+           ORDER BY display_name, name LIMIT ?''',
+        '''SELECT data FROM photos WHERE parent = ?
+           AND (display_name, name) > (?, ?)
+           ORDER BY display_name, name LIMIT ?'''
+    ),
+    example_pb2.ListPhotosRequest.CREATED_AT: ( #pylint: disable=no-member
+        '''SELECT data FROM photos WHERE parent = ?
+           ORDER BY created_seconds, created_nanos, name LIMIT ?''',
+        '''SELECT data FROM photos WHERE parent = ?
+           AND (created_seconds, created_nanos, name) > (?, ?, ?)
+           ORDER BY created_seconds, created_nanos, name LIMIT ?'''
+    )
+}
+
+class SQLiteStorage(Storage):
+    """Keeps users and photos in an SQLite database in WAL mode.
+       Photos are stored as serialized messages next to the columns they
+       are looked up and sorted by, with one index per ListPhotos order.
+       Each thread gets its own connection, so readers never wait for each
+       other; writers are serialized, as SQLite allows only one at a time.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.write_lock = threading.Lock()
+
+        connection = self.connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.executescript(SCHEMA)
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, cached_statements=64)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self.local.connection = connection
+        return connection
+
+    def create_user(self, name, user):
+        with self.write_lock, self.connection() as connection:
+            connection.execute(UPSERT_USER, (name, user.SerializeToString()))
+
+    def update_user(self, name, user):
+        self.create_user(name, user)
+
+    def get_user(self, name):
+        row = self.connection().execute(SELECT_USER, (name,)).fetchone()
+        if row:
+            return example_pb2.User.FromString(row[0])
+
+    def create_photo(self, parent, photo):
+        self.create_photos(parent, [photo])
+
+    def create_photos(self, parent, photos):
+        rows = [
+            (
+                photo.name,
+                parent,
+                photo.display_name,
+                photo.created_at.seconds,
+                photo.created_at.nanos,
+                photo.SerializeToString()
+            )
+            for photo in photos
+        ]
+        with self.write_lock, self.connection() as connection:
+            if not connection.execute(USER_EXISTS, (parent,)).fetchone():
+                raise ValueError('Parent not found.')
+            connection.executemany(INSERT_PHOTO, rows)
+
+    def update_photo(self, photo):
+        row = (
+            photo.display_name,
+            photo.created_at.seconds,
+            photo.created_at.nanos,
+            photo.SerializeToString(),
+            photo.name
+        )
+        with self.write_lock, self.connection() as connection:
+            if not connection.execute(UPDATE_PHOTO, row).rowcount:
+                raise ValueError('Photo not found.')
+
+    def get_photo(self, name):
+        row = self.connection().execute(SELECT_PHOTO, (name,)).fetchone()
+        if row:
+            return example_pb2.Photo.FromString(row[0])
+
+    def get_photos(self, names):
+        connection = self.connection()
+        found = {}
+        for start in range(0, len(names), SELECT_PHOTOS_CHUNK):
+            chunk = names[start:start + SELECT_PHOTOS_CHUNK]
+            query = SELECT_PHOTOS.format(','.join('?' * len(chunk)))
+            found.update(connection.execute(query, chunk))
+        return [
+            example_pb2.Photo.FromString(found[name]) if name in found else None
+            for name in names
+        ]
+
+    def list_photos(self, parent, order_by, start_after, page_size):
+        connection = self.connection()
+        if not connection.execute(USER_EXISTS, (parent,)).fetchone():
+            raise ValueError('Parent not found.')
+
+        # Fetch one extra row to learn whether another page follows
+        first_page, next_page = LIST_PHOTOS[normalize_order(order_by)]
+        if start_after:
+            rows = connection.execute(next_page, (parent,) + tuple(start_after) + (page_size + 1,))
+        else:
+            rows = connection.execute(first_page, (parent, page_size + 1))
+        photos = [example_pb2.Photo.FromString(row[0]) for row in rows]
+
+        return photos[:page_size], len(photos) > page_size
+
+    def delete_photo(self, name):
+        with self.write_lock, self.connection() as connection:
+            photo_file = connection.execute(SELECT_PHOTO_FILE, (name,)).fetchone()
+            if not photo_file:
+                raise ValueError('Photo not found.')
+            connection.execute(DELETE_PHOTO, (name,))
+        return photo_file if photo_file[0] else None
+
+    def upload_photo(self, name, path, data_hash):
+        with self.write_lock, self.connection() as connection:
+            previous = connection.execute(SELECT_PHOTO_FILE, (name,)).fetchone()
+            if not previous:
+                raise ValueError('Photo not found.')
+            connection.execute(UPDATE_PHOTO_FILE, (path, data_hash, name))
+        return previous[0]
+
+    def get_photo_file(self, name):
+        row = self.connection().execute(SELECT_PHOTO_FILE, (name,)).fetchone()
+        if row and row[0]:
+            return row
+
+    def photo_file_paths(self):
+        return [row[0] for row in self.connection().execute(SELECT_PHOTO_FILE_PATHS)]
@@ -0,0 +1,108 @@
+from codegen import example_pb2
+
+PAGE_SIZE = 10
+
+SORT_ORDERS = (
+    example_pb2.ListPhotosRequest.DISPLAY_NAME, #pylint: disable=no-member
+    example_pb2.ListPhotosRequest.CREATED_AT #pylint: disable=no-member
+)
+
+def normalize_order(order_by):
+    """Maps an order to the sort index that serves it; photos are sorted
+       by display name unless creation time is requested.
+    """
+    if order_by == example_pb2.ListPhotosRequest.CREATED_AT: #pylint: disable=no-member
+        return order_by
+    return example_pb2.ListPhotosRequest.DISPLAY_NAME #pylint: disable=no-member
+
+def sort_key(photo, order_by):
+    """Returns the key of a photo in the given sort index. Photo names break
+       ties so that every key is unique.
+    """
+    if order_by == example_pb2.ListPhotosRequest.CREATED_AT: #pylint: disable=no-member
+        return (photo.created_at.seconds, photo.created_at.nanos, photo.name)
+    return (photo.display_name, photo.name)
+
+def get_parent(name):
+    """Returns the resource name of the user a photo belongs to."""
+    return name.split('/photos')[0]
+
+class Storage(object):
+    """The interface of a backend that stores users and photos.
+       Backends must be safe to use from several threads at once. Methods
+       that take a parent or a photo name raise ValueError when the user
+       or photo does not exist.
+    """
+    # Whether calls may wait on I/O, so that an event loop must not make them
+    blocking = True
+
+    def create_user(self, name, user):
+        raise NotImplementedError
+
+    def update_user(self, name, user):
+        raise NotImplementedError
+
+    def get_user(self, name):
+        """Returns the user with the given name, or None."""
+        raise NotImplementedError
+
+    def create_photo(self, parent, photo):
+        raise NotImplementedError
+
+    def create_photos(self, parent, photos):
+        """Creates several photos of one user in a single write."""
+        raise NotImplementedError
+
+    def update_photo(self, photo):
+        """Replaces a stored photo with a new version of it."""
+        raise NotImplementedError
+
+    def get_photo(self, name):
+        """Returns the photo with the given name, or None."""
+        raise NotImplementedError
+
+    def get_photos(self, names):
+        """Returns the photos with the given names, in the same order, with
+           None in place of each photo that does not exist.
+        """
+        raise NotImplementedError
+
+    def list_photos(self, parent, order_by, start_after, page_size):
+        """Lists a page of photos.
+
+        Arguments:
+            parent: The resource name of a user.
+            order_by: The order of the photos.
+            start_after: The sort key of the last photo on the previous page,
+                or None for the first page.
+            page_size: The maximum number of photos to return.
+
+        Returns:
+            A tuple of the photos on the page and whether more photos follow.
+        """
+        raise NotImplementedError
+
+    def delete_photo(self, name):
+        """Deletes a photo.
+
+        Returns:
+            photo_file (tuple): The (path, md5 digest) of the photo's saved
+                image, or None if it has none.
+        """
+        raise NotImplementedError
+
+    def upload_photo(self, name, path, data_hash):
+        """Attaches a saved image to a photo.
+
+        Returns:
+            previous_path (str): The path of the image it replaces, if any.
+        """
+        raise NotImplementedError
+
+    def get_photo_file(self, name):
+        """Returns the (path, md5 digest) of a photo's saved image, or None."""
+        raise NotImplementedError
+
+    def photo_file_paths(self):
+        """Returns the paths of the saved images of all photos, one per photo."""
+        raise NotImplementedError
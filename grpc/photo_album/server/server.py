@@ -1,6 +1,6 @@
 from concurrent import futures
-import hashlib
-import imghdr
+import signal
+import threading
 import time
 
 from google.protobuf import empty_pb2, timestamp_pb2
@@ -9,13 +9,87 @@ import uuid
 
 from codegen import example_pb2
 from codegen import example_pb2_grpc
+from models import blobs
+from models import journal
 from models import local as model
+from models import sqlite
+from helpers import admission
+from helpers import compression
+from helpers import config
+from helpers import downloads
 from helpers import error_handler
+from helpers import metrics
+from helpers import page_cache
+from helpers import page_token as page_token_helper
+from helpers import pipeline
+from helpers import profiling
+from helpers import rate_limits
+from helpers import read_mask
+from helpers import thumbnails
+from helpers import upload_sessions
+from helpers import uploads
 
 API_SERVICE_NAME = '//myapiservice.com'
 PAGE_SIZE = 10
+# The most photos a BatchCreatePhotos or BatchGetPhotos call may carry
+MAX_BATCH_SIZE = 1000
+STREAM_WINDOW = 16
+# Threads that resolve the photos of all pipelined StreamPhotos calls
+STREAM_WORKERS = 10
+PAGE_CACHE_BYTES = 8 * 1024 * 1024
+# Clients send this metadata to have StreamPhotos resolve photos concurrently
+STREAM_MODE_KEY = 'stream-mode'
+PIPELINED_STREAM_MODE = 'pipelined'
+# How long, in seconds, an upload waits for room in a full thumbnail
+# backlog before it is rejected
+THUMBNAIL_WAIT = 1
+THUMBNAIL_PENDING = example_pb2.Photo.PENDING #pylint: disable=no-member
+THUMBNAIL_READY = example_pb2.Photo.READY #pylint: disable=no-member
+THUMBNAIL_FAILED = example_pb2.Photo.FAILED #pylint: disable=no-member
 
 class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
+    def __init__(self, stream_window=STREAM_WINDOW, stream_workers=STREAM_WORKERS,
+                 page_cache_bytes=PAGE_CACHE_BYTES, thumbnail_workers=0,
+                 thumbnail_backlog=thumbnails.BACKLOG, limits=None,
+                 max_buckets=rate_limits.MAX_BUCKETS):
+        """Initializer.
+
+        Arguments:
+            stream_window: The number of photos a pipelined StreamPhotos
+                call resolves at once.
+            stream_workers: The number of threads resolving the photos of
+                all pipelined StreamPhotos calls.
+            page_cache_bytes: The size of the ListPhotos page cache, in
+                bytes; 0 disables the cache.
+            thumbnail_workers: The number of processes making thumbnails of
+                uploaded images; 0 disables thumbnails.
+            thumbnail_backlog: The most uploads that may be waiting for
+                thumbnails; further uploads are rejected.
+            limits (dict): The (rate, burst) of each method whose requests
+                are rate limited per user.
+            max_buckets: The most users whose rate limit state is kept for
+                each method.
+        
+        Returns:
+            None.
+        """
+        self.stream_window = stream_window
+        self.stream_executor = futures.ThreadPoolExecutor(max_workers=stream_workers)
+        self.page_cache = page_cache.PageCache(page_cache_bytes) if page_cache_bytes else None
+        self.thumbnails = None
+        if thumbnail_workers and thumbnails.Image:
+            self.thumbnails = thumbnails.ThumbnailPipeline(
+                self.finish_thumbnails, thumbnail_workers, thumbnail_backlog)
+        # Serializes changes to the image and thumbnail state of photos
+        self.thumbnail_lock = threading.Lock()
+        self.upload_sessions = upload_sessions.UploadSessions()
+        self.rate_limits = rate_limits.RateLimits(limits, max_buckets)
+
+    def invalidate_pages(self, parent):
+        """Drops the cached ListPhotos pages of a user whose photos changed."""
+        if self.page_cache:
+            self.page_cache.invalidate(parent)
+
     def CreateUser(self, request, context):
         """Creates a user.
            gRPC calls this method when clients call the CreateUser rpc (method).
@@ -40,6 +114,8 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
     
     def GetUser(self, request, context):
         name = request.name
+        if not self.rate_limits.allow('GetUser', name):
+            return rate_limited(context)
 
         user = model.get_user(name)
         
@@ -66,6 +142,8 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
         name = request.name
         updated_user = request.user
         mask = request.mask
+        if not self.rate_limits.allow('UpdateUser', name):
+            return rate_limited(context)
 
         original_user = model.get_user(name)
         if not original_user:
@@ -75,11 +153,14 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
                 details='NOT_FOUND: Cannot find specified user.'
             )
 
-        mask.MergeMessage(updated_user, original_user)
-        original_user.name = name
-        model.update_user(name, original_user)
+        # Stored users may be read by other threads; update a copy instead
+        user = example_pb2.User()
+        user.CopyFrom(original_user)
+        mask.MergeMessage(updated_user, user)
+        user.name = name
+        model.update_user(name, user)
         
-        return original_user
+        return user
 
     def CreatePhoto(self, request, context):
         """Creates a photo.
@@ -94,6 +175,8 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
         """
         parent = request.parent
         photo = request.photo
+        if not self.rate_limits.allow('CreatePhoto', parent):
+            return rate_limited(context)
 
         photo_id = uuid.uuid4().hex
         created_at = timestamp_pb2.Timestamp(seconds=int(time.time()))
@@ -109,6 +192,7 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
                 code=grpc.StatusCode.NOT_FOUND,
                 details='NOT_FOUND: Cannot find specified user.'
             )
+        self.invalidate_pages(parent)
 
         return photo
     
@@ -125,22 +209,45 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
         """
         page_token = request.page_token
 
+        try:
+            trim = read_mask.make_trimmer(request.read_mask, example_pb2.Photo)
+        except ValueError:
+            return invalid_read_mask(context)
+
         if page_token:
-            token_context = model.get_token_context(page_token)
+            token_context = page_token_helper.decode(page_token)
             if not token_context:
                 return error_handler.throw_exception(
                     grpc_context=context,
-                    code=grpc.StatusCode.NOT_FOUND,
-                    details='NOT_FOUND: Cannot find specified page token.'
+                    code=grpc.StatusCode.INVALID_ARGUMENT,
+                    details='INVALID_ARGUMENT: Page token is invalid.'
                 )
         else:
             token_context = {
                 'parent': request.parent,
                 'order_by': request.order_by,
-                'offset': 0,
+                'start_after': None,
                 'page_size': PAGE_SIZE
             }
+        if not self.rate_limits.allow('ListPhotos', token_context['parent']):
+            return rate_limited(context)
         
+        order_by = model.normalize_order(token_context['order_by'])
+        cache_key = (
+            token_context['parent'],
+            order_by,
+            token_context['start_after'],
+            token_context['page_size'],
+            tuple(request.read_mask.paths)
+        )
+        if self.page_cache:
+            response = self.page_cache.get(cache_key)
+            if response is not None:
+                return response
+            # Read before listing, so that a write racing with the listing
+            # keeps its result out of the cache
+            generation = self.page_cache.generation(token_context['parent'])
+
         try:
             photos, if_has_more_photos = model.list_photos(**token_context)
         except ValueError:
@@ -150,20 +257,31 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
                 details='NOT_FOUND: Cannot find specified user.'
             )
 
-        # Prepare a new token if there are more photos
+        # Prepare a new token if there are more photos. The token carries
+        # the sort key of the last photo, so the next page seeks past it.
         next_page_token = None
         if if_has_more_photos:
-            next_page_token = uuid.uuid4().hex
-            token_context['offset'] += token_context['page_size']
-            model.add_token_context(next_page_token, token_context)
+            token_context['start_after'] = model.sort_key(photos[-1], order_by)
+            next_page_token = page_token_helper.encode(token_context)
 
-        return example_pb2.ListPhotosResponse(
-            photos=photos, 
+        response = example_pb2.ListPhotosResponse(
+            photos=[trim(photo) for photo in photos] if trim else photos, 
             next_page_token=next_page_token
         )
+        if self.page_cache:
+            self.page_cache.put(cache_key, response, generation)
+
+        return response
     
     def GetPhoto(self, request, context):
         name = request.name
+        if not self.rate_limits.allow('GetPhoto', model.get_parent(name)):
+            return rate_limited(context)
+
+        try:
+            trim = read_mask.make_trimmer(request.read_mask, example_pb2.Photo)
+        except ValueError:
+            return invalid_read_mask(context)
         
         photo = model.get_photo(name)
         if not photo:
@@ -173,7 +291,7 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
                 details='NOT_FOUND: Cannot find specified photo.'
             )
 
-        return photo
+        return trim(photo) if trim else photo
 
     def DeletePhoto(self, request, context):
         """Deletes a photo.
@@ -187,15 +305,20 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
             an Empty gRPC message.
         """
         name = request.name
+        if not self.rate_limits.allow('DeletePhoto', model.get_parent(name)):
+            return rate_limited(context)
 
         try:
-            model.delete_photo(name)
+            photo_file = model.delete_photo(name)
         except ValueError:
             return error_handler.throw_exception(
                 grpc_context=context,
                 code=grpc.StatusCode.NOT_FOUND,
                 details='NOT_FOUND: Cannot find specified photo.'
             )
+        self.invalidate_pages(model.get_parent(name))
+        if photo_file:
+            blobs.release(photo_file[0])
         
         return empty_pb2.Empty()
     
@@ -210,74 +333,626 @@ class ExamplePhotoServiceServicer(example_pb2_grpc.ExamplePhotoServiceServicer):
         Returns:
             An Empty Protocol Buffers message.
         """
-        data_blocks = []
-        data_hash = None
-        name = None
-        for request in request_iterator:
-            m = hashlib.new('md5', request.data_block).hexdigest()
-            if m != request.data_block_hash:
-                return error_handler.throw_exception(
-                    grpc_context=context,
-                    code=grpc.StatusCode.DATA_LOSS,
-                    details='DATA_LOSS: Datablock is corrupted.'
-                )
-            
-            data_hash = request.data_hash
-            name = request.name
+        upload = uploads.PhotoUpload()
+        reserved = saved = False
+        try:
+            for request in request_iterator:
+                upload.write(request)
+            ensure_active(context)
+            # Room in the thumbnail backlog is taken only once every byte
+            # is received, so slow uploads do not hold it
+            reserved = self.reserve_thumbnails(thumbnail_wait(context))
+            if not reserved:
+                return thumbnails_exhausted(context)
+            self.save_upload(upload)
+            saved = True
+        except uploads.UploadError as err:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=err.code,
+                details=err.details
+            )
+        finally:
+            upload.abort()
+            if self.thumbnails and reserved and not saved:
+                self.thumbnails.release()
 
-            data_blocks.append(request.data_block)
-            if len(data_blocks) > 100:
-                return error_handler.throw_exception(
-                    grpc_context=context,
-                    code=grpc.StatusCode.FAILED_PRECONDITION,
-                    details='FAILED_PRECONDITION: Image is oversized.'
-                )
+        return empty_pb2.Empty()
+
+    def CreateUploadSession(self, request, context):
+        """Starts a resumable upload.
+           gRPC calls this method when clients call the CreateUploadSession rpc (method).
+
+        Arguments:
+            request (CreateUploadSessionRequest): The incoming request.
+            context: The gRPC connection context.
         
-        data = b''.join(data_blocks)
-        m = hashlib.new('md5', data).hexdigest()
-        if m != data_hash:
+        Returns:
+            session (UploadSession): The new session.
+        """
+        if request.size <= 0:
             return error_handler.throw_exception(
-                    grpc_context=context,
-                    code=grpc.StatusCode.DATA_LOSS,
-                    details='DATA_LOSS: Data is corrupted.'
-                )
+                grpc_context=context,
+                code=grpc.StatusCode.INVALID_ARGUMENT,
+                details='INVALID_ARGUMENT: Image size must be positive.'
+            )
+        if request.size > uploads.MAX_PHOTO_SIZE:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.FAILED_PRECONDITION,
+                details='FAILED_PRECONDITION: Image is oversized.'
+            )
+        if model.get_photo(request.name) is None:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.NOT_FOUND,
+                details='NOT_FOUND: Cannot find specified photo.'
+            )
 
-        photo_format = imghdr.what('', data)
-        filename = name.replace('/', '')
-        if photo_format:
-            with open('photos/{}.{}'.format(filename, photo_format), 'wb') as f:
-                f.write(data)
-            return empty_pb2.Empty()
-        else:
+        session = self.upload_sessions.create(request.name, request.data_hash, request.size)
+        return session.to_message()
+
+    def GetUploadSession(self, request, context):
+        """Gets the committed offset of a resumable upload.
+           gRPC calls this method when clients call the GetUploadSession rpc (method).
+
+        Arguments:
+            request (GetUploadSessionRequest): The incoming request.
+            context: The gRPC connection context.
+        
+        Returns:
+            session (UploadSession): The session.
+        """
+        session = self.upload_sessions.get(request.upload_id)
+        if session is None:
             return error_handler.throw_exception(
-                    grpc_context=context,
-                    code=grpc.StatusCode.FAILED_PRECONDITION,
-                    details='FAILED_PRECONDITION: File type is not supported.'
-                )
+                grpc_context=context,
+                code=grpc.StatusCode.NOT_FOUND,
+                details='NOT_FOUND: Cannot find specified upload session.'
+            )
+        return session.to_message()
+
+    def WriteUploadSession(self, request_iterator, context):
+        """Writes blocks to a resumable upload.
+           gRPC calls this method when clients call the WriteUploadSession rpc (method).
+           Every block is stored as soon as it arrives, so if the call
+           fails, the blocks received so far need not be sent again. The
+           photo is saved once the last byte of the image is written.
+           Blocks with a part number are written to that part of the image
+           instead, and the photo is saved when the parts are composed.
+
+        Arguments:
+            request_iterator (iterator): An iterator of incoming requests.
+            context: The gRPC connection context.
+        
+        Returns:
+            session (UploadSession): The session, with its new committed
+                offset.
+        """
+        session = writer = None
+        try:
+            for request in request_iterator:
+                if writer is None:
+                    session, writer = self.upload_sessions.open(request.upload_id, request.part_number)
+                writer.write(request)
+            if writer is None:
+                raise uploads.UploadError(
+                    grpc.StatusCode.INVALID_ARGUMENT, 'INVALID_ARGUMENT: No data received.')
+            if writer is session and session.committed_offset == session.size:
+                ensure_active(context)
+                self.save_session(session, thumbnail_wait(context))
+        except uploads.UploadError as err:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=err.code,
+                details=err.details
+            )
+        finally:
+            if writer:
+                writer.close()
+
+        return session.to_message()
+
+    def ComposeUploadSession(self, request, context):
+        """Joins the parts of a resumable upload into the image and saves
+           the photo.
+           gRPC calls this method when clients call the ComposeUploadSession rpc (method).
+           Each part is checked against the size and digest the client
+           sent, and the image against the digest the session was created
+           with.
+
+        Arguments:
+            request (ComposeUploadSessionRequest): The incoming request.
+            context: The gRPC connection context.
+        
+        Returns:
+            session (UploadSession): The completed session.
+        """
+        session = None
+        try:
+            session, _ = self.upload_sessions.open(request.upload_id)
+            ensure_active(context)
+            self.save_session(session, thumbnail_wait(context), request.parts)
+        except uploads.UploadError as err:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=err.code,
+                details=err.details
+            )
+        finally:
+            if session:
+                session.close()
+
+        return session.to_message()
+
+    def save_session(self, session, wait=THUMBNAIL_WAIT, parts=None):
+        """Saves the image of an upload session that has received every
+           byte, waiting up to wait seconds for room in the thumbnail
+           backlog. A session whose image turns out to be unusable is
+           discarded, and the upload must start over.
+           If parts are given, they are composed into the image first,
+           once there is room, so that a save refused for lack of room
+           leaves the parts to be composed again.
+        """
+        if not self.reserve_thumbnails(wait):
+            raise uploads.UploadError(
+                grpc.StatusCode.RESOURCE_EXHAUSTED,
+                'RESOURCE_EXHAUSTED: Too many photos are waiting for thumbnails.')
+        saved = False
+        try:
+            if parts is not None:
+                session.compose(parts)
+            try:
+                self.save_upload(session)
+            except uploads.UploadError:
+                self.upload_sessions.discard(session)
+                raise
+            saved = True
+        finally:
+            if self.thumbnails and not saved:
+                self.thumbnails.release()
+        self.upload_sessions.complete(session)
+
+    def reserve_thumbnails(self, timeout=THUMBNAIL_WAIT):
+        """Takes room in the thumbnail backlog for an upload, waiting up to
+           timeout seconds if it is full.
+
+        Returns:
+            A bool; False if the upload must be rejected.
+        """
+        return not self.thumbnails or self.thumbnails.reserve(timeout)
+
+    def save_upload(self, upload):
+        """Stores a finished upload and attaches it to its photo.
+           Images are stored by content, so uploading an image that is
+           already stored only adds a reference to it. If thumbnails are
+           enabled, the caller must have called reserve_thumbnails(); the
+           thumbnails are then made in the background.
+
+        Arguments:
+            upload (PhotoUpload): An upload whose blocks have all been written.
+
+        Returns:
+            None.
+        """
+        digest = upload.commit()
+        path = blobs.put(upload.file.name, digest, upload.photo_format)
+        with self.thumbnail_lock:
+            try:
+                previous_path = model.upload_photo(upload.name, path, upload.data_hash)
+            except ValueError:
+                blobs.release(path)
+                raise uploads.UploadError(
+                    grpc.StatusCode.NOT_FOUND, 'NOT_FOUND: Cannot find specified photo.')
+            if previous_path:
+                blobs.release(previous_path)
+            if not self.thumbnails:
+                return
+            # Thumbnails of content uploaded before are already stored
+            ready = thumbnails.has_thumbnails(path)
+            self.set_thumbnail_state(upload.name, THUMBNAIL_READY if ready else THUMBNAIL_PENDING)
+        if ready:
+            self.thumbnails.release()
+        else:
+            self.thumbnails.submit(upload.name, path)
+
+    def finish_thumbnails(self, name, path, succeeded):
+        """Records the outcome of making the thumbnails of an image, unless
+           the photo was deleted or given another image in the meantime.
+        """
+        with self.thumbnail_lock:
+            photo_file = model.get_photo_file(name)
+            if photo_file and photo_file[0] == path:
+                self.set_thumbnail_state(name, THUMBNAIL_READY if succeeded else THUMBNAIL_FAILED)
+
+    def set_thumbnail_state(self, name, state):
+        # Callers hold self.thumbnail_lock. Stored photos may be read by
+        # other threads; update a copy instead
+        original_photo = model.get_photo(name)
+        if original_photo is None or original_photo.thumbnail_state == state:
+            return
+        photo = example_pb2.Photo()
+        photo.CopyFrom(original_photo)
+        photo.thumbnail_state = state
+        try:
+            model.update_photo(photo)
+        except ValueError:
+            # The photo was deleted
+            return
+        self.invalidate_pages(model.get_parent(name))
 
     def DownloadPhoto(self, request, context):
-        pass
+        """Downloads a photo.
+           gRPC calls this method when clients call the DownloadPhoto rpc (method).
+
+        Arguments:
+            request (DownloadPhotoRequest): The incoming request.
+            context: The gRPC connection context.
+        
+        Returns:
+            A generator of PhotoDataBlocks.
+        """
+        photo_file = self.find_download(request, context)
+        if not photo_file:
+            return
+
+        path, data_hash = photo_file
+        yield from downloads.read_blocks(request.name, path, data_hash)
+
+    def find_download(self, request, context):
+        """Finds the image, or thumbnail, that a DownloadPhoto call asks for.
+
+        Arguments:
+            request (DownloadPhotoRequest): The incoming request.
+            context: The gRPC connection context.
+
+        Returns:
+            photo_file (tuple): The (path, md5 digest) of the file, or None
+                if the call failed.
+        """
+        if request.thumbnail and request.thumbnail not in thumbnails.SIZES:
+            error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.INVALID_ARGUMENT,
+                details='INVALID_ARGUMENT: Thumbnail size must be one of {}.'.format(
+                    ', '.join(thumbnails.SIZES))
+            )
+            return None
+
+        photo_file = model.get_photo_file(request.name)
+        if not photo_file:
+            error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.NOT_FOUND,
+                details='NOT_FOUND: Cannot find specified photo data.'
+            )
+            return None
+        if not request.thumbnail:
+            return photo_file
+
+        photo = model.get_photo(request.name)
+        if photo is None or photo.thumbnail_state != THUMBNAIL_READY:
+            error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.FAILED_PRECONDITION,
+                details='FAILED_PRECONDITION: Thumbnail is not ready.'
+            )
+            return None
+        path = thumbnails.thumbnail_path(photo_file[0], request.thumbnail)
+        return path, downloads.file_hash(path)
 
     def StreamPhotos(self, request_iterator, context):
         """Streams photos.
            gRPC calls this method when clients call the StreamPhotos rpc (method).
+           Each request gets one result in return, holding either the photo
+           or why it could not be returned, so a missing photo does not end
+           the stream. In pipelined mode, requested by clients through
+           metadata, photos are resolved concurrently, at most stream_window
+           at a time per call, but still returned in request order.
 
         Arguments:
             request_iterator (iterator): An iterator of incoming requests.
             context: The gRPC connection context.
         
         Returns:
-            A generator.
+            A generator of PhotoResults.
         """
+        metadata = dict(context.invocation_metadata())
+        if metadata.get(STREAM_MODE_KEY) == PIPELINED_STREAM_MODE:
+            # Lookups queued before the call ended are skipped
+            yield from pipeline.ordered_map(
+                self.resolve_photo, request_iterator, self.stream_executor, self.stream_window,
+                cancelled=lambda: not context.is_active())
+            return
+
         for request in request_iterator:
-            yield self.GetPhoto(request, context)
+            yield self.resolve_photo(request)
 
-if __name__ == '__main__':
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=1))
-    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(ExamplePhotoServiceServicer(), server)
-    server.add_insecure_port('0.0.0.0:8080')
+    def resolve_photo(self, request):
+        """Looks up a photo for StreamPhotos, charging it to its user's
+           GetPhoto rate limit.
+
+        Arguments:
+            request (GetPhotoRequest): The incoming request.
+
+        Returns:
+            result (PhotoResult): The photo, trimmed to the request's read
+                mask, or the error that kept it from being returned.
+        """
+        if not self.rate_limits.allow('GetPhoto', model.get_parent(request.name)):
+            return example_pb2.PhotoResult(error='RESOURCE_EXHAUSTED: Too many requests for specified user.')
+        try:
+            trim = read_mask.make_trimmer(request.read_mask, example_pb2.Photo)
+        except ValueError:
+            return example_pb2.PhotoResult(error='INVALID_ARGUMENT: Read mask is invalid.')
+        photo = model.get_photo(request.name)
+        if photo is None:
+            return example_pb2.PhotoResult(error='NOT_FOUND: Cannot find specified photo.')
+        return example_pb2.PhotoResult(photo=trim(photo) if trim else photo)
+
+    def BatchCreatePhotos(self, request, context):
+        """Creates several photos of one user.
+           gRPC calls this method when clients call the BatchCreatePhotos rpc (method).
+           The photos are created together or not at all.
+
+        Arguments:
+            request (BatchCreatePhotosRequest): The incoming request.
+            context: The gRPC connection context.
+        
+        Returns:
+            response (BatchCreatePhotosResponse): The created photos.
+        """
+        parent = request.parent
+        photos = request.photos
+        if not self.rate_limits.allow('BatchCreatePhotos', parent):
+            return rate_limited(context)
+
+        if len(photos) > MAX_BATCH_SIZE:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.INVALID_ARGUMENT,
+                details='INVALID_ARGUMENT: At most {} photos can be created at once.'.format(MAX_BATCH_SIZE)
+            )
+
+        # All photos of a batch share one creation time
+        created_at = int(time.time())
+        for photo in photos:
+            photo.name = '{}/photos/{}'.format(parent, uuid.uuid4().hex)
+            photo.created_at.seconds = created_at
+        try:
+            model.create_photos(parent, photos)
+        except ValueError:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.NOT_FOUND,
+                details='NOT_FOUND: Cannot find specified user.'
+            )
+        self.invalidate_pages(parent)
+
+        return example_pb2.BatchCreatePhotosResponse(photos=photos)
+
+    def BatchGetPhotos(self, request, context):
+        """Gets several photos.
+           gRPC calls this method when clients call the BatchGetPhotos rpc (method).
+           A photo that cannot be found fails only its own result.
+
+        Arguments:
+            request (BatchGetPhotosRequest): The incoming request.
+            context: The gRPC connection context.
+        
+        Returns:
+            response (BatchGetPhotosResponse): One result per requested name.
+        """
+        names = request.names
+
+        try:
+            trim = read_mask.make_trimmer(request.read_mask, example_pb2.Photo)
+        except ValueError:
+            return invalid_read_mask(context)
+
+        if len(names) > MAX_BATCH_SIZE:
+            return error_handler.throw_exception(
+                grpc_context=context,
+                code=grpc.StatusCode.INVALID_ARGUMENT,
+                details='INVALID_ARGUMENT: At most {} photos can be fetched at once.'.format(MAX_BATCH_SIZE)
+            )
+        # Every user whose photos are fetched is charged once
+        for parent in {model.get_parent(name) for name in names}:
+            if not self.rate_limits.allow('BatchGetPhotos', parent):
+                return rate_limited(context)
+
+        response = example_pb2.BatchGetPhotosResponse()
+        for photo in model.get_photos(list(names)):
+            result = response.results.add() #pylint: disable=no-member
+            if photo is None:
+                result.error = 'NOT_FOUND: Cannot find specified photo.'
+            else:
+                result.photo.CopyFrom(trim(photo) if trim else photo)
+
+        return response
+
+def thumbnails_exhausted(context):
+    return error_handler.throw_exception(
+        grpc_context=context,
+        code=grpc.StatusCode.RESOURCE_EXHAUSTED,
+        details='RESOURCE_EXHAUSTED: Too many photos are waiting for thumbnails.'
+    )
+
+def rate_limited(context):
+    return error_handler.throw_exception(
+        grpc_context=context,
+        code=grpc.StatusCode.RESOURCE_EXHAUSTED,
+        details='RESOURCE_EXHAUSTED: Too many requests for specified user.'
+    )
+
+def invalid_read_mask(context):
+    return error_handler.throw_exception(
+        grpc_context=context,
+        code=grpc.StatusCode.INVALID_ARGUMENT,
+        details='INVALID_ARGUMENT: Read mask is invalid.'
+    )
+
+def ensure_active(context):
+    """Raises UploadError if the client cancelled the call or its deadline
+       passed, so that no more work is done for it. Takes the context of
+       either server; asyncio contexts have no is_active().
+    """
+    active = context.is_active() if hasattr(context, 'is_active') else not context.done()
+    if not active:
+        raise uploads.UploadError(
+            grpc.StatusCode.CANCELLED, 'CANCELLED: Call was cancelled or its deadline passed.')
+
+def thumbnail_wait(context):
+    """Returns how long a call may wait for room in the thumbnail backlog:
+       THUMBNAIL_WAIT, or less if the call's deadline is sooner.
+    """
+    remaining = context.time_remaining()
+    if remaining is None:
+        return THUMBNAIL_WAIT
+    return max(0, min(THUMBNAIL_WAIT, remaining))
+
+def configure_storage(settings):
+    """Sets up the storage backend selected in the settings.
+
+    Arguments:
+        settings (argparse.Namespace): The server settings.
+
+    Returns:
+        None.
+    """
+    if settings.storage == 'sqlite':
+        model.configure(sqlite.SQLiteStorage(settings.database))
+    elif settings.storage == 'journal':
+        start = time.time()
+        model.configure(journal.JournaledStorage(settings.journal_dir, settings.snapshot_every))
+        print('Store restored from {} in {:.2f}s.'.format(settings.journal_dir, time.time() - start))
+    blobs.rebuild(model.photo_file_paths())
+
+def start_metrics(settings, servicer):
+    """Starts collecting metrics and serving them over HTTP, if a metrics
+       port is configured.
+
+    Arguments:
+        settings (argparse.Namespace): The server settings.
+        servicer (ExamplePhotoServiceServicer): The servicer whose page
+            cache and thumbnail pipeline statistics are exported too.
+
+    Returns:
+        registry (metrics.Metrics): The metrics, or None if disabled.
+    """
+    if not settings.metrics_port:
+        return None
+    registry = metrics.Metrics(settings.metrics_buckets or metrics.DEFAULT_BUCKETS)
+    if servicer.page_cache:
+        registry.add_collector('photo_page_cache', servicer.page_cache.stats, gauges=('entries', 'bytes'))
+    if servicer.thumbnails:
+        registry.add_collector('photo_thumbnails', servicer.thumbnails.stats, gauges=('backlog', 'queue_depth'))
+    for method, buckets in servicer.rate_limits.buckets.items():
+        registry.add_collector('photo_rate_limit_' + method, buckets.stats, gauges=('buckets',))
+    metrics.serve_http(registry, settings.metrics_host, settings.metrics_port)
+    print('Metrics available at http://{}:{}/metrics.'.format(settings.metrics_host, settings.metrics_port))
+    return registry
+
+def start_admission_control(settings, registry):
+    """Sets up admission control, if it is enabled.
+
+    Arguments:
+        settings (argparse.Namespace): The server settings.
+        registry (metrics.Metrics): The metrics to export each method
+            class's limit and counters to, or None.
+
+    Returns:
+        control (admission.AdmissionControl): The admission control, or
+            None if disabled.
+    """
+    if settings.admission_control == 'off':
+        return None
+    control = admission.AdmissionControl(settings.admission_max_limits)
+    for name, limiter in control.limiters.items():
+        if registry:
+            registry.add_collector('photo_admission_' + name, limiter.stats, gauges=('limit', 'in_flight'))
+        print('Admission control for {} methods: limit {limit}, at most {max}.'.format(
+            name, max=limiter.limit.max_limit, **limiter.stats()))
+    return control
+
+def start_profiling(settings, registry):
+    """Starts profiling a sample of RPCs, if profiling is configured.
+       Sending the server SIGUSR1 writes the profiles gathered so far.
+
+    Arguments:
+        settings (argparse.Namespace): The server settings.
+        registry (metrics.Metrics): The metrics to export the profiler's
+            counters to, or None.
+
+    Returns:
+        profiler (profiling.Profiler): The profiler, or None if disabled.
+    """
+    if not settings.profile_rate and not settings.profile_token:
+        return None
+    profiler = profiling.Profiler(
+        settings.profile_rate, settings.profile_token,
+        settings.profile_max_per_second, settings.profile_dir)
+    if registry:
+        registry.add_collector('rpc_profiler', profiler.stats)
+
+    def dump(signum, frame): #pylint: disable=unused-argument
+        paths = profiler.dump()
+        print('Wrote {} profile files to {}.'.format(len(paths), settings.profile_dir))
+    # Signal handlers can only be set from the main thread, which the
+    # server does not run on when it is embedded, e.g. in benchmarks
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, dump)
+        print('Profiling RPCs. Send SIGUSR1 to write profiles to {}.'.format(settings.profile_dir))
+    return profiler
+
+def serve(settings):
+    """Runs the photo service on a thread pool until it is stopped.
+
+    Arguments:
+        settings (argparse.Namespace): The server settings.
+
+    Returns:
+        None.
+    """
+    configure_storage(settings)
+    servicer = ExamplePhotoServiceServicer(
+        settings.stream_window, settings.max_workers, settings.page_cache_bytes,
+        settings.thumbnail_workers, settings.thumbnail_backlog,
+        settings.rate_limits, settings.rate_limit_buckets)
+    registry = start_metrics(settings, servicer)
+    executor = futures.ThreadPoolExecutor(max_workers=settings.max_workers)
+    interceptors = []
+    if registry:
+        interceptors.append(metrics.MetricsInterceptor(registry))
+    control = start_admission_control(settings, registry)
+    if control:
+        interceptors.append(admission.AdmissionInterceptor(control, executor))
+    if settings.compression:
+        interceptors.append(compression.CompressionInterceptor(
+            settings.compression, settings.compression_threshold))
+    profiler = start_profiling(settings, registry)
+    if profiler:
+        interceptors.append(profiling.ProfilingInterceptor(profiler))
+    server = grpc.server(
+        executor,
+        options=config.server_options(settings),
+        interceptors=interceptors,
+        maximum_concurrent_rpcs=settings.max_concurrent_rpcs
+    )
+    example_pb2_grpc.add_ExamplePhotoServiceServicer_to_server(servicer, server)
+    address = '{}:{}'.format(settings.host, settings.port)
+    server.add_insecure_port(address)
     server.start()
-    print('API server started. Listening at 0.0.0.0:8080.')
+    print('API server started. Listening at {} with {} workers.'.format(address, settings.max_workers))
     print('Connection is insecure. No authentication enabled.')
     while True:
         time.sleep(60)
+
+if __name__ == '__main__':
+    settings = config.parse_args()
+    if settings.mode == 'async':
+        import asyncio
+        import aio_server
+        asyncio.run(aio_server.serve(settings))
+    else:
+        serve(settings)
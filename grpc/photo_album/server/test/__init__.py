@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The server's modules import each other from the server directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+from concurrent import futures
+import gc
+import threading
+import time
+import unittest
+
+import grpc
+
+from helpers import admission
+
+SERVICE = 'example.photoservice.ExamplePhotoService'
+
+class TestAdmissionInterceptor(unittest.TestCase):
+    """AdmissionInterceptor unit tests"""
+
+    def setUp(self):
+        self.control = admission.AdmissionControl()
+        self.limiter = self.control.limiter('/{}/GetUser'.format(SERVICE))
+        self.release = threading.Event()
+
+        def get_user(request, context): #pylint: disable=unused-argument
+            self.release.wait()
+            return request
+
+        executor = futures.ThreadPoolExecutor(max_workers=1)
+        self.server = grpc.server(
+            executor, interceptors=[admission.AdmissionInterceptor(self.control, executor)])
+        self.server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(
+            SERVICE, {'GetUser': grpc.unary_unary_rpc_method_handler(get_user)}),))
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+        self.channel = grpc.insecure_channel('localhost:{}'.format(port))
+        self.get_user = self.channel.unary_unary('/{}/GetUser'.format(SERVICE))
+
+    def tearDown(self):
+        self.release.set()
+        self.channel.close()
+        self.server.stop(None)
+
+    def wait_for_in_flight(self, count):
+        for _ in range(100):
+            if self.limiter.stats()['in_flight'] == count:
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_release_cancelled_while_queued(self):
+        """Test that calls cancelled while they wait for a thread give
+           their permits back, without the garbage collector
+        """
+        gc.disable()
+        try:
+            running = self.get_user.future(b'running')
+            queued = [self.get_user.future(b'queued') for _ in range(3)]
+            self.assertTrue(self.wait_for_in_flight(4))
+            for call in queued:
+                call.cancel()
+            self.release.set()
+            self.assertEqual(running.result(timeout=5), b'running')
+            self.assertTrue(self.wait_for_in_flight(0))
+        finally:
+            gc.enable()
+        self.assertEqual(self.limiter.stats()['admitted'], 4)
+
+if __name__ == '__main__':
+    unittest.main()
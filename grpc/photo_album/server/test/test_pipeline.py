@@ -0,0 +1,35 @@
+from concurrent import futures
+import threading
+import unittest
+
+from helpers import pipeline
+
+class TestOrderedMap(unittest.TestCase):
+    """ordered_map unit tests"""
+
+    def setUp(self):
+        self.executor = futures.ThreadPoolExecutor(max_workers=4)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_results_in_order(self):
+        """Test that results are yielded in input order"""
+        results = pipeline.ordered_map(lambda item: item * 2, range(100), self.executor, 8)
+        self.assertEqual(list(results), [item * 2 for item in range(100)])
+
+    def test_cancelled_items_dropped(self):
+        """Test that items started after cancellation yield nothing"""
+        cancelled = threading.Event()
+
+        def resolve(item):
+            # The call is cancelled while the second item is resolved
+            if item == 2:
+                cancelled.set()
+            return item
+
+        results = pipeline.ordered_map(resolve, range(1, 5), self.executor, 1, cancelled.is_set)
+        self.assertEqual(list(results), [1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
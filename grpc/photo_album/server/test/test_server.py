@@ -0,0 +1,184 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from google.protobuf import field_mask_pb2
+import grpc
+
+from codegen import example_pb2
+from helpers import rate_limits
+from models import local as model
+from models.memory import MemoryStorage
+import server
+
+PIPELINED = ((server.STREAM_MODE_KEY, server.PIPELINED_STREAM_MODE),)
+PNG_IMAGE = b'\x89PNG\r\n\x1a\n' + bytes(4096)
+
+class FakeContext(object):
+    """The parts of a gRPC servicer context the servicer uses."""
+    def __init__(self, metadata=()):
+        self.metadata = metadata
+        self.code = None
+        self.details = None
+
+    def invocation_metadata(self):
+        return self.metadata
+
+    def is_active(self):
+        return True
+
+    def time_remaining(self):
+        return None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+def part_block(upload_id, part_number, data):
+    return example_pb2.PhotoDataBlock(
+        upload_id=upload_id,
+        part_number=part_number,
+        data_block=data,
+        data_block_hash=hashlib.md5(data).hexdigest()
+    )
+
+class ServicerTestCase(unittest.TestCase):
+    """Sets up a servicer with an in-memory store, a user and a photo."""
+
+    def setUp(self):
+        # Uploads are stored under the working directory, like the server's
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+        os.makedirs('photos')
+        model.configure(MemoryStorage())
+        self.servicer = server.ExamplePhotoServiceServicer()
+        self.user = self.servicer.CreateUser(example_pb2.User(), FakeContext())
+        self.photo = self.servicer.CreatePhoto(
+            example_pb2.CreatePhotoRequest(parent=self.user.name, photo=example_pb2.Photo()), FakeContext())
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+class TestUploadPhoto(ServicerTestCase):
+    """UploadPhoto unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.servicer.thumbnails = mock.Mock()
+        self.received = False
+
+    def requests(self):
+        yield example_pb2.PhotoDataBlock(
+            name=self.photo.name,
+            data_block=PNG_IMAGE,
+            data_block_hash=hashlib.md5(PNG_IMAGE).hexdigest(),
+            data_hash=hashlib.md5(PNG_IMAGE).hexdigest()
+        )
+        self.received = True
+
+    def test_reserve_after_receiving(self):
+        """Test that room in the thumbnail backlog is taken only once
+           every block is received
+        """
+        self.servicer.thumbnails.reserve.side_effect = lambda timeout: self.received
+        context = FakeContext()
+        self.servicer.UploadPhoto(self.requests(), context)
+        self.assertIsNone(context.code, context.details)
+        self.servicer.thumbnails.submit.assert_called_once()
+        self.servicer.thumbnails.release.assert_not_called()
+
+    def test_backlog_full(self):
+        """Test that an upload is rejected, without giving back room it
+           never took, if the thumbnail backlog stays full
+        """
+        self.servicer.thumbnails.reserve.return_value = False
+        context = FakeContext()
+        self.servicer.UploadPhoto(self.requests(), context)
+        self.assertEqual(context.code, grpc.StatusCode.RESOURCE_EXHAUSTED)
+        self.servicer.thumbnails.release.assert_not_called()
+        self.assertIsNone(model.get_photo_file(self.photo.name))
+
+class TestComposeUploadSession(ServicerTestCase):
+    """ComposeUploadSession unit tests"""
+
+    def test_compose_after_failed_save(self):
+        """Test that a compose whose save is refused can be retried"""
+        session = self.servicer.CreateUploadSession(example_pb2.CreateUploadSessionRequest(
+            name=self.photo.name,
+            data_hash=hashlib.md5(PNG_IMAGE).hexdigest(),
+            size=len(PNG_IMAGE)
+        ), FakeContext())
+        halves = [PNG_IMAGE[:len(PNG_IMAGE) // 2], PNG_IMAGE[len(PNG_IMAGE) // 2:]]
+        for part_number, data in enumerate(halves, 1):
+            context = FakeContext()
+            self.servicer.WriteUploadSession(iter([part_block(session.upload_id, part_number, data)]), context)
+            self.assertIsNone(context.code, context.details)
+        request = example_pb2.ComposeUploadSessionRequest(upload_id=session.upload_id, parts=[
+            example_pb2.UploadPart(part_number=part_number, size=len(data), part_hash=hashlib.md5(data).hexdigest())
+            for part_number, data in enumerate(halves, 1)
+        ])
+
+        # The thumbnail backlog is full for the first compose only
+        self.servicer.thumbnails = mock.Mock()
+        self.servicer.thumbnails.reserve.side_effect = [False, True]
+        context = FakeContext()
+        self.servicer.ComposeUploadSession(request, context)
+        self.assertEqual(context.code, grpc.StatusCode.RESOURCE_EXHAUSTED)
+
+        context = FakeContext()
+        composed = self.servicer.ComposeUploadSession(request, context)
+        self.assertIsNone(context.code, context.details)
+        self.assertTrue(composed.complete)
+        self.assertEqual(composed.committed_offset, len(PNG_IMAGE))
+        self.assertIsNotNone(model.get_photo_file(self.photo.name))
+
+class TestStreamPhotos(ServicerTestCase):
+    """Pipelined StreamPhotos unit tests"""
+
+    def setUp(self):
+        super().setUp()
+        self.missing_name = self.user.name + '/photos/missing'
+
+    def stream(self, requests):
+        return list(self.servicer.StreamPhotos(iter(requests), FakeContext(PIPELINED)))
+
+    def test_missing_photo(self):
+        """Test that a missing photo is reported in its place, and the
+           photos after it still arrive
+        """
+        results = self.stream([
+            example_pb2.GetPhotoRequest(name=name)
+            for name in (self.photo.name, self.missing_name, self.photo.name)
+        ])
+        self.assertEqual([result.photo.name for result in results],
+                         [self.photo.name, '', self.photo.name])
+        self.assertEqual(results[1].error, 'NOT_FOUND: Cannot find specified photo.')
+
+    def test_invalid_read_mask(self):
+        """Test that an invalid read mask is reported as INVALID_ARGUMENT"""
+        results = self.stream([
+            example_pb2.GetPhotoRequest(
+                name=self.photo.name, read_mask=field_mask_pb2.FieldMask(paths=['unknown'])),
+            example_pb2.GetPhotoRequest(name=self.photo.name)
+        ])
+        self.assertEqual(results[0].error, 'INVALID_ARGUMENT: Read mask is invalid.')
+        self.assertEqual(results[1].photo, self.photo)
+
+    def test_rate_limited(self):
+        """Test that each photo is charged to its user's GetPhoto rate
+           limit
+        """
+        self.servicer.rate_limits = rate_limits.RateLimits({'GetPhoto': (0.01, 2)})
+        results = self.stream([example_pb2.GetPhotoRequest(name=self.photo.name)] * 3)
+        self.assertEqual([result.WhichOneof('result') for result in results], ['photo', 'photo', 'error'])
+        self.assertEqual(results[2].error, 'RESOURCE_EXHAUSTED: Too many requests for specified user.')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import hashlib
+import shutil
+import tempfile
+import threading
+import unittest
+
+from codegen import example_pb2
+from helpers import upload_sessions
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n'
+BLOCK_SIZE = 1024
+BLOCKS = 200
+
+def data_block(data, offset):
+    return example_pb2.PhotoDataBlock(
+        data_block=data,
+        data_block_hash=hashlib.md5(data).hexdigest(),
+        offset=offset
+    )
+
+class TestUploadSessions(unittest.TestCase):
+    """UploadSessions unit tests"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sessions = upload_sessions.UploadSessions(self.directory)
+        self.image = PNG_HEADER + bytes(BLOCK_SIZE * BLOCKS - len(PNG_HEADER))
+        self.session = self.sessions.create(
+            'photo', hashlib.md5(self.image).hexdigest(), len(self.image))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_while_writing(self):
+        """Test that looking a session up does not move the committed
+           offset of a writer
+        """
+        done = threading.Event()
+        offsets = []
+
+        def poll():
+            while not done.is_set():
+                offsets.append(self.sessions.get(self.session.upload_id).to_message().committed_offset)
+
+        poller = threading.Thread(target=poll)
+        poller.start()
+        try:
+            session, writer = self.sessions.open(self.session.upload_id)
+            try:
+                for offset in range(0, len(self.image), BLOCK_SIZE):
+                    writer.write(data_block(self.image[offset:offset + BLOCK_SIZE], offset))
+            finally:
+                writer.close()
+        finally:
+            done.set()
+            poller.join()
+
+        self.assertEqual(session.committed_offset, len(self.image))
+        self.assertEqual(offsets, sorted(offsets))
+        self.assertLessEqual(max(offsets), len(self.image))
+
+if __name__ == '__main__':
+    unittest.main()
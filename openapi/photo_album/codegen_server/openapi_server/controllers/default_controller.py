@@ -1,3 +1,4 @@
+import os
 import time
 import uuid
 
@@ -5,6 +6,7 @@ import connexion
 import six
 
 from openapi_server.helpers import local as helper
+from openapi_server.helpers import rate_limits
 from openapi_server.models.error_message import ErrorMessage  # noqa: E501
 from openapi_server.models.inline_response200 import InlineResponse200  # noqa: E501
 from openapi_server.models.photo import Photo  # noqa: E501
@@ -15,6 +17,19 @@ API_SERVICE_NAME = '//myapiservice.com'
 
 PAGE_SIZE = 10
 
+# Per-user rate limits of each method, named as in the gRPC service, e.g.
+# RATE_LIMITS="CreatePhoto=5/20,ListPhotos=20"
+limits = rate_limits.RateLimits(
+    rate_limits.parse_limits(os.environ.get('RATE_LIMITS', '')),
+    int(os.environ.get('RATE_LIMIT_BUCKETS') or rate_limits.MAX_BUCKETS)
+)
+
+def rate_limited():
+    return ErrorMessage(
+        error_code='429 TOO_MANY_REQUESTS',
+        error_message='RESOURCE_EXHAUSTED: Too many requests for specified user.'
+    )
+
 def batchget_photo(user_id, photo_ids):  # noqa: E501
     """batchget_photo
 
@@ -27,9 +42,13 @@ def batchget_photo(user_id, photo_ids):  # noqa: E501
 
     :rtype: List[Photo]
     """
+    parent = '{}/users/{}'.format(API_SERVICE_NAME, user_id)
+    if not limits.allow('BatchGetPhotos', parent):
+        return rate_limited()
+
     res = []
     for photo_id in photo_ids:
-        res.append(get_photo(user_id, photo_id))
+        res.append(find_photo(user_id, photo_id))
     return res
 
 
@@ -45,9 +64,12 @@ def create_photo(user_id, photo=None):  # noqa: E501
 
     :rtype: Photo
     """
+    parent = '{}/users/{}'.format(API_SERVICE_NAME, user_id)
+    if not limits.allow('CreatePhoto', parent):
+        return rate_limited()
+
     if connexion.request.is_json:
         photo = Photo.from_dict(connexion.request.get_json())  # noqa: E501
-    parent = '{}/users/{}'.format(API_SERVICE_NAME, user_id)
     photo_id = uuid.uuid4().hex
     name = '{}/users/{}/photos/{}'.format(API_SERVICE_NAME, user_id, photo_id)
     photo = Photo(
@@ -100,6 +122,9 @@ def delete_photo(user_id, photo_id):  # noqa: E501
 
     :rtype: None
     """
+    if not limits.allow('DeletePhoto', '{}/users/{}'.format(API_SERVICE_NAME, user_id)):
+        return rate_limited()
+
     name = '{}/users/{}/photos/{}'.format(API_SERVICE_NAME, user_id, photo_id)
 
     try:
@@ -125,6 +150,13 @@ def get_photo(user_id, photo_id):  # noqa: E501
 
     :rtype: Photo
     """
+    if not limits.allow('GetPhoto', '{}/users/{}'.format(API_SERVICE_NAME, user_id)):
+        return rate_limited()
+
+    return find_photo(user_id, photo_id)
+
+
+def find_photo(user_id, photo_id):
     name = '{}/users/{}/photos/{}'.format(API_SERVICE_NAME, user_id, photo_id)
 
     photo = helper.get_photo(name)
@@ -148,6 +180,9 @@ def get_user(user_id):  # noqa: E501
     :rtype: User
     """
     name = '{}/users/{}'.format(API_SERVICE_NAME, user_id)
+    if not limits.allow('GetUser', name):
+        return rate_limited()
+
     user = helper.get_user(name)
 
     if not user:
@@ -187,6 +222,8 @@ def list_photos(user_id, order_by=None, page_token=None):  # noqa: E501
             'offset': 0,
             'page_size': PAGE_SIZE
         }
+    if not limits.allow('ListPhotos', token_context['parent']):
+        return rate_limited()
     
     try:
         photos, if_has_more_photos = helper.list_photos(**token_context)
@@ -218,10 +255,13 @@ def update_user(user_id, user=None):  # noqa: E501
 
     :rtype: User
     """
+    name = '{}/users/{}'.format(API_SERVICE_NAME, user_id)
+    if not limits.allow('UpdateUser', name):
+        return rate_limited()
+
     if connexion.request.is_json:
         user = User.from_dict(connexion.request.get_json())  # noqa: E501
     
-    name = '{}/users/{}'.format(API_SERVICE_NAME, user_id)
     user.name = name
     
     if not helper.get_user(name):
@@ -1 +1,2 @@
 from . import local
+from . import rate_limits
@@ -0,0 +1,154 @@
+# Copied from grpc/photo_album/server/helpers/rate_limits.py, since the two
+# servers are packaged separately; make changes there and copy them here.
+import collections
+import threading
+import time
+
+# The most buckets a method keeps; past it, the least recently used
+# bucket is dropped even if it is not full
+MAX_BUCKETS = 100000
+# Buckets checked for eviction per request; more than the one a request
+# may add, so that idle buckets are dropped faster than new ones appear
+EVICTIONS_PER_REQUEST = 2
+
+def parse_limits(value):
+    """Parses per-method rate limits.
+
+    Arguments:
+        value: A comma-separated list of method=rate[/burst] pairs, e.g.
+            "CreatePhoto=5/20,ListPhotos=20". Rates are requests per
+            second for each user; the burst, the most requests a user may
+            send at once, defaults to the rate.
+
+    Returns:
+        limits (dict): The (rate, burst) of each method name.
+    """
+    limits = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        method, _, limit = item.partition('=')
+        rate, _, burst = limit.partition('/')
+        rate = float(rate)
+        burst = float(burst) if burst else max(1.0, rate)
+        if rate <= 0 or burst < 1:
+            raise ValueError('Invalid rate limit: {}.'.format(item))
+        limits[method.strip()] = (rate, burst)
+    return limits
+
+class TokenBuckets(object):
+    """Token buckets of one method, keyed by the parent resource a request
+       acts on, e.g. //myapiservice.com/users/123.
+       A bucket holds its tokens and the time they were counted, and is
+       topped up when it is next used, so a request costs one lookup and
+       no background work. Buckets are kept from least to most recently
+       used. A bucket left alone long enough to fill up is no different
+       from a new one, so those at the old end are dropped as requests
+       come in; memory follows the users active within that time, capped
+       at max_buckets, rather than every user ever seen.
+    """
+    def __init__(self, rate, burst, max_buckets=MAX_BUCKETS):
+        """Initializer.
+
+        Arguments:
+            rate: The tokens added to each bucket per second.
+            burst: The most tokens a bucket holds.
+            max_buckets: The most buckets kept.
+
+        Returns:
+            None.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_buckets = max_buckets
+        # Seconds an empty bucket takes to fill up
+        self.fill_time = burst / rate
+        self.lock = threading.Lock()
+        # (tokens, time) of each parent, from least to most recently used
+        self.buckets = collections.OrderedDict()
+
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def allow(self, parent):
+        """Takes a token from a parent's bucket.
+
+        Returns:
+            A bool; False if the bucket is empty and the request must be
+            rejected.
+        """
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(parent)
+            if bucket is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                self.buckets.move_to_end(parent)
+            allowed = tokens >= 1
+            self.buckets[parent] = (tokens - 1 if allowed else tokens, now)
+            if allowed:
+                self.allowed += 1
+            else:
+                self.limited += 1
+            self.evict(now)
+            return allowed
+
+    def evict(self, now):
+        """Drops the least recently used buckets if they are full, or if
+           there are too many. Callers hold self.lock.
+        """
+        for _ in range(EVICTIONS_PER_REQUEST):
+            parent, (_, counted) = next(iter(self.buckets.items()))
+            if len(self.buckets) <= self.max_buckets and now - counted < self.fill_time:
+                return
+            del self.buckets[parent]
+            self.evicted += 1
+
+    def stats(self):
+        """Returns the buckets' counters.
+
+        Returns:
+            stats (dict): The buckets kept, and the requests allowed and
+                limited and the buckets evicted so far.
+        """
+        with self.lock:
+            return {
+                'buckets': len(self.buckets),
+                'allowed': self.allowed,
+                'limited': self.limited,
+                'evicted': self.evicted
+            }
+
+class RateLimits(object):
+    """Rate limits requests per method and parent resource, so that one
+       user sending a flood of requests cannot slow down everyone else.
+    """
+    def __init__(self, limits=None, max_buckets=MAX_BUCKETS):
+        """Initializer.
+
+        Arguments:
+            limits (dict): The (rate, burst) of each limited method name.
+            max_buckets: The most buckets kept for each method.
+
+        Returns:
+            None.
+        """
+        self.buckets = {
+            method: TokenBuckets(rate, burst, max_buckets)
+            for method, (rate, burst) in (limits or {}).items()
+        }
+
+    def allow(self, method, parent):
+        """Checks a request against its method's limit, if it has one.
+
+        Arguments:
+            method: The method name, e.g. CreatePhoto.
+            parent: The resource name of the user the request acts on.
+
+        Returns:
+            A bool; False if the request must be rejected.
+        """
+        buckets = self.buckets.get(method)
+        return buckets is None or buckets.allow(parent)